@@ -3,6 +3,8 @@ from microbit import pin2, pin14, pin15, pin0
 from microbit import display, button_a
 
 from utime import ticks_us, ticks_diff
+from math import atan2, sqrt, sin
+from array import array
 
 class K:
     NEDEFINOVANO = "nedefinovano"
@@ -23,7 +25,12 @@ class K:
     PI = 3.14159265359
     CARA = "cara"
     KRIZOVATKA = "krizovatka"
+    KRIZOVATKA_T = "T"  # cara vlevo i vpravo, rovne nepokracuje
+    KRIZOVATKA_X = "X"  # cara vlevo i vpravo i rovne
+    ODBOCKA_VLEVO = "odbocka_vlevo"
+    ODBOCKA_VPRAVO = "odbocka_vpravo"
     ZTRACEN = "ztracen"
+    ZASEKNUTO = "zaseknuto"
     ZATOC = "zatoc"
     ROVNE = "rovne"
     VPRAVO = "vpravo"
@@ -35,10 +42,13 @@ class Senzory:
 
     def __init__(self, verze=True):
         self.verze = verze
+        self.nahravac = None
         i2c.init(400000)
 
     def precti_senzory(self):
         surova_data_byte = i2c.read(0x38, 1)
+        if self.nahravac is not None:
+            self.nahravac.zapis_expander(surova_data_byte[0])
         bitove_pole = self.byte_na_bity(surova_data_byte)
 
         senzoricka_data = {}
@@ -68,11 +78,17 @@ class Enkoder:
 
         self.verze = verze
         self.tiky = 0
+        self.celkem_tiku = 0  # vypocti_rychlost nenuluje
         self.posledni_hodnota = -1
         self.tiky_na_otocku = 40
         self.inicializovano = False
         self.cas_posledni_rychlosti = ticks_us()
         self.radiany_za_sekundu = 0
+        # casy tiku v okne vypocti_rychlost: prvni, predposledni a posledni
+        self.cas_prvniho_tiku = 0
+        self.cas_predposledniho_tiku = 0
+        self.cas_posledniho_tiku = 0
+        self.nahravac = None
 
         if not self.verze:
             self.senzory = Senzory(False)
@@ -84,9 +100,15 @@ class Enkoder:
     def aktualni_hodnota(self):
         if self.verze:
             if self.jmeno == K.PR_ENKODER:
-                return pin15.read_digital()
+                hodnota = pin15.read_digital()
+                if self.nahravac is not None:
+                    self.nahravac.zapis_pin(15, hodnota)
+                return hodnota
             elif self.jmeno == K.LV_ENKODER:
-                return pin14.read_digital()
+                hodnota = pin14.read_digital()
+                if self.nahravac is not None:
+                    self.nahravac.zapis_pin(14, hodnota)
+                return hodnota
             else:
                 return -2
         else:
@@ -105,7 +127,13 @@ class Enkoder:
         if aktualni_enkoder >= 0:
             if self.posledni_hodnota != aktualni_enkoder:
                 self.posledni_hodnota = aktualni_enkoder
+                cas_ted = ticks_us()
+                if self.tiky == 0:
+                    self.cas_prvniho_tiku = cas_ted
+                self.cas_predposledniho_tiku = self.cas_posledniho_tiku
+                self.cas_posledniho_tiku = cas_ted
                 self.tiky += 1
+                self.celkem_tiku += 1
         else:
             return aktualni_enkoder
         return 0
@@ -117,8 +145,22 @@ class Enkoder:
         cas_ted = ticks_us()
         interval_us = ticks_diff(cas_ted, self.cas_posledni_rychlosti)
         if interval_us >= self.perioda_rychlosti:
+            if self.tiky >= 3:
+                # z doby mezi tiky je rychlost presnejsi nez z poctu tiku za okno; sudy pocet mezer,
+                # protoze vzestupna a sestupna hrana enkoderu nemusi byt stejne daleko
+                mezer = (self.tiky - 1) // 2 * 2
+                konec = self.cas_posledniho_tiku if mezer == self.tiky - 1 else self.cas_predposledniho_tiku
+                doba_tiku = ticks_diff(konec, self.cas_prvniho_tiku)
+                # kdyz od posledniho tiku uplynulo vic nez dve mezery (cela perioda enkoderu), kolo zpomalilo
+                # nebo stoji a rychlost z doby mezi tiky by byla stara, pak plati pocet tiku za cele okno
+                if ticks_diff(cas_ted, self.cas_posledniho_tiku) <= 2 * doba_tiku / mezer:
+                    interval_us = doba_tiku
+                    otacky = mezer/self.tiky_na_otocku
+                else:
+                    otacky = self.tiky/self.tiky_na_otocku
+            else:
+                otacky = self.tiky/self.tiky_na_otocku
             interval_s = self.us_na_s(interval_us)
-            otacky = self.tiky/self.tiky_na_otocku
             radiany = otacky * 2 * K.PI
             self.radiany_za_sekundu = radiany / interval_s
             self.tiky = 0
@@ -126,6 +168,112 @@ class Enkoder:
 
         return self.radiany_za_sekundu
 
+class Napajeni:
+    """
+    Napeti baterie z pin2, prumer z poslednich vzorku; koeficient() prepocita PWM z kalibrace na aktualni napeti
+    """
+
+    def __init__(self, perioda_us=500000, pocet_vzorku=8):
+        self.perioda_us = perioda_us  # baterie se vybiji pomalu, staci merit obcas
+        self.vzorky = array("f", [0.0] * pocet_vzorku)
+        self.nominalni = None  # V, napeti pri kalibraci motoru (Robot.kalibruj), None = nekompenzuje se
+        self.min_napeti = 4.0  # V, mene je napajeni z USB nebo chyba mereni, to se nekompenzuje
+        self.min_koeficient = 0.7
+        self.max_koeficient = 1.4
+        self.nahravac = None
+        self.vynuluj()
+
+    def vynuluj(self):
+        self.pozice = 0
+        self.soucet = 0.0
+        self.cas_mereni = None
+
+    def zmer(self):
+        hodnota = pin2.read_analog()
+        if self.nahravac is not None:
+            self.nahravac.zapis_analog(2, hodnota)
+        return 0.00898 * hodnota
+
+    def aktualizuj_se(self):
+        cas_ted = ticks_us()
+        if self.cas_mereni is not None and ticks_diff(cas_ted, self.cas_mereni) < self.perioda_us:
+            return
+        napeti = self.zmer()
+        if self.cas_mereni is None:
+            # prvni vzorek zaplni cele okno, prumer plati hned
+            for i in range(len(self.vzorky)):
+                self.vzorky[i] = napeti
+            self.soucet = napeti * len(self.vzorky)
+        else:
+            self.soucet += napeti - self.vzorky[self.pozice]
+            self.vzorky[self.pozice] = napeti
+            self.pozice = (self.pozice + 1) % len(self.vzorky)
+        self.cas_mereni = cas_ted
+
+    def napeti(self):
+        # V, prumer z poslednich vzorku, nebo hned zmerene, kdyz se jeste nemerilo
+        if self.cas_mereni is None:
+            return self.zmer()
+        return self.soucet / len(self.vzorky)
+
+    def koeficient(self):
+        # cim je baterie vybitejsi, tim vetsi PWM je potreba na stejne otacky
+        if self.nominalni is None or self.cas_mereni is None:
+            return 1
+        napeti = self.napeti()
+        if napeti < self.min_napeti:
+            return 1
+        return min(self.max_koeficient, max(self.min_koeficient, self.nominalni / napeti))
+
+class DetekceZaseknuti:
+    """
+    Zaseknute kolo: podle PWM a kalibrace by se kolo melo tocit, ale z enkoderu dlouho neprisel tik
+    """
+
+    def __init__(self, tiku=3, min_okno_us=50000, max_okno_us=500000, doba_rozjezdu_us=150000, pauza_us=500000):
+        self.zapnuto = True
+        self.tiku = tiku  # kolik tiku, ktere by kolo s danym PWM ujelo, muze chybet
+        self.min_okno_us = min_okno_us
+        self.max_okno_us = max_okno_us
+        self.doba_rozjezdu_us = doba_rozjezdu_us  # kolo z klidu se roztaci, prvni tik muze prijit pozdeji
+        self.pauza_us = pauza_us  # jak dlouho zaseknute kolo stoji, nez to zkusi znovu, 0 = az po jinem prikazu
+        self.pocet = 0  # kolikrat se kolo od zapnuti zaseklo
+        self.vynuluj()
+
+    def vynuluj(self):
+        self.hlidat = False  # kolo ma jet (jed_doprednou_rychlosti s nenulovou rychlosti)
+        self.cas_pohybu = 0  # cas posledniho tiku, pri rozjezdu posunuty o doba_rozjezdu_us dopredu
+        self.celkem_tiku = 0
+        self.zaseknuto = False
+        self.cas_zaseknuti = 0
+        self.smer = K.NEDEFINOVANO  # kterym smerem se kolo zaseklo
+
+    def rozjizdi_se(self, celkem_tiku):
+        self.hlidat = True
+        self.celkem_tiku = celkem_tiku
+        self.cas_pohybu = ticks_us() + self.doba_rozjezdu_us
+
+    def okno_us(self, tiky_za_s):
+        # jak dlouho muze enkoder mlcet, kdyz by podle PWM mel davat tiky_za_s
+        return int(min(self.max_okno_us, max(self.min_okno_us, self.tiku / tiky_za_s * 1000000)))
+
+    def aktualizuj(self, celkem_tiku, tiky_za_s):
+        # vrati True, kdyz se kolo prave zaseklo; tiky_za_s <= 0 = PWM kolo netoci nebo se nevi (nezkalibrovano)
+        cas_ted = ticks_us()
+        if celkem_tiku != self.celkem_tiku:
+            self.celkem_tiku = celkem_tiku
+            if ticks_diff(cas_ted, self.cas_pohybu) > 0:
+                self.cas_pohybu = cas_ted
+            return False
+        if not self.zapnuto or not self.hlidat or self.zaseknuto or tiky_za_s <= 0:
+            return False
+        if ticks_diff(cas_ted, self.cas_pohybu) < self.okno_us(tiky_za_s):
+            return False
+        self.zaseknuto = True
+        self.cas_zaseknuti = cas_ted
+        self.pocet += 1
+        return True
+
 class Motor:
     def __init__(self, jmeno, prumer_kola, verze=True):
         if jmeno == K.LEVY:
@@ -146,12 +294,34 @@ class Motor:
         self.min_pwm = 0
         self.perioda_regulace = 1000000 #v microsekundach
         self.cas_posledni_regulace = 0
+        # PI regulace otacek v prirustkovem tvaru, vychozi odpovida puvodnimu P = 6 jednou za sekundu
+        # (Robot.nalad_regulaci je zmeri releovym experimentem)
+        self.kp_otacek = 0  # PWM na rad/s
+        self.ki_otacek = 6  # PWM na rad/s za sekundu
+        self.posledni_chyba_otacek = 0
+        self.zbytek_PWM = 0  # zlomek akcniho zasahu, ktery se do celeho PWM jeste nevesel
+        self.pridavek_PWM = 0  # o kolik regulace otacek zmenila PWM z kalibrace, plati i po novem prikazu
         self.aktualni_rychlost = 0
+        self.posledni_tiky = 0  # pro prirustek_tiku
+        self.tiky_pred_zmenou = 0  # tiky ujete pred zmenou smeru, jeste nezapocitane v prirustek_tiku
 
         self.rych_rozjezd = -1
         self.pwm_rozjezd = -1
         self.a = 0
         self.b = 0
+        self.zkalibrovano = False
+        self.napajeni = None  # Napajeni, pak se PWM z kalibrace prepocita na aktualni napeti baterie
+
+        # mrtve pasmo motoru (viz mrtve_pasmo), -1 = nezname, pak se PWM neupravuje
+        self.min_pwm_rozjezd = -1  # od tohoto PWM se kolo rozjede z klidu
+        self.min_pwm_dojezd = -1  # pod timto PWM se jedouci kolo zastavi
+        self.doba_rozjezdu_us = 30000  # jak dlouho trva rozjezdovy pulz
+        self.rozjezd_do = None  # cas konce rozjezdoveho pulzu
+        self.pwm_po_rozjezdu = 0
+        self.jede = False
+        self.PWM = 0
+
+        self.zaseknuti = DetekceZaseknuti()
 
     def inicializuj(self):
         i2c.write(0x70, b"\x00\x01")
@@ -169,6 +339,12 @@ class Motor:
         self.rychlost_byla_zadana = True
 
         prvni_PWM = self.uhlova_na_PWM(abs(self.pozadovana_uhlova_r_kola))
+        puvodni_smer = self.smer
+        if self.pozadovana_uhlova_r_kola != 0 and puvodni_smer != K.NEDEFINOVANO and (
+                (self.pozadovana_uhlova_r_kola > 0) != (puvodni_smer == K.DOPREDU)):
+            # tik, ktery se jeste neprecetl, kolo ujelo puvodnim smerem
+            self.enkoder.aktualizuj_se()
+            self.tiky_pred_zmenou += self.prirustek_tiku()
         if self.pozadovana_uhlova_r_kola > 0:
             self.smer = K.DOPREDU
         elif self.pozadovana_uhlova_r_kola < 0:
@@ -176,8 +352,71 @@ class Motor:
         else:
             self.smer == K.NEDEFINOVANO
 
+        if self.smer != puvodni_smer:
+            # pri zmene smeru se kolo nejdriv zastavi, musi se znovu rozjet
+            self.jede = False
+            self.rozjezd_do = None
+        if self.pozadovana_uhlova_r_kola == 0 or self.smer != puvodni_smer:
+            self.pridavek_PWM = 0
+        elif prvni_PWM > 0:
+            # novy prikaz (napr. korekce synchronizace kol) nezahodi, co uz regulace otacek dorovnala
+            prvni_PWM = max(0, min(255, prvni_PWM + self.pridavek_PWM))
+        if self.zaseknuti.zaseknuto:
+            if self.pozadovana_uhlova_r_kola != 0 and self.smer == self.zaseknuti.smer:
+                # zaseknute kolo stoji, dokud nedostane jiny prikaz nebo neubehne pauza (aktualizuj_se)
+                return -5
+            self.zaseknuti.zaseknuto = False
+        if prvni_PWM >= 0:
+            prvni_PWM = self.mrtve_pasmo(prvni_PWM)
+        if prvni_PWM <= 0:
+            self.zaseknuti.hlidat = False
+        elif not self.zaseknuti.hlidat or self.smer != puvodni_smer:
+            self.zaseknuti.rozjizdi_se(self.enkoder.celkem_tiku)
         return self.jed_PWM(prvni_PWM)
 
+    def mrtve_pasmo(self, PWM):
+        # kolo v klidu se rozjede az od min_pwm_rozjezd, jedouci se zastavi pod min_pwm_dojezd:
+        # z klidu dostane kratky pulz min_pwm_rozjezd, pak jede zadanym PWM, ale aspon min_pwm_dojezd
+        if PWM == 0:
+            self.jede = False
+            self.rozjezd_do = None
+            return 0
+        if self.min_pwm_dojezd > 0:
+            PWM = max(PWM, self.min_pwm_dojezd)
+        if self.rozjezd_do is not None:
+            # rozjezdovy pulz bezi, po nem se pouzije posledni zadane PWM (aktualizuj_se)
+            self.pwm_po_rozjezdu = PWM
+            return max(PWM, self.min_pwm_rozjezd)
+        if not self.jede and 0 < PWM < self.min_pwm_rozjezd:
+            self.rozjezd_do = ticks_us() + self.doba_rozjezdu_us
+            self.pwm_po_rozjezdu = PWM
+            PWM = self.min_pwm_rozjezd
+        self.jede = True
+        return PWM
+
+    def ocekavane_tiky(self):
+        # tiky za sekundu, ktere by kolo s aktualnim PWM melo podle kalibrace davat, 0 = nevi nebo v mrtvem pasmu
+        if not self.zkalibrovano or self.PWM <= 0 or self.PWM < self.min_pwm_dojezd or self.a <= 0:
+            return 0
+        PWM = self.PWM
+        if self.napajeni is not None:
+            PWM /= self.napajeni.koeficient()
+        return max(0, (PWM - self.b) / self.a) * self.enkoder.tiky_na_otocku / (2 * K.PI)
+
+    def ujeta_vzdalenost(self):
+        # v m od zapnuti, enkoder nepozna smer, takze i couvani se pricita
+        return self.enkoder.celkem_tiku / self.enkoder.tiky_na_otocku * K.PI * self.prumer_kola
+
+    def prirustek_tiku(self):
+        # tiky od minuleho volani se znamenkem podle smeru, kterym motor jede (pro odometrii)
+        prirustek = self.enkoder.celkem_tiku - self.posledni_tiky
+        self.posledni_tiky = self.enkoder.celkem_tiku
+        if self.smer == K.DOZADU:
+            prirustek = -prirustek
+        prirustek += self.tiky_pred_zmenou
+        self.tiky_pred_zmenou = 0
+        return prirustek
+
     def dopredna_na_uhlovou(self, v: float):
         return v/(self.prumer_kola/2)
 
@@ -187,6 +426,8 @@ class Motor:
             return 0
         else:
             if self.zkalibrovano:
+                if self.napajeni is not None:
+                    return int((self.a*uhlova + self.b) * self.napajeni.koeficient())
                 return int(self.a*uhlova + self.b)
             else:
                 return -1
@@ -228,20 +469,43 @@ class Motor:
         return 0
 
     def aktualizuj_se(self, s_regulaci):
+        # vrati -5, kdyz se kolo prave zaseklo, zaseknute kolo stoji (viz DetekceZaseknuti)
         self.enkoder.aktualizuj_se()
+        if self.zaseknuti.zaseknuto:
+            if (self.zaseknuti.pauza_us > 0
+                    and ticks_diff(ticks_us(), self.zaseknuti.cas_zaseknuti) >= self.zaseknuti.pauza_us):
+                # po pauze to kolo zkusi znovu s poslednim zadanym prikazem
+                self.zaseknuti.zaseknuto = False
+                self.jed_doprednou_rychlosti(self.pozadovana_uhlova_r_kola * self.prumer_kola / 2)
+            return 0
+        if self.zaseknuti.aktualizuj(self.enkoder.celkem_tiku, self.ocekavane_tiky()):
+            # regulace by PWM zvedala az na 255, motor se vypne a regulace zacne znovu
+            self.zaseknuti.smer = self.smer
+            self.zaseknuti.hlidat = False
+            self.jede = False
+            self.rozjezd_do = None
+            self.posledni_chyba_otacek = 0
+            self.zbytek_PWM = 0
+            self.pridavek_PWM = 0
+            self.aktualni_rychlost = 0
+            self.jed_PWM(0)
+            return -5
+        if self.rozjezd_do is not None and ticks_diff(ticks_us(), self.rozjezd_do) >= 0:
+            self.rozjezd_do = None
+            self.jed_PWM(self.pwm_po_rozjezdu)
         if s_regulaci:
             cas_ted = ticks_us()
             cas_rozdil = ticks_diff(cas_ted, self.cas_posledni_regulace)
             navratova_hodnota = 0
             if cas_rozdil > self.perioda_regulace:
-                navratova_hodnota = self.reguluj_otacky()
+                navratova_hodnota = self.reguluj_otacky(cas_rozdil)
                 self.cas_posledni_regulace = cas_ted
 
             return navratova_hodnota
         else:
             return 0
 
-    def reguluj_otacky(self):
+    def reguluj_otacky(self, interval_us=None):
 
         if not self.inicializovano:
             return -1
@@ -249,7 +513,11 @@ class Motor:
         if not self.rychlost_byla_zadana:
             return -2
 
-        P = 6
+        if self.rozjezd_do is not None:
+            return 0
+
+        if interval_us is None:
+            interval_us = self.perioda_regulace
 
         self.aktualni_rychlost = self.enkoder.vypocti_rychlost()
 
@@ -257,17 +525,25 @@ class Motor:
             self.aktualni_rychlost *= -1
 
         error = self.pozadovana_uhlova_r_kola - self.aktualni_rychlost
-        akcni_zasah = P*error
+        akcni_zasah = (self.kp_otacek * (error - self.posledni_chyba_otacek)
+                       + self.ki_otacek * interval_us / 1000000 * error)
+        self.posledni_chyba_otacek = error
         return self.zmen_PWM_o(akcni_zasah)
 
     def zmen_PWM_o(self, akcni_zasah):
 
+        # zlomky se scitaji, jinak by male zasahy regulace nikdy nic nezmenily
+        akcni_zasah += self.zbytek_PWM
+        self.zbytek_PWM = akcni_zasah - int(akcni_zasah)
         akcni_zasah = int(akcni_zasah)
 
         if self.smer == K.DOZADU:
             akcni_zasah *= -1
 
         nove_PWM = self.PWM + akcni_zasah
+        if self.jede and 0 < nove_PWM < self.min_pwm_dojezd:
+            nove_PWM = self.min_pwm_dojezd
+        self.pridavek_PWM += max(0, min(255, nove_PWM)) - self.PWM
 
         return self.jed_PWM(nove_PWM)
 
@@ -284,6 +560,7 @@ class Motor:
 
         self.a = roz_pwm/roz_rych
         self.b = pwm - self.a*rych
+        self.min_pwm_rozjezd = self.pwm_rozjezd
         self.zkalibrovano = True
         return 0
 
@@ -302,6 +579,346 @@ class Motor:
 
         return rych
 
+class DetektorKrizovatek:
+    """
+    Hlasi krizovatku az po nekolika ctenich a kousku ujete drahy, jednou za krizovatku
+    """
+
+    def __init__(self, min_vzorku=2, min_delka=0.005, ignoruj_vzdalenost=0.1):
+        self.min_vzorku = min_vzorku  # kolikrat za sebou musi aspon dva senzory videt caru
+        self.min_delka = min_delka  # m, kolik musi robot na krizovatce ujet, nez se potvrdi
+        self.ignoruj_vzdalenost = ignoruj_vzdalenost  # m od zacatku krizovatky, kde se dalsi krizovatky nehlasi
+        self.vynuluj()
+
+    def vynuluj(self):
+        self.pocet_vzorku = 0
+        self.zacatek_ujeto = 0
+        self.zacatek_cas = 0
+        self.levy_videl = False
+        self.pravy_videl = False
+        self.nahlaseno = False
+        self.posledni_ujeto = None  # zacatek posledni nahlasene krizovatky
+        self.udalost = None  # (typ, cas_us, ujeto) posledni krizovatky
+
+    def typ(self, pokracuje_rovne):
+        if self.levy_videl and self.pravy_videl:
+            if pokracuje_rovne:
+                return K.KRIZOVATKA_X
+            return K.KRIZOVATKA_T
+        if self.levy_videl:
+            return K.ODBOCKA_VLEVO
+        return K.ODBOCKA_VPRAVO
+
+    def aktualizuj(self, data, ujeto, cas_ted):
+        """
+        Vrati K.KRIZOVATKA (jednou za krizovatku), K.CARA nebo K.ZTRACEN
+        """
+        levy = data[K.LV_S_CARY]
+        pravy = data[K.PR_S_CARY]
+        pocet = int(levy) + int(data[K.PROS_S_CARY]) + int(pravy)
+
+        if pocet < 2:
+            prave_prejel = (self.pocet_vzorku > 0 and self.udalost is not None
+                            and self.posledni_ujeto == self.zacatek_ujeto
+                            and ujeto - self.zacatek_ujeto < self.ignoruj_vzdalenost)
+            if prave_prejel:
+                # senzory prave prejely pres nahlasenou krizovatku, ted je videt, jestli cara pokracuje rovne
+                self.udalost = (self.typ(pocet == 1), self.udalost[1], self.udalost[2])
+            self.pocet_vzorku = 0
+            self.nahlaseno = False
+            if pocet == 1:
+                return K.CARA
+            return K.ZTRACEN
+
+        if self.pocet_vzorku == 0:
+            self.zacatek_ujeto = ujeto
+            self.zacatek_cas = cas_ted
+            self.levy_videl = False
+            self.pravy_videl = False
+        self.pocet_vzorku += 1
+        # odbocka vlevo sviti levym a prostrednim, krizovatka levym a pravym (nebo vsemi)
+        self.levy_videl = self.levy_videl or levy
+        self.pravy_videl = self.pravy_videl or pravy
+
+        if self.nahlaseno:
+            if self.udalost is not None and self.posledni_ujeto == self.zacatek_ujeto:
+                # pri sikmem prejezdu muze druha strana krizovatky prijit pozdeji
+                self.udalost = (self.typ(False), self.udalost[1], self.udalost[2])
+            return K.CARA
+
+        if self.pocet_vzorku < self.min_vzorku or ujeto - self.zacatek_ujeto < self.min_delka:
+            return K.CARA
+
+        self.nahlaseno = True
+        if self.posledni_ujeto is not None and self.zacatek_ujeto - self.posledni_ujeto < self.ignoruj_vzdalenost:
+            # porad ta sama krizovatka (siroka nebo robot na ni zacouval)
+            return K.CARA
+
+        self.posledni_ujeto = self.zacatek_ujeto
+        # jestli cara pokracuje rovne, se vi az za krizovatkou, zatim je to T
+        self.udalost = (self.typ(False), self.zacatek_cas, self.zacatek_ujeto)
+        return K.KRIZOVATKA
+
+class OdhadCary:
+    """
+    Odhad polohy cary mezi senzory z okamziku prechodu cary mezi senzory a ujete vzdalenosti z enkoderu
+    """
+    MAX_SKLON = 50  # rozestupu senzoru na metr, cca 40 stupnu k care
+
+    def __init__(self, interpolovat=False):
+        # False = poloha cary jen ze senzoru (po krocich), odhad se pouzije jen na derivaci
+        self.interpolovat = interpolovat
+        self.vynuluj()
+
+    def vynuluj(self):
+        self.stav = 0  # poloha cary podle senzoru
+        self.chyba = 0  # odhad polohy cary, v rozestupech senzoru, kladna = cara je vlevo
+        self.derivace = 0  # rozestupu za sekundu
+        self.sklon = 0  # o kolik se poloha cary zmeni na metr jizdy
+        self.hrana = 0  # poloha cary pri posledni zmene stavu (hranice mezi senzory)
+        self.ujeto_hrany = 0
+        self.cas_hrany = ticks_us()
+
+    def poloha_ze_senzoru(self, levy, prostredni, pravy):
+        # poloha cary v rozestupech senzoru, kladna = cara je vlevo (robot ma tocit doleva)
+        pocet = int(levy) + int(prostredni) + int(pravy)
+        if pocet == 0:
+            # caru nevidi zadny senzor, je tedy za krajnim senzorem na strane, kde byla naposledy
+            if self.stav > 0:
+                return 2
+            elif self.stav < 0:
+                return -2
+            return 0
+        if pocet >= 2:
+            # dva senzory vidi caru jen na krizovatce (cara je uzsi nez rozestup senzoru),
+            # poloha nasi cary se z nich poznat neda, plati posledni
+            return self.stav
+        return (int(levy) - int(pravy)) / pocet
+
+    def aktualizuj(self, data, ujeto, rychlost, cas_ted):
+        """
+        Vola se pri kazdem cteni senzoru, ujeto v m z enkoderu, rychlost v m/s (pozadovana dopredna)
+        """
+        stav = self.poloha_ze_senzoru(data[K.LV_S_CARY], data[K.PROS_S_CARY], data[K.PR_S_CARY])
+
+        if stav != self.stav:
+            # cara je prave na hranici mezi dvema stavy senzoru
+            hrana = (self.stav + stav) / 2
+            vzdalenost = ujeto - self.ujeto_hrany
+            if vzdalenost <= 0:
+                # enkodery od minule hrany netikly (jeden tik je cca 5 mm), vzdalenost se odhadne z casu
+                vzdalenost = rychlost * ticks_diff(cas_ted, self.cas_hrany) / 1000000
+
+            if hrana == self.hrana:
+                # cara se vratila pres stejnou hranici, vraci se asi stejne rychle, jako prisla
+                self.sklon = -self.sklon
+            elif vzdalenost > 0:
+                self.sklon = max(-self.MAX_SKLON, min(self.MAX_SKLON, (hrana - self.hrana) / vzdalenost))
+            else:
+                self.sklon = 0
+
+            self.stav = stav
+            self.hrana = hrana
+            self.ujeto_hrany = ujeto
+            self.cas_hrany = cas_ted
+
+        self.derivace = self.sklon * rychlost
+        if self.interpolovat:
+            # dal nez pul rozestupu od polohy podle senzoru cara byt nemuze, jinak by ji videl jiny senzor
+            chyba = self.hrana + self.sklon * (ujeto - self.ujeto_hrany)
+            self.chyba = max(stav - 0.5, min(stav + 0.5, chyba))
+        else:
+            self.chyba = stav
+        return self.chyba
+
+class RegulatorCary:
+    """
+    PD regulator jizdy po care ze tri senzoru
+    """
+
+    def __init__(self, kd=0.1, zpomaleni=0.5, min_podil_rychlosti=0.4):
+        # kd = 0 a zpomaleni = 0 jezdi stejne jako puvodni jed_po_care (jen -uhlova / 0 / +uhlova)
+        self.kd = kd  # s, jak silne se reaguje na rychlost zmeny polohy cary
+        self.zpomaleni = zpomaleni  # o kolik se zpomali v zatacce (0 az 1)
+        self.min_podil_rychlosti = min_podil_rychlosti  # pod tento podil dopredne rychlosti se nezpomaluje
+        self.vynuluj()
+
+    def vynuluj(self):
+        self.chyba = 0
+        self.derivace = 0
+        self.zakriveni = 0
+        self.cas_zmeny = ticks_us()
+
+    def reguluj(self, chyba, dopredna, uhlova, cas_ted, derivace=None):
+        """
+        Vrati (dopredna, uhlova) rychlost pro Robot.jed, chyba je poloha cary (viz OdhadCary)
+        """
+        if derivace is not None:
+            self.derivace = derivace
+            self.chyba = chyba
+        elif chyba != self.chyba:
+            # senzory jsou digitalni, derivaci jde spocitat jen pri zmene: skok / doba v predchozim stavu
+            doba_s = ticks_diff(cas_ted, self.cas_zmeny) / 1000000
+            self.derivace = (chyba - self.chyba) / max(doba_s, 0.01)
+            self.chyba = chyba
+            self.cas_zmeny = cas_ted
+        else:
+            self.derivace /= 2
+
+        self.zakriveni += (abs(chyba) - self.zakriveni) / 4
+
+        akcni_zasah = chyba + self.kd * self.derivace
+        akcni_zasah = max(-2, min(2, akcni_zasah))
+
+        podil_rychlosti = max(self.min_podil_rychlosti, 1 - self.zpomaleni * min(1, self.zakriveni))
+
+        return dopredna * podil_rychlosti, uhlova * akcni_zasah
+
+class SynchronizaceKol:
+    """
+    Krizova vazba kol: drahy kol z enkoderu se porovnavaji s pomerem rychlosti z Robot.jed, obe kola se dorovnavaji
+    """
+
+    def __init__(self, kp=4.0, max_korekce=0.05, perioda_us=50000):
+        self.kp = kp  # 1/s, korekce rychlosti kol na metr odchylky
+        self.max_korekce = max_korekce  # m/s
+        self.perioda_us = perioda_us  # jak casto Robot.aktualizuj_se posila korekci motorum
+        self.vynuluj()
+
+    def vynuluj(self):
+        # (leva, prava) / velikost: smer v rovine rychlosti kol, ve kterem se ma robot pohybovat
+        self.smer_leve = 0.0
+        self.smer_prave = 0.0
+        self.odchylka = 0.0  # m, jak daleko jsou drahy kol kolmo od zadaneho smeru
+        self.cas_korekce = None
+
+    def zadej(self, leva, prava):
+        velikost = sqrt(leva * leva + prava * prava)
+        if velikost == 0:
+            self.vynuluj()
+            return
+        smer_leve = leva / velikost
+        smer_prave = prava / velikost
+        # pri velke zmene pomeru (napr. z rovne na otaceni na miste) stara odchylka neplati
+        if smer_leve * self.smer_leve + smer_prave * self.smer_prave < 0.9:
+            self.odchylka = 0.0
+        self.smer_leve = smer_leve
+        self.smer_prave = smer_prave
+
+    def aktualizuj(self, draha_leve, draha_prave):
+        # prirustky drah kol v m se znamenkem, kolma slozka k zadanemu smeru je odchylka
+        self.odchylka += draha_leve * self.smer_prave - draha_prave * self.smer_leve
+
+    def korekce(self):
+        """
+        Vrati (korekce leve, korekce prave) v m/s, kolmo k zadanemu smeru proti odchylce
+        """
+        korekce = max(-self.max_korekce, min(self.max_korekce, self.kp * self.odchylka))
+        return -korekce * self.smer_prave, korekce * self.smer_leve
+
+def tabulka_sinu(kroku):
+    # sin pro prvni ctvrtinu otacky rozdelene na kroku dilku, vcetne pi/2
+    return array("f", [sin(i * 2 * K.PI / kroku) for i in range(kroku // 4 + 1)])
+
+class Goniometrie:
+    """
+    Sin a cos z predpocitane tabulky, uhel je cele cislo v KROKU dilcich na otacku
+    """
+    KROKU = 512
+    CTVRT = KROKU // 4
+    SINY = tabulka_sinu(KROKU)  # jen ctvrtina periody, zbytek ze symetrie
+
+    def na_dilky(uhel):
+        # rad -> cele dilky 0 .. KROKU-1
+        return round(uhel * Goniometrie.KROKU / (2 * K.PI)) % Goniometrie.KROKU
+
+    def sin(dilky):
+        dilky %= Goniometrie.KROKU
+        ctvrtina = dilky // Goniometrie.CTVRT
+        zbytek = dilky - ctvrtina * Goniometrie.CTVRT
+        if ctvrtina == 0:
+            return Goniometrie.SINY[zbytek]
+        if ctvrtina == 1:
+            return Goniometrie.SINY[Goniometrie.CTVRT - zbytek]
+        if ctvrtina == 2:
+            return -Goniometrie.SINY[zbytek]
+        return -Goniometrie.SINY[Goniometrie.CTVRT - zbytek]
+
+    def cos(dilky):
+        return Goniometrie.sin(dilky + Goniometrie.CTVRT)
+
+class Smer:
+    """
+    Natoceni na mrizce v celych ctvrtotackach (0 = osa x, 1 = osa y, 2, 3), bez chyby zaokrouhleni
+    """
+    POSUN_X = (1, 0, -1, 0)
+    POSUN_Y = (0, 1, 0, -1)
+    ZMENA = {K.ROVNE: 0, K.VLEVO: 1, K.VPRAVO: 3, K.VZAD: 2}
+
+    def po_prikazu(kvadrant, prikaz):
+        return (kvadrant + Smer.ZMENA[prikaz]) % 4
+
+    def posun(x, y, kvadrant, kroku=1):
+        return x + Smer.POSUN_X[kvadrant] * kroku, y + Smer.POSUN_Y[kvadrant] * kroku
+
+    def na_uhel(kvadrant):
+        return kvadrant * K.PI / 2
+
+    def z_uhlu(uhel):
+        # nejblizsi ctvrtotacka k uhlu v rad (napr. z odometrie)
+        return round(uhel / (K.PI / 2)) % 4
+
+class Odometrie:
+    """
+    Poloha x, y (m) a natoceni (rad, 0 = smer osy x, kladne doleva) robota z tiku enkoderu
+    """
+
+    def __init__(self, rozchod_kol, prumer_kola, tiky_na_otocku=40):
+        # konstanty na jeden tik, at se v aktualizuj jen nasobi
+        self.delka_tiku = K.PI * prumer_kola / tiky_na_otocku
+        self.polovina_tiku = self.delka_tiku / 2
+        self.uhel_tiku = self.delka_tiku / rozchod_kol
+        self.vynuluj()
+
+    def vynuluj(self, x=0.0, y=0.0, uhel=0.0):
+        self.x = x
+        self.y = y
+        # natoceni se drzi v celych tikach rozdilu kol, takze se chyba nescita
+        self.rozdil_tiku = round(uhel / self.uhel_tiku)
+        self.uhel_zacatku = uhel - self.rozdil_tiku * self.uhel_tiku
+        self.nastav_sin_cos()
+
+    def nastav_sin_cos(self):
+        dilky = Goniometrie.na_dilky(self.uhel())
+        self.cos_uhlu = Goniometrie.cos(dilky)
+        self.sin_uhlu = Goniometrie.sin(dilky)
+
+    def kvadrant(self):
+        return Smer.z_uhlu(self.uhel())
+
+    def uhel(self):
+        return self.uhel_zacatku + self.rozdil_tiku * self.uhel_tiku
+
+    def poloha(self):
+        return self.x, self.y, self.uhel()
+
+    def aktualizuj(self, tiky_leve, tiky_prave):
+        # tiky_leve a tiky_prave jsou prirustky se znamenkem od minuleho volani
+        if tiky_leve == 0 and tiky_prave == 0:
+            return
+
+        cos_puvodni = self.cos_uhlu
+        sin_puvodni = self.sin_uhlu
+        rozdil = tiky_prave - tiky_leve
+        if rozdil != 0:
+            self.rozdil_tiku += rozdil
+            self.nastav_sin_cos()
+
+        # posun ve smeru prumerneho natoceni pred a po zmene
+        polovina_posunu = (tiky_leve + tiky_prave) * self.polovina_tiku / 2
+        self.x += polovina_posunu * (cos_puvodni + self.cos_uhlu)
+        self.y += polovina_posunu * (sin_puvodni + self.sin_uhlu)
+
 class Robot:
 
     def __init__(self, rozchod_kol: float, prumer_kola: float, verze=True):
@@ -313,14 +930,53 @@ class Robot:
 
         self.levy_motor = Motor(K.LEVY, prumer_kola, verze)
         self.pravy_motor = Motor(K.PRAVY, prumer_kola, verze)
+        self.napajeni = Napajeni()
+        self.synchronizace = SynchronizaceKol()
+        self.synchronizovat_kola = True  # False = kazde kolo jede samo podle sve kalibrace
+        self.levy_motor.napajeni = self.napajeni
+        self.pravy_motor.napajeni = self.napajeni
         self.inicializovano = False
         self.cas_minule_reg = ticks_us()
         self.perioda_regulace = 1000000
         self.senzory = Senzory(verze)
 
         self.perioda_cary_us = 75000
-
-        self.posledni_cas_popojeti = 0
+        self.regulator_cary = RegulatorCary()
+        self.odhad_cary = OdhadCary()
+        self.detektor_krizovatek = DetektorKrizovatek()
+        self.pozadovana_dopredna = 0
+        self.dopr_rychlost_leve = 0  # m/s, rychlosti kol z posledniho Robot.jed (bez korekce synchronizace)
+        self.dopr_rychlost_prave = 0
+
+        self.posledni_cas_popojeti = None
+        self.zacatek_vzdalenosti = None  # ujeta_vzdalenost na zacatku jed_vzdalenost
+        self.rychlost_rozjezdu = 0
+        self.zrychleni = 0.5  # m/s^2, rozjezd a dojezd v jed_vzdalenost
+        self.min_dopredna = 0.08  # m/s, pomaleji uz kola nejedou (dojezd v jed_vzdalenost a otoc_se)
+        self.otoceni = None  # stav otoc_se
+        self.tolerance_otoceni = 0.35  # rad, jak daleko od zadaneho uhlu muze otoc_se skoncit na care
+
+        self.vzdalenost_senzoru = 0.05  # m, jak daleko pred osou kol jsou senzory cary
+        self.polomer_oblouku = 0.03  # m, polomer zataceni na krizovatce v jed_obloukem
+        self.oblouk = None
+        self.odometrie = Odometrie(rozchod_kol, prumer_kola)
+
+        # odkud hledej_caru zacne hledat: poloha a ujeta vzdalenost, kdy nejaky senzor naposledy videl caru
+        self.poloha_u_cary = (0.0, 0.0, 0.0)
+        self.ujeto_u_cary = 0
+        self.hledani = None  # stav hledej_caru
+        self.uhel_hledani = K.PI / 2  # rad, jak daleko do stran hledej_caru hleda
+        self.krok_rozmitani = 0.5  # rad, o kolik se rozmitani v hledej_caru pokazde rozsiri
+        self.mezera_cary = 0.05  # m, kolik hledej_caru projede rovne, kdyz byla cara naposledy uprostred
+
+        self.dopredna_pri_zaseknuti = 0  # kam robot jel, kdyz se naposledy zaseklo kolo (vyprosti_se)
+        self.vyprosteni = None  # stav vyprosti_se
+
+        self.soubor_mapy = None  # napr. "mapa.bin", nacte se v inicializuj (navigace.py)
+        self.ulozena_mapa = None  # (mapa, cil, trasa) ze souboru
+        # napr. "kalibrace.txt", kalibrace motoru a regulace otacek se do nej ulozi po kalibruj a nalad_regulaci
+        # a nacte v inicializuj (Nastaveni)
+        self.soubor_kalibrace = None
 
     def inicializuj(self):
         i2c.init(400000)
@@ -328,9 +984,68 @@ class Robot:
         self.pravy_motor.inicializuj()
         self.inicializovano = True
         self.posledni_cas_reg_cary_us = ticks_us()
+        self.regulator_cary.vynuluj()
+        self.odhad_cary.vynuluj()
+        self.detektor_krizovatek.vynuluj()
+        self.levy_motor.prirustek_tiku()
+        self.pravy_motor.prirustek_tiku()
+        self.odometrie.vynuluj()
+        self.synchronizace.vynuluj()
+        self.napajeni.aktualizuj_se()
+        if self.soubor_mapy is not None:
+            from navigace import Mapa  # navigace importuje cely_projekt, proto az tady
+            self.ulozena_mapa = Mapa.nacti(self.soubor_mapy)
+        if self.soubor_kalibrace is not None:
+            self.nacti_kalibraci()
         self.jed(0,0)
         return True
 
+    def uloz_kalibraci(self):
+        # kalibrace obou motoru, mrtve pasmo a regulace otacek ve formatu jmeno=hodnota
+        if self.soubor_kalibrace is None:
+            return -1
+        nominalni = self.napajeni.nominalni
+        nastaveni = {"nominalni_napeti": nominalni if nominalni is not None else 0.0}
+        for motor in (self.levy_motor, self.pravy_motor):
+            nastaveni[motor.jmeno + "_a"] = motor.a
+            nastaveni[motor.jmeno + "_b"] = motor.b
+            nastaveni[motor.jmeno + "_min_pwm_rozjezd"] = motor.min_pwm_rozjezd
+            nastaveni[motor.jmeno + "_min_pwm_dojezd"] = motor.min_pwm_dojezd
+            nastaveni[motor.jmeno + "_kp_otacek"] = motor.kp_otacek
+            nastaveni[motor.jmeno + "_ki_otacek"] = motor.ki_otacek
+            nastaveni[motor.jmeno + "_perioda_regulace"] = motor.perioda_regulace
+            nastaveni[motor.jmeno + "_perioda_rychlosti"] = motor.enkoder.perioda_rychlosti
+        return Nastaveni.uloz(self.soubor_kalibrace, nastaveni)
+
+    def nacti_kalibraci(self):
+        # vrati 0, nebo -1, kdyz v souboru kalibrace neni (motory zustanou nezkalibrovane, regulace vychozi)
+        vychozi = {"nominalni_napeti": 0.0}
+        for motor in (self.levy_motor, self.pravy_motor):
+            vychozi[motor.jmeno + "_a"] = 0.0
+            vychozi[motor.jmeno + "_b"] = 0.0
+            vychozi[motor.jmeno + "_min_pwm_rozjezd"] = motor.min_pwm_rozjezd
+            vychozi[motor.jmeno + "_min_pwm_dojezd"] = motor.min_pwm_dojezd
+            vychozi[motor.jmeno + "_kp_otacek"] = float(motor.kp_otacek)
+            vychozi[motor.jmeno + "_ki_otacek"] = float(motor.ki_otacek)
+            vychozi[motor.jmeno + "_perioda_regulace"] = int(motor.perioda_regulace)
+            vychozi[motor.jmeno + "_perioda_rychlosti"] = int(motor.enkoder.perioda_rychlosti)
+        nastaveni = Nastaveni.nacti(self.soubor_kalibrace, vychozi)
+        if nastaveni["levy_a"] <= 0 or nastaveni["pravy_a"] <= 0:
+            return -1
+        for motor in (self.levy_motor, self.pravy_motor):
+            motor.a = nastaveni[motor.jmeno + "_a"]
+            motor.b = nastaveni[motor.jmeno + "_b"]
+            motor.zkalibrovano = True
+            motor.min_pwm_rozjezd = nastaveni[motor.jmeno + "_min_pwm_rozjezd"]
+            motor.min_pwm_dojezd = nastaveni[motor.jmeno + "_min_pwm_dojezd"]
+            motor.kp_otacek = nastaveni[motor.jmeno + "_kp_otacek"]
+            motor.ki_otacek = nastaveni[motor.jmeno + "_ki_otacek"]
+            motor.perioda_regulace = nastaveni[motor.jmeno + "_perioda_regulace"]
+            motor.enkoder.perioda_rychlosti = nastaveni[motor.jmeno + "_perioda_rychlosti"]
+        if nastaveni["nominalni_napeti"] > 0:
+            self.napajeni.nominalni = nastaveni["nominalni_napeti"]
+        return 0
+
     def kalibruj(self, od, do, ink):
         if not self.inicializovano:
             return -1
@@ -380,6 +1095,7 @@ class Robot:
                 error = self.pravy_motor.aktualizuj_se(False)
                 if error < 0:
                     break
+                self.napajeni.aktualizuj_se()
                 sleep(5)
 
             if error < 0:
@@ -395,8 +1111,10 @@ class Robot:
 
             pwm += ink
 
+        self.zmer_dojezd(ink)
         error = self.levy_motor.jed_PWM(0)
         error = self.pravy_motor.jed_PWM(0)
+        self.zapocti_tiky()
 
         error = self.levy_motor.kalibruj(l_rych, pwm-ink)
         if error == -1:
@@ -410,25 +1128,202 @@ class Robot:
         elif error == -2:
             return -6
 
+        # kalibrace plati pri tomhle napeti, pri jinem se PWM prepocita (Napajeni.koeficient)
+        self.napajeni.nominalni = self.napajeni.napeti()
+        print("napajeci_napeti", self.napajeni.nominalni)
+        if self.soubor_kalibrace is not None:
+            self.uloz_kalibraci()
         return 0
 
 
+    def zmer_dojezd(self, ink):
+        # kola uz jedou, PWM se snizuje od rozjezdoveho po ink, dokud se kola nezastavi (min_pwm_dojezd)
+        motory = [motor for motor in (self.levy_motor, self.pravy_motor) if motor.pwm_rozjezd > 0]
+        if not motory:
+            return
+        pwm = max(motor.pwm_rozjezd for motor in motory)
+        while motory and pwm > 0:
+            for motor in motory:
+                motor.jed_PWM(pwm)
+            tiky = None
+            cas_minule = ticks_us()
+            while ticks_diff(ticks_us(), cas_minule) < 500000:
+                # prvni 0.2 s kolo dobiha z predchozi rychlosti, pak se pocitaji tiky
+                if tiky is None and ticks_diff(ticks_us(), cas_minule) >= 200000:
+                    tiky = [motor.enkoder.celkem_tiku for motor in motory]
+                for motor in motory:
+                    motor.aktualizuj_se(False)
+                sleep(5)
+            for motor, tiky_pred in zip(list(motory), tiky):
+                if motor.enkoder.celkem_tiku == tiky_pred:
+                    motor.min_pwm_dojezd = pwm + ink
+                    motor.jed_PWM(0)
+                    motory.remove(motor)
+            pwm -= ink
+
+    def zapocti_tiky(self):
+        # tiky z kalibrace a ladeni (motory se tam ridi primo pres jed_PWM) jen do odometrie,
+        # synchronizace kol by je jinak brala jako odchylku kol pri dalsi jizde
+        self.odometrie.aktualizuj(self.levy_motor.prirustek_tiku(), self.pravy_motor.prirustek_tiku())
+
+    def nalad_regulaci(self, uhlova=4, perioda_us=200000, pwm_releho=60, kmitu=5, limit_us=5000000):
+        # volat po kalibruj, obe kola se toci najednou jako pri kalibraci (robot se otaci na miste)
+        # releovy experiment: PWM se prepina o +-pwm_releho (kdyz se nevejde do 0-255 a nad dojezd, o mene)
+        # podle toho, jestli je kolo pod nebo nad uhlova (rad/s),
+        # z periody a rozkmitu otacek se spocita PI regulace otacek (Ziegler-Nichols) a overi se skokem rychlosti
+        # rychlost se meri stejne jako v regulaci, jednou za perioda_us; vrati 0, jinak zustane puvodni regulace
+        if not self.inicializovano:
+            return -1
+        motory = (self.levy_motor, self.pravy_motor)
+        for motor in motory:
+            if not motor.zkalibrovano:
+                return -2
+
+        puvodni = [(motor.kp_otacek, motor.ki_otacek, motor.perioda_regulace, motor.enkoder.perioda_rychlosti)
+                   for motor in motory]
+        self.levy_motor.smer = K.DOPREDU
+        self.pravy_motor.smer = K.DOZADU
+        # [PWM uprostred, rozkmit PWM, kolo je pod uhlova, casy prepnuti nahoru, maxima, minima,
+        #  nejvyssi a nejnizsi rychlost od prepnuti]
+        rele = []
+        for motor in motory:
+            stred = motor.uhlova_na_PWM(uhlova)
+            rozkmit_pwm = min(pwm_releho, 255 - stred, stred - max(motor.min_pwm_dojezd, 0))
+            if rozkmit_pwm < 20:
+                return -3
+            motor.enkoder.perioda_rychlosti = perioda_us
+            motor.enkoder.vypocti_rychlost()
+            rele.append([stred, rozkmit_pwm, True, [], [], [], 0, uhlova])
+            motor.jed_PWM(stred + rozkmit_pwm)
+
+        zacatek = ticks_us()
+        cas_mereni = zacatek
+        while ticks_diff(ticks_us(), zacatek) < limit_us:
+            for motor in motory:
+                motor.aktualizuj_se(False)
+            sleep(5)
+            cas_ted = ticks_us()
+            if ticks_diff(cas_ted, cas_mereni) < perioda_us:
+                continue
+            cas_mereni = cas_ted
+            for motor, stav in zip(motory, rele):
+                rychlost = motor.enkoder.vypocti_rychlost()
+                stav[6] = max(stav[6], rychlost)
+                stav[7] = min(stav[7], rychlost)
+                pod = rychlost < uhlova
+                if pod != stav[2]:
+                    stav[2] = pod
+                    if pod:
+                        stav[3].append(cas_ted)
+                        stav[4].append(stav[6])
+                        stav[5].append(stav[7])
+                        stav[6], stav[7] = 0, uhlova
+                    motor.jed_PWM(stav[0] + stav[1] if pod else stav[0] - stav[1])
+            if min(len(stav[3]) for stav in rele) > kmitu:
+                break
+
+        navratova_hodnota = 0
+        for motor, stav in zip(motory, rele):
+            # prvni kmit je rozjezd, nepocita se
+            casy, maxima, minima = stav[3][1:], stav[4][2:], stav[5][2:]
+            if len(casy) < 3:
+                navratova_hodnota = -4
+                break
+            perioda_kmitu = ticks_diff(casy[-1], casy[0]) / (len(casy) - 1) / 1000000
+            rozkmit = (sum(maxima) / len(maxima) - sum(minima) / len(minima)) / 2
+            kriticke_zesileni = 4 * stav[1] / (K.PI * max(rozkmit, 0.1))
+            motor.kp_otacek = 0.45 * kriticke_zesileni
+            motor.ki_otacek = 0.54 * kriticke_zesileni / perioda_kmitu
+            motor.perioda_regulace = perioda_us
+        if navratova_hodnota == 0:
+            navratova_hodnota = self.over_regulaci(uhlova * 0.7)
+            if navratova_hodnota != 0:
+                # na hrane stability, s polovicnim zesilenim jeste jednou
+                for motor in motory:
+                    motor.kp_otacek /= 2
+                    motor.ki_otacek /= 2
+                navratova_hodnota = self.over_regulaci(uhlova)
+
+        for motor in motory:
+            motor.jed_PWM(0)
+            motor.pridavek_PWM = 0
+        self.zapocti_tiky()
+        for motor, (kp, ki, perioda_regulace, perioda_rychlosti) in zip(motory, puvodni):
+            if navratova_hodnota != 0:
+                motor.kp_otacek, motor.ki_otacek = kp, ki
+                motor.perioda_regulace, motor.enkoder.perioda_rychlosti = perioda_regulace, perioda_rychlosti
+            print("regulace_otacek", motor.jmeno, motor.kp_otacek, motor.ki_otacek, motor.perioda_regulace)
+        if navratova_hodnota == 0 and self.soubor_kalibrace is not None:
+            self.uloz_kalibraci()
+        return navratova_hodnota
+
+    def over_regulaci(self, uhlova, doba_us=1500000):
+        # skok otacek obou kol (toceni na miste) s regulaci, po ustaleni musi byt rychlost do 15 % od uhlova
+        dopredna = uhlova * self.prumer_kola / 2
+        for motor in (self.levy_motor, self.pravy_motor):
+            motor.posledni_chyba_otacek = 0
+            motor.pridavek_PWM = 0
+        self.levy_motor.jed_doprednou_rychlosti(dopredna)
+        self.pravy_motor.jed_doprednou_rychlosti(-dopredna)
+        odchylky = []
+        zacatek = ticks_us()
+        while ticks_diff(ticks_us(), zacatek) < doba_us:
+            for motor in (self.levy_motor, self.pravy_motor):
+                cas_regulace = motor.cas_posledni_regulace
+                motor.aktualizuj_se(True)
+                # po ustaleni (posledni tretina) se bere rychlost z kazde regulace
+                if (motor.cas_posledni_regulace != cas_regulace
+                        and ticks_diff(motor.cas_posledni_regulace, zacatek) > doba_us * 2 // 3):
+                    odchylky.append(abs(abs(motor.aktualni_rychlost) - uhlova) / uhlova)
+            sleep(5)
+        if not odchylky or sum(odchylky) / len(odchylky) > 0.15 or max(odchylky) > 0.4:
+            return -6
+        return 0
+
     # pokrocily ukol 7
     def jed(self, dopredna_rychlost: float, uhlova_rychlost: float):
 
         if not self.inicializovano:
             return -1
 
-        dopr_rychlost_leve = dopredna_rychlost - self.d * uhlova_rychlost
-        dopr_rychlost_prave = dopredna_rychlost + self.d * uhlova_rychlost
-
-        self.levy_motor.jed_doprednou_rychlosti(dopr_rychlost_leve)
-        self.pravy_motor.jed_doprednou_rychlosti(dopr_rychlost_prave)
+        self.pozadovana_dopredna = dopredna_rychlost
+        self.dopr_rychlost_leve = dopredna_rychlost - self.d * uhlova_rychlost
+        self.dopr_rychlost_prave = dopredna_rychlost + self.d * uhlova_rychlost
+        if self.synchronizovat_kola:
+            self.synchronizace.zadej(self.dopr_rychlost_leve, self.dopr_rychlost_prave)
 
+        self.nastav_rychlosti_kol()
         return 0
 
+    def nastav_rychlosti_kol(self):
+        leva = self.dopr_rychlost_leve
+        prava = self.dopr_rychlost_prave
+        if self.synchronizovat_kola and (self.synchronizace.smer_leve != 0 or self.synchronizace.smer_prave != 0):
+            # korekce kolo neotoci ani nerozjede, stojici kolo zustane stat (enkoder nepozna smer)
+            korekce_leve, korekce_prave = self.synchronizace.korekce()
+            if leva * (leva + korekce_leve) > 0:
+                leva += korekce_leve
+            if prava * (prava + korekce_prave) > 0:
+                prava += korekce_prave
+            self.synchronizace.cas_korekce = ticks_us()
+
+        self.levy_motor.jed_doprednou_rychlosti(leva)
+        self.pravy_motor.jed_doprednou_rychlosti(prava)
+
     def zmer_a_vrat_napajeci_napeti(self):
-        return 0.00898 * pin2.read_analog()
+        # okamzite napeti, prumer za posledni sekundy je v self.napajeni.napeti()
+        return self.napajeni.zmer()
+
+    def nahravej(self, nahravac):
+        # vsechna cteni senzoru, enkoderu a casu se budou zapisovat do nahravace (viz nahravac.py)
+        global ticks_us
+        ticks_us = nahravac.ticks_us
+        self.senzory.nahravac = nahravac
+        self.napajeni.nahravac = nahravac
+        for motor in (self.levy_motor, self.pravy_motor):
+            motor.enkoder.nahravac = nahravac
+            if not motor.enkoder.verze:
+                motor.enkoder.senzory.nahravac = nahravac
 
     def aktualni_rychlost(self):
         levy_r = self.levy_motor.aktualni_rychlost * self.prumer_kola/2
@@ -439,56 +1334,266 @@ class Robot:
         v = levy_r + self.d * omega
         return v, omega
 
+    def ujeta_vzdalenost(self):
+        # v m od zapnuti, prumer obou kol (enkodery nepoznaji smer, pocita se i couvani)
+        return (self.levy_motor.ujeta_vzdalenost() + self.pravy_motor.ujeta_vzdalenost()) / 2
+
     def aktualizuj_se(self, s_motor_regulaci):
-        self.levy_motor.aktualizuj_se(s_motor_regulaci)
-        self.pravy_motor.aktualizuj_se(s_motor_regulaci)
+        # vrati K.ZASEKNUTO, kdyz se nektere kolo prave zaseklo (zaseknute kolo uz stoji), jinak None
+        self.napajeni.aktualizuj_se()
+        zaseknuto = self.levy_motor.aktualizuj_se(s_motor_regulaci) == -5
+        zaseknuto = self.pravy_motor.aktualizuj_se(s_motor_regulaci) == -5 or zaseknuto
+        if zaseknuto:
+            self.dopredna_pri_zaseknuti = self.pozadovana_dopredna
+        tiky_leve = self.levy_motor.prirustek_tiku()
+        tiky_prave = self.pravy_motor.prirustek_tiku()
+        self.odometrie.aktualizuj(tiky_leve, tiky_prave)
+
+        if self.synchronizovat_kola and self.synchronizace.cas_korekce is not None and (tiky_leve or tiky_prave):
+            self.synchronizace.aktualizuj(tiky_leve * self.odometrie.delka_tiku, tiky_prave * self.odometrie.delka_tiku)
+            if ticks_diff(ticks_us(), self.synchronizace.cas_korekce) >= self.synchronizace.perioda_us:
+                self.nastav_rychlosti_kol()
+        return K.ZASEKNUTO if zaseknuto else None
+
+    def poloha(self):
+        # (x, y, uhel) z odometrie, v m a rad od inicializuj (nebo robot.odometrie.vynuluj)
+        return self.odometrie.poloha()
 
     def vycti_senzory_cary(self):
-
+        # K.KRIZOVATKA se vrati jednou za krizovatku, typ a cas je v posledni_krizovatka()
+        # (T nebo X se pozna, az senzory prejedou za krizovatku a vycti_senzory_cary se dal vola)
         senzoricka_data = self.senzory.precti_senzory()
+        ujeto = self.ujeta_vzdalenost()
+        situace = self.detektor_krizovatek.aktualizuj(senzoricka_data, ujeto, ticks_us())
+        if situace != K.ZTRACEN:
+            self.ujeto_u_cary = ujeto
+            self.poloha_u_cary = self.odometrie.poloha()
+        return situace
 
-        if senzoricka_data[K.LV_S_CARY] and senzoricka_data[K.PR_S_CARY]:
-            return K.KRIZOVATKA
-        if senzoricka_data[K.LV_S_CARY] and senzoricka_data[K.PROS_S_CARY]:
-            return K.KRIZOVATKA
-        if senzoricka_data[K.PROS_S_CARY] and senzoricka_data[K.PR_S_CARY]:
-            return K.KRIZOVATKA
-
-        elif not senzoricka_data[K.LV_S_CARY] and not senzoricka_data[K.PR_S_CARY] and not senzoricka_data[K.PROS_S_CARY]:
-            return K.ZTRACEN
-        else:
-            return K.CARA
+    def posledni_krizovatka(self):
+        # (typ, cas_us, ujeta vzdalenost) nebo None, typ je K.KRIZOVATKA_T, K.KRIZOVATKA_X, K.ODBOCKA_VLEVO/VPRAVO
+        return self.detektor_krizovatek.udalost
 
     def jed_po_care(self, dopredna, uhlova):
         cas_ted = ticks_us()
 
+        # odhad polohy cary potrebuje kazde cteni senzoru, aby znal presne okamziky prechodu
+        data = self.senzory.precti_senzory()
+        self.odhad_cary.aktualizuj(data, self.ujeta_vzdalenost(), self.pozadovana_dopredna, cas_ted)
+
         if ticks_diff(cas_ted, self.posledni_cas_reg_cary_us) > self.perioda_cary_us:
             self.posledni_cas_reg_cary_us = cas_ted
-            data = self.senzory.precti_senzory()
-
-            if data[K.LV_S_CARY]:
-                self.jed(dopredna, uhlova)
-
-            if data[K.PR_S_CARY]:
-                self.jed(dopredna, -uhlova)
 
-            if not data[K.LV_S_CARY] and not data[K.PR_S_CARY]:
-                self.jed(dopredna, 0)
+            # uhlova je rychlost otaceni, kdyz je cara pod krajnim senzorem
+            dopredna, uhlova = self.regulator_cary.reguluj(self.odhad_cary.chyba, dopredna, uhlova, cas_ted,
+                                                           self.odhad_cary.derivace)
+            self.jed(dopredna, uhlova)
 
     def popojed(self, dopredna, perioda_us):
+        # jede podle casu, ujeta vzdalenost zavisi na baterii a kalibraci, lepsi je jed_vzdalenost
 
-        if self.posledni_cas_popojeti == 0:
+        if self.posledni_cas_popojeti is None:
             self.posledni_cas_popojeti = ticks_us()
 
         cas_ted = ticks_us()
         if ticks_diff(cas_ted, self.posledni_cas_popojeti) > perioda_us:
-            self.posledni_cas_popojeti = 0
+            self.posledni_cas_popojeti = None
             self.jed(0,0)
             return True
         else:
             self.jed(dopredna, 0)
             return False
 
+    def jed_vzdalenost(self, dopredna, vzdalenost, zacatek=None):
+        # ujede vzdalenost v m podle enkoderu, vola se, dokud nevrati True
+        # zacatek je ujeta_vzdalenost(), od ktere se meri (napr. posledni_krizovatka()[2]), jinak od prvniho volani
+        ujeto = self.ujeta_vzdalenost()
+        if self.zacatek_vzdalenosti is None:
+            self.zacatek_vzdalenosti = ujeto if zacatek is None else zacatek
+            self.rychlost_rozjezdu = max(self.min_dopredna, abs(self.pozadovana_dopredna))
+
+        ujeto -= self.zacatek_vzdalenosti
+        zbyva = vzdalenost - ujeto
+        if zbyva <= 0:
+            self.zacatek_vzdalenosti = None
+            self.jed(0, 0)
+            return True
+
+        # lichobeznikovy profil: rozjezd a dojezd se stalym zrychlenim (v^2 = v0^2 + 2as), mezi nimi dopredna
+        rychlost = min(abs(dopredna),
+                       sqrt(self.rychlost_rozjezdu ** 2 + 2 * self.zrychleni * ujeto),
+                       sqrt(self.min_dopredna ** 2 + 2 * self.zrychleni * zbyva))
+        if dopredna < 0:
+            rychlost = -rychlost
+        self.jed(rychlost, 0)
+        return False
+
+    def jed_obloukem(self, dopredna, smer):
+        # projede krizovatkou obloukem bez zastaveni, smer je K.VLEVO nebo K.VPRAVO
+        # vola se z krizovatky (senzory na prcne care), dokud nevrati True
+        if self.oblouk is None:
+            polomer = min(self.polomer_oblouku, self.vzdalenost_senzoru)
+            if smer == K.VLEVO:
+                vnejsi, vnitrni, uhlova = self.pravy_motor, self.levy_motor, dopredna / polomer
+            else:
+                vnejsi, vnitrni, uhlova = self.levy_motor, self.pravy_motor, -dopredna / polomer
+            # pri polomeru mensim nez polovina rozchodu vnitrni kolo couva (enkoder smer nepozna)
+            znamenko = 1 if polomer >= self.d else -1
+            # osa kol musi nejdriv dojet na polomer pred stred krizovatky
+            konec_rovne = vnejsi.ujeta_vzdalenost() + self.vzdalenost_senzoru - polomer
+            self.oblouk = [vnejsi, vnitrni, konec_rovne, uhlova, znamenko, None, None]
+
+        vnejsi, vnitrni, konec_rovne, uhlova, znamenko, zacatek_vnejsi, zacatek_vnitrni = self.oblouk
+        if zacatek_vnejsi is None:
+            if vnejsi.ujeta_vzdalenost() < konec_rovne:
+                self.jed(dopredna, 0)
+                return False
+            zacatek_vnejsi = self.oblouk[5] = vnejsi.ujeta_vzdalenost()
+            zacatek_vnitrni = self.oblouk[6] = vnitrni.ujeta_vzdalenost()
+
+        # o kolik se robot otocil, z rozdilu drah kol (funguje, i kdyz se vnitrni kolo zastavi)
+        uhel = ((vnejsi.ujeta_vzdalenost() - zacatek_vnejsi)
+                - znamenko * (vnitrni.ujeta_vzdalenost() - zacatek_vnitrni)) / (2 * self.d)
+        if uhel >= K.PI / 2:
+            self.oblouk = None
+            return True
+
+        self.jed(dopredna, uhlova)
+        return False
+
+    def otoc_se(self, uhlova, uhel, na_miste=True, senzor=None):
+        # otoci robota o uhel v rad (kladny doleva) podle enkoderu, vola se, dokud nevrati True
+        # na_miste=False otaci kolem vnitrniho kola, ktere stoji
+        # se senzorem (napr. K.PROS_S_CARY) skonci, az senzor uvidi caru, ale jen do tolerance_otoceni od uhlu
+        smer = 1 if uhel >= 0 else -1
+        rameno = self.d if na_miste else 2 * self.d  # vzdalenost vnejsiho kola od stredu otaceni
+        if self.otoceni is None:
+            # enkodery smer nepoznaji, znamenka drah kol jsou dana smerem otaceni
+            if na_miste:
+                znamenko_leve, znamenko_prave = -smer, smer
+            elif smer > 0:
+                znamenko_leve, znamenko_prave = 0, 1
+            else:
+                znamenko_leve, znamenko_prave = 1, 0
+            self.otoceni = (self.levy_motor.ujeta_vzdalenost(), self.pravy_motor.ujeta_vzdalenost(),
+                            znamenko_leve, znamenko_prave)
+
+        zacatek_leve, zacatek_prave, znamenko_leve, znamenko_prave = self.otoceni
+        otoceno = (znamenko_prave * (self.pravy_motor.ujeta_vzdalenost() - zacatek_prave)
+                   - znamenko_leve * (self.levy_motor.ujeta_vzdalenost() - zacatek_leve)) / (2 * self.d)
+        zbyva = abs(uhel) - smer * otoceno
+
+        if senzor is None:
+            hotovo = zbyva <= 0
+        else:
+            hotovo = zbyva <= -self.tolerance_otoceni or (
+                zbyva <= self.tolerance_otoceni and self.senzory.precti_senzory()[senzor])
+        if hotovo:
+            self.otoceni = None
+            self.jed(0, 0)
+            return True
+
+        # pred cilem zpomaluje, vnejsi kolo dojizdi se zrychlenim robot.zrychleni na min_dopredna
+        rychlost = min(abs(uhlova), sqrt(self.min_dopredna ** 2 + 2 * self.zrychleni * rameno * max(zbyva, 0)) / rameno)
+        if na_miste:
+            self.jed(0, smer * rychlost)
+        else:
+            self.jed(self.d * rychlost, smer * rychlost)
+        return False
+
+    def natoc_se(self, uhlova, uhel):
+        # natoci robota na miste na uhel z odometrie (rad), vola se, dokud nevrati True
+        chyba = (uhel - self.odometrie.uhel() + K.PI) % (2 * K.PI) - K.PI
+        if abs(chyba) <= 2 * self.odometrie.uhel_tiku:  # na miste se uhel meni po dvou tikach
+            self.jed(0, 0)
+            return True
+        self.jed(0, abs(uhlova) if chyba > 0 else -abs(uhlova))
+        return False
+
+    def hledej_caru(self, dopredna, uhlova, limit_us=8000000):
+        # po ztrate cary (K.ZTRACEN) caru hleda, vola se, dokud nevrati K.CARA (nasel) nebo K.ZTRACEN (vzdal to)
+        # 1. obloukem na stranu, kde byla cara videt naposledy (byla-li uprostred, rovne pres mezeru v care)
+        # 2. na miste rozmita kolem smeru, kdy byla cara videt, pokazde o krok_rozmitani dal do stran
+        # 3. po odometrii couvne na misto, kde byla cara videt, a natoci se jako tehdy
+        cas_ted = ticks_us()
+        data = self.senzory.precti_senzory()
+        if self.hledani is None:
+            strana = 1 if self.odhad_cary.stav > 0 else -1 if self.odhad_cary.stav < 0 else 0
+            self.hledani = [1, cas_ted, strana, 0, 0]  # faze, zacatek, strana, krok rozmitani, konec couvani
+        if data[K.LV_S_CARY] or data[K.PROS_S_CARY] or data[K.PR_S_CARY]:
+            # motory jedou dal, jed_po_care hned navaze
+            self.hledani = None
+            return K.CARA
+        if ticks_diff(cas_ted, self.hledani[1]) > limit_us:
+            self.hledani = None
+            self.jed(0, 0)
+            return K.ZTRACEN
+
+        faze, zacatek, strana, krok, konec_couvani = self.hledani
+        x, y, uhel = self.odometrie.poloha()
+        x_cary, y_cary, uhel_cary = self.poloha_u_cary
+        if faze == 1:
+            if strana == 0:
+                hotovo = self.ujeta_vzdalenost() - self.ujeto_u_cary >= self.mezera_cary
+                self.jed(dopredna, 0)
+            else:
+                hotovo = strana * (uhel - uhel_cary) >= self.uhel_hledani
+                self.jed(dopredna, strana * abs(uhlova))
+            if hotovo:
+                self.hledani[0] = 2
+
+        elif faze == 2:
+            # na strana * krok_rozmitani, pak na druhou stranu, pak na strana * 2 * krok_rozmitani, ...
+            amplituda = self.krok_rozmitani * (krok // 2 + 1)
+            smer = (strana or 1) * (1 if krok % 2 == 0 else -1)
+            if amplituda > self.uhel_hledani:
+                self.hledani[0] = 3
+            elif smer * (uhel - uhel_cary) >= amplituda:
+                self.hledani[3] = krok + 1
+            else:
+                self.jed(0, smer * abs(uhlova))
+
+        elif faze == 3:
+            # zadkem k mistu, kde byla cara videt
+            dx = x_cary - x
+            dy = y_cary - y
+            if dx * dx + dy * dy < 0.0001:
+                self.hledani[0] = 5
+            elif self.natoc_se(uhlova, atan2(dy, dx) + K.PI):
+                self.hledani[0] = 4
+                self.hledani[4] = self.ujeta_vzdalenost() + sqrt(dx * dx + dy * dy)
+
+        elif faze == 4:
+            if self.ujeta_vzdalenost() >= konec_couvani:
+                self.hledani[0] = 5
+            else:
+                self.jed(-abs(dopredna), 0)
+
+        elif faze == 5:
+            if self.natoc_se(uhlova, uhel_cary):
+                self.hledani[0] = 6  # senzory jsou tam, kde caru videly naposledy, jeste jedno cteni
+
+        else:
+            self.hledani = None
+            self.jed(0, 0)
+            return K.ZTRACEN
+        return None
+
+    def vyprosti_se(self, dopredna, vzdalenost):
+        # po zaseknuti kola (aktualizuj_se vratilo K.ZASEKNUTO) odjede o vzdalenost opacne, nez jel,
+        # vola se, dokud nevrati True; prerusena jizda (jed_vzdalenost, otoc_se, ...) se zahodi
+        if self.vyprosteni is None:
+            self.zacatek_vzdalenosti = None
+            self.otoceni = None
+            self.oblouk = None
+            self.hledani = None
+            self.posledni_cas_popojeti = None
+            self.vyprosteni = -abs(dopredna) if self.dopredna_pri_zaseknuti >= 0 else abs(dopredna)
+        if self.jed_vzdalenost(self.vyprosteni, vzdalenost):
+            self.vyprosteni = None
+            return True
+        return False
+
     def zatoc(self, dopredna, uhlova, senzor):
 
         senzoricka_data = self.senzory.precti_senzory()
@@ -505,3 +1610,38 @@ class Obrazovka:
     def pis(text):
         display.show(text[0])
         print(text)
+
+class Nastaveni:
+    # nacte parametry ze souboru ve formatu jmeno=hodnota (napr. z simulace/optimalizace.py)
+    # parametry, ktere v souboru nejsou (nebo soubor neexistuje), zustanou vychozi
+    def nacti(jmeno_souboru, vychozi):
+        nastaveni = dict(vychozi)
+        try:
+            with open(jmeno_souboru) as soubor:
+                obsah = soubor.read()
+        except OSError:
+            return nastaveni
+
+        for radek in obsah.split("\n"):
+            radek = radek.strip()
+            if radek == "" or radek[0] == "#" or "=" not in radek:
+                continue
+            jmeno, hodnota = radek.split("=", 1)
+            jmeno = jmeno.strip()
+            if jmeno in nastaveni:
+                if type(nastaveni[jmeno]) == int:
+                    nastaveni[jmeno] = int(float(hodnota))
+                else:
+                    nastaveni[jmeno] = float(hodnota)
+
+        return nastaveni
+
+    def uloz(jmeno_souboru, nastaveni):
+        # zapise nastaveni ve formatu, ktery nacte nacti; vrati 0, nebo -1, kdyz se soubor zapsat neda
+        try:
+            with open(jmeno_souboru, "w") as soubor:
+                for jmeno in sorted(nastaveni):
+                    soubor.write(jmeno + "=" + str(nastaveni[jmeno]) + "\n")
+        except OSError:
+            return -1
+        return 0
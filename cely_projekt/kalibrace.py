@@ -140,7 +140,8 @@ class Kalibrace:
             print("spatny akcelerace")
             return -1
 
-        print(aktualni_rychlost_leve, pwm, aktualni_rychlost_prave, pwm, sep=";")
+        # napeti u kazdeho radku, at je videt, pri jakem stavu baterie kalibrace plati
+        print(aktualni_rychlost_leve, pwm, aktualni_rychlost_prave, pwm, self.zmer_a_vrat_napajeci_napeti(), sep=";")
         return 0
 
     def __vypocti_min_rozjezd_rychlost(self, rychlost, pwm, jmeno):
@@ -0,0 +1,137 @@
+from utime import ticks_us, ticks_diff
+
+# Nahravani vstupu robota do souboru, aby se dala jizda prehrat na pocitaci
+# (simulace/prehravac.py) a stavovy automat videl presne stejne vstupy.
+# Nahrava se kazde cteni IO expanderu (0x38), enkoderu na pinech 14/15, napeti baterie
+# na pin2, tlacitek a kazde volani ticks_us v cely_projekt.py (aby i casovani bylo presne stejne).
+#
+# Format souboru:
+#   hlavicka: b"NZ", verze (1 byte), cas zacatku nahravani v us (4 byty, little endian)
+#   zaznamy: 2 byty = typ (horni 4 bity) a cas od minuleho zaznamu v us (12 bitu),
+#   u typu EXPANDER nasleduje jeste 1 byte s hodnotou, u typu ANALOG2 2 byty (little endian).
+#   U pinu a tlacitek je hodnota (0/1) primo v typu (typ + hodnota).
+#   Pokud je cas od minuleho zaznamu vetsi nez 4095 us, predchazi zaznamy typu PRETECENI,
+#   kazdy pricita svuj casovy udaj * 4096 us
+
+VERZE = 3
+
+PRETECENI = 0
+EXPANDER = 1  # byte z IO expanderu 0x38
+CAS = 2  # volani ticks_us
+PIN14 = 3  # levy enkoder (nova verze robota), 3 a 4
+PIN15 = 5  # pravy enkoder (nova verze robota), 5 a 6
+A_WAS_PRESSED = 7
+A_IS_PRESSED = 9
+B_WAS_PRESSED = 11
+B_IS_PRESSED = 13
+ANALOG2 = 15  # pin2.read_analog, napeti baterie
+
+MAX_ROZDIL = 0xFFF
+
+class Nahravac:
+
+    def __init__(self, jmeno_souboru="zaznam.bin", velikost_bufferu=512):
+        self.jmeno_souboru = jmeno_souboru
+        self.buffer = bytearray(velikost_bufferu)
+        self.pozice = 0
+        self.soubor = None
+        self.cas_minule = 0
+
+    def zacni(self):
+        self.soubor = open(self.jmeno_souboru, "wb")
+        self.cas_minule = ticks_us()
+        self.soubor.write(b"NZ" + bytes([VERZE]) + (self.cas_minule & 0xFFFFFFFF).to_bytes(4, "little"))
+        self.pozice = 0
+
+    def zapis(self, typ, hodnota=0):
+        if self.soubor is None:
+            return -1
+
+        cas_ted = ticks_us()
+        rozdil = ticks_diff(cas_ted, self.cas_minule)
+        self.cas_minule = cas_ted
+
+        while rozdil > MAX_ROZDIL:
+            pretekl = min(rozdil >> 12, MAX_ROZDIL)
+            self.pridej(PRETECENI, pretekl)
+            rozdil -= pretekl << 12
+
+        if typ == EXPANDER:
+            self.pridej(typ, rozdil)
+            self.buffer[self.pozice] = hodnota
+            self.pozice += 1
+        elif typ == ANALOG2:
+            self.pridej(typ, rozdil)
+            self.buffer[self.pozice] = hodnota & 0xFF
+            self.buffer[self.pozice + 1] = hodnota >> 8
+            self.pozice += 2
+        else:
+            self.pridej(typ + hodnota, rozdil)
+
+        if self.pozice > len(self.buffer) - 8:
+            self.vyprazdni()
+        return cas_ted
+
+    def pridej(self, typ, rozdil):
+        self.buffer[self.pozice] = (typ << 4) | (rozdil >> 8)
+        self.buffer[self.pozice + 1] = rozdil & 0xFF
+        self.pozice += 2
+
+    def vyprazdni(self):
+        if self.pozice > 0:
+            self.soubor.write(self.buffer[:self.pozice])
+            self.pozice = 0
+
+    def ukonci(self):
+        if self.soubor is None:
+            return
+        self.vyprazdni()
+        self.soubor.close()
+        self.soubor = None
+
+    def ticks_us(self):
+        # nahrada ticks_us v cely_projekt.py (viz Robot.nahravej), cas se zaroven zapise
+        if self.soubor is None:
+            return ticks_us()
+        return self.zapis(CAS)
+
+    def zapis_expander(self, byte):
+        return self.zapis(EXPANDER, byte)
+
+    def zapis_pin(self, cislo, hodnota):
+        if cislo == 14:
+            return self.zapis(PIN14, hodnota)
+        elif cislo == 15:
+            return self.zapis(PIN15, hodnota)
+        return -2
+
+    def zapis_analog(self, cislo, hodnota):
+        if cislo == 2:
+            return self.zapis(ANALOG2, hodnota)
+        return -2
+
+    def obal_tlacitko(self, tlacitko, jmeno):
+        return NahravaneTlacitko(tlacitko, jmeno, self)
+
+class NahravaneTlacitko:
+    # nahradi microbit.button_a/button_b, vola puvodni tlacitko a vysledek zapise
+
+    def __init__(self, tlacitko, jmeno, nahravac):
+        self.tlacitko = tlacitko
+        self.nahravac = nahravac
+        if jmeno == "a":
+            self.typ_was = A_WAS_PRESSED
+            self.typ_is = A_IS_PRESSED
+        else:
+            self.typ_was = B_WAS_PRESSED
+            self.typ_is = B_IS_PRESSED
+
+    def was_pressed(self):
+        hodnota = self.tlacitko.was_pressed()
+        self.nahravac.zapis(self.typ_was, int(hodnota))
+        return hodnota
+
+    def is_pressed(self):
+        hodnota = self.tlacitko.is_pressed()
+        self.nahravac.zapis(self.typ_is, int(hodnota))
+        return hodnota
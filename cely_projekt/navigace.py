@@ -0,0 +1,450 @@
+from math import sqrt
+
+from utime import ticks_diff
+
+from cely_projekt import K, Smer
+from trasa import PRIKAZY
+
+# Mapa krizovatek na mrizce a planovani trasy (seznam prikazu K.ROVNE, K.VLEVO, ...)
+#
+# Kazda krizovatka je jeden byte v bytearray (radky po y, sloupce po x):
+#   dolni 4 bity: ktere vystupy vedou dal (bit k = vystup ve smeru kvadrantu k, viz Smer)
+#   horni 4 bity: ktere vystupy uz robot zna (videl, jestli tam cara je, nebo neni)
+# Kvadranty: 0 = +x, 1 = +y, 2 = -x, 3 = -y (0 je smer, kam robot miri na startu).
+#
+# Trasa zacina na krizovatce (x, y), na kterou robot prijel ve smeru kvadrant,
+# prvni prikaz se provede na ni, posledni na krizovatce pred cilem a na cili
+# uz je seznam prikazu u konce (stejne jako prelozena Trasa ve stavovem automatu).
+
+# Soubor s mapou a trasou (Mapa.uloz, Mapa.nacti, na pocitaci simulace/mapa_nastroj.py):
+#   b"MB", verze (1 byte), sirka, vyska, cil_x, cil_y (po 1 bytu), bunky mapy (sirka * vyska bytu),
+#   delka trasy (2 byty, little endian), trasa (1 byte na prikaz = index v PRIKAZY),
+#   kontrolni soucet Fletcher-16 vseho predchoziho (2 byty, little endian)
+VERZE_MAPY = 1
+
+def kontrolni_soucet(data):
+    a = 0
+    b = 0
+    for bajt in data:
+        a = (a + bajt) % 255
+        b = (b + a) % 255
+    return (b << 8) | a
+
+class Mapa:
+
+    def __init__(self, sirka, vyska):
+        self.sirka = sirka
+        self.vyska = vyska
+        self.bunky = bytearray(sirka * vyska)
+        # cena prujezdu jedne usecky a pridavek za zatoceni / otoceni na krizovatce
+        self.cena_usecky = 2
+        self.cena_zatoceni = 1
+        self.cena_otoceni = 3
+        self.trasy = {}  # naplanovane trasy podle (x, y, kvadrant, cil_x, cil_y)
+
+    def otevrena(sirka, vyska):
+        # mapa, kde z kazde krizovatky vede cara do vsech sousednich (cela mrizka)
+        mapa = Mapa(sirka, vyska)
+        for y in range(vyska):
+            for x in range(sirka):
+                for kvadrant in range(4):
+                    sx, sy = Smer.posun(x, y, kvadrant)
+                    mapa.nastav_vystup(x, y, kvadrant, mapa.na_mape(sx, sy))
+        return mapa
+
+    def na_mape(self, x, y):
+        return 0 <= x < self.sirka and 0 <= y < self.vyska
+
+    def vystupy(self, x, y):
+        # byte krizovatky, mimo mapu 0 (zadne vystupy, nic neznameho)
+        if not self.na_mape(x, y):
+            return 0
+        return self.bunky[y * self.sirka + x]
+
+    def ma_vystup(self, x, y, kvadrant):
+        return self.vystupy(x, y) & (1 << kvadrant) != 0
+
+    def zna_vystup(self, x, y, kvadrant):
+        return self.vystupy(x, y) & (16 << kvadrant) != 0
+
+    def nastav_vystup(self, x, y, kvadrant, vede_dal):
+        # zapise vystup krizovatky a stejnou caru i u sousedni krizovatky z druhe strany
+        if not self.na_mape(x, y):
+            return -1
+        self.zapis(x, y, kvadrant, vede_dal)
+        sx, sy = Smer.posun(x, y, kvadrant)
+        if self.na_mape(sx, sy):
+            self.zapis(sx, sy, (kvadrant + 2) % 4, vede_dal)
+        elif vede_dal:
+            return -2  # cara vede mimo mapu
+        return 0
+
+    def zapis(self, x, y, kvadrant, vede_dal):
+        i = y * self.sirka + x
+        puvodni = self.bunky[i]
+        nova = puvodni | (16 << kvadrant)
+        if vede_dal:
+            nova |= 1 << kvadrant
+        else:
+            nova &= ~(1 << kvadrant)
+        if nova != puvodni:
+            self.bunky[i] = nova
+            self.trasy = {}  # mapa se zmenila, drive naplanovane trasy neplati
+
+    def navstivena(self, x, y):
+        # o vsech vystupech krizovatky uz robot vi
+        return self.vystupy(x, y) >> 4 == 15
+
+    def naplanuj(self, x, y, kvadrant, cil_x, cil_y):
+        """
+        Vrati seznam prikazu z krizovatky (x, y), na kterou robot prijel ve smeru kvadrant, do cile,
+        nebo None, pokud cesta po znamych carach neexistuje
+        """
+        klic = (x, y, kvadrant, cil_x, cil_y)
+        if klic not in self.trasy:
+            if self.na_mape(cil_x, cil_y):
+                self.trasy[klic] = self.hledej(x, y, kvadrant, lambda bx, by: bx == cil_x and by == cil_y,
+                                               lambda bx, by: (abs(cil_x - bx) + abs(cil_y - by)) * self.cena_usecky)
+            else:
+                self.trasy[klic] = None
+        trasa = self.trasy[klic]
+        if trasa is None:
+            return None
+        return list(trasa)
+
+    def k_nenavstivene(self, x, y, kvadrant):
+        # prikazy k nejblizsi krizovatce, o ktere robot jeste nevi vsechno, None = vsechno prozkoumano
+        trasa = self.hledej(x, y, kvadrant, lambda bx, by: not self.navstivena(bx, by), lambda bx, by: 0)
+        if trasa is None:
+            return None
+        return list(trasa)
+
+    def hledej(self, x, y, kvadrant, je_cil, odhad):
+        # A* pres stavy (krizovatka, kvadrant prijezdu), s odhadem 0 je to Dijkstra
+        if not self.na_mape(x, y):
+            return None
+        if je_cil(x, y):
+            return ()
+
+        start = (y * self.sirka + x) * 4 + kvadrant
+        ceny = {start: 0}
+        predchozi = {}
+        otevrene = {start: odhad(x, y)}
+        while otevrene:
+            # otevrenych stavu je na male mrizce malo, staci projit vsechny (bez heapq)
+            stav = min(otevrene, key=otevrene.get)
+            del otevrene[stav]
+            bunka, smer = stav // 4, stav % 4
+            bx, by = bunka % self.sirka, bunka // self.sirka
+            if stav != start and je_cil(bx, by):
+                return self.prikazy_do(stav, predchozi)
+
+            for prikaz in PRIKAZY:
+                novy_smer = Smer.po_prikazu(smer, prikaz)
+                if not self.ma_vystup(bx, by, novy_smer):
+                    continue
+                sx, sy = Smer.posun(bx, by, novy_smer)
+                if not self.na_mape(sx, sy):
+                    continue
+                cena = ceny[stav] + self.cena_usecky + self.cena_prikazu(prikaz)
+                novy = (sy * self.sirka + sx) * 4 + novy_smer
+                if novy not in ceny or cena < ceny[novy]:
+                    ceny[novy] = cena
+                    predchozi[novy] = (stav, prikaz)
+                    otevrene[novy] = cena + odhad(sx, sy)
+        return None
+
+    def cena_prikazu(self, prikaz):
+        if prikaz == K.ROVNE:
+            return 0
+        if prikaz == K.VZAD:
+            return self.cena_otoceni
+        return self.cena_zatoceni
+
+    def prikazy_do(self, stav, predchozi):
+        prikazy = []
+        while stav in predchozi:
+            stav, prikaz = predchozi[stav]
+            prikazy.append(prikaz)
+        prikazy.reverse()
+        return tuple(prikazy)
+
+    def uloz(self, jmeno_souboru, cil=(0, 0), trasa=()):
+        data = bytearray(b"MB")
+        data.extend(bytes([VERZE_MAPY, self.sirka, self.vyska, cil[0], cil[1]]))
+        data.extend(self.bunky)
+        data.extend(len(trasa).to_bytes(2, "little"))
+        data.extend(bytes([PRIKAZY.index(prikaz) for prikaz in trasa]))
+        data.extend(kontrolni_soucet(data).to_bytes(2, "little"))
+        with open(jmeno_souboru, "wb") as soubor:
+            soubor.write(data)
+        return 0
+
+    def nacti(jmeno_souboru):
+        """
+        Vrati (mapa, cil, trasa), nebo None, pokud soubor neexistuje, je jine verze nebo poskozeny
+        """
+        try:
+            with open(jmeno_souboru, "rb") as soubor:
+                data = soubor.read()
+        except OSError:
+            return None
+        return Mapa.z_bytu(data)
+
+    def z_bytu(data):
+        if len(data) < 11 or data[0:2] != b"MB" or data[2] != VERZE_MAPY:
+            return None
+        if int.from_bytes(data[-2:], "little") != kontrolni_soucet(data[:-2]):
+            return None
+
+        sirka, vyska = data[3], data[4]
+        cil = (data[5], data[6])
+        konec_mapy = 7 + sirka * vyska
+        if len(data) < konec_mapy + 4:
+            return None
+        delka_trasy = int.from_bytes(data[konec_mapy:konec_mapy + 2], "little")
+        if len(data) != konec_mapy + 4 + delka_trasy:
+            return None
+
+        kody = data[konec_mapy + 2:konec_mapy + 2 + delka_trasy]
+        if any(kod >= len(PRIKAZY) for kod in kody):
+            return None
+        mapa = Mapa(sirka, vyska)
+        mapa.bunky[:] = data[7:konec_mapy]
+        trasa = [PRIKAZY[kod] for kod in kody]
+        return mapa, cil, trasa
+
+
+class Pruzkumnik:
+    """
+    Prozkoumani bludiste: na kazde krizovatce zapise do mapy, kam vede cara, a vybere dalsi prikaz
+    """
+
+    def __init__(self, mapa, x=0, y=0, kvadrant=0):
+        # (x, y) je prvni krizovatka, na kterou robot ze startu prijede ve smeru kvadrant
+        self.mapa = mapa
+        self.x = x
+        self.y = y
+        self.kvadrant = kvadrant
+        self.prvni = True
+
+    def na_krizovatce(self, vlevo, rovne, vpravo):
+        """
+        Robot stoji na krizovatce (x, y), vlevo/rovne/vpravo rika, kam z ni vede cara.
+        Vrati prikaz pro tuto krizovatku, nebo None, pokud uz je vsechno prozkoumano.
+        """
+        k = self.kvadrant
+        self.mapa.nastav_vystup(self.x, self.y, (k + 1) % 4, vlevo)
+        self.mapa.nastav_vystup(self.x, self.y, k, rovne)
+        self.mapa.nastav_vystup(self.x, self.y, (k + 3) % 4, vpravo)
+        # odkud robot prijel, tam cara vede (start je slepa ulicka, tam se nevraci)
+        self.mapa.nastav_vystup(self.x, self.y, (k + 2) % 4, not self.prvni)
+        self.prvni = False
+
+        # nejdriv neprozkoumane sousedni krizovatky (levou rukou), jinak cesta k nejblizsi neprozkoumane
+        prikaz = None
+        for moznost in (K.VLEVO, K.ROVNE, K.VPRAVO):
+            smer = Smer.po_prikazu(k, moznost)
+            sx, sy = Smer.posun(self.x, self.y, smer)
+            if (self.mapa.ma_vystup(self.x, self.y, smer) and self.mapa.na_mape(sx, sy)
+                    and not self.mapa.navstivena(sx, sy)):
+                prikaz = moznost
+                break
+        if prikaz is None:
+            trasa = self.mapa.k_nenavstivene(self.x, self.y, k)
+            if not trasa:
+                return None
+            prikaz = trasa[0]
+
+        self.jed(prikaz)
+        return prikaz
+
+    def jed(self, prikaz):
+        # poloha dalsi krizovatky po provedeni prikazu
+        self.kvadrant = Smer.po_prikazu(self.kvadrant, prikaz)
+        self.x, self.y = Smer.posun(self.x, self.y, self.kvadrant)
+
+
+class PlanRychlosti:
+    """
+    Rychlost jizdy po care na usecce trasy: rozjezd, na rovince dopredna_max a vcas zpomalit
+    na dopredna_krizovatky pred krizovatkou, kde robot zatoci nebo zastavi
+    """
+
+    def __init__(self, krok_mrizky=0.3, dopredna_max=0.3, dopredna_krizovatky=0.1, zrychleni=0.5, rezerva=0.08):
+        self.krok_mrizky = krok_mrizky
+        self.dopredna_max = dopredna_max
+        self.dopredna_krizovatky = dopredna_krizovatky
+        self.zrychleni = zrychleni  # m/s^2, pri rozjezdu i zpomalovani
+        # o kolik driv (m) ma mit robot rychlost krizovatky, vcetne senzoru pred osou kol
+        self.rezerva = rezerva
+        self.zacatek = 0.0
+        self.delka = 0.0
+        self.rychlost_rozjezdu = dopredna_krizovatky
+
+    def naplanuj(self, ujeto, vzdalenost, rychlost_rozjezdu=0.0):
+        # ujeto = robot.ujeta_vzdalenost() ted, vzdalenost (m) od osy kol ke krizovatce, kde se zpomali
+        self.zacatek = ujeto
+        self.delka = vzdalenost - self.rezerva
+        self.rychlost_rozjezdu = max(self.dopredna_krizovatky, abs(rychlost_rozjezdu))
+
+    def delka_usecek(self, pocet, prvni=None):
+        # vzdalenost pres pocet usecek mrizky, prvni muze byt kratsi (start mezi krizovatkami)
+        if prvni is None:
+            prvni = self.krok_mrizky
+        return prvni + (pocet - 1) * self.krok_mrizky
+
+    def rychlost(self, ujeto):
+        ujeto -= self.zacatek
+        zbyva = self.delka - ujeto
+        if zbyva <= 0:
+            return self.dopredna_krizovatky
+        # stejny lichobeznikovy profil jako Robot.jed_vzdalenost, jen nezastavi, ale zpomali na dopredna_krizovatky
+        return min(self.dopredna_max,
+                   sqrt(self.rychlost_rozjezdu ** 2 + 2 * self.zrychleni * max(ujeto, 0)),
+                   sqrt(self.dopredna_krizovatky ** 2 + 2 * self.zrychleni * zbyva))
+
+
+class UceniRychlosti:
+    """
+    Uceni rychlosti na useckach trasy, kterou robot jezdi dokola: po kazdem kole se na usecce bez ztraty
+    cary zrychli a na krizovatce bez chyby otaceni se toci rychleji, jinak se zpomali (puleni intervalu
+    mezi posledni bezpecnou a nejnizsi neuspesnou hodnotou), az se najde nejrychlejsi spolehliva jizda;
+    zrychleni, po kterem se cas usecky nezkratil, se bere jako neuspesne
+    """
+
+    def __init__(self, pocet, dopredna=0.1, uhlova=4.0):
+        # usecka i je jizda po care ke krizovatce i a otoceni na ni (posledni usecka konci v cili)
+        self.pocet = pocet
+        self.dopredna = [dopredna] * pocet
+        self.uhlova = [uhlova] * pocet
+        # nejvyssi hodnota, se kterou to proslo, a nejnizsi, se kterou to neproslo (0 = zatim zadna)
+        self.bezpecna_dopredna = [0.0] * pocet
+        self.selhala_dopredna = [0.0] * pocet
+        self.bezpecna_uhlova = [0.0] * pocet
+        self.selhala_uhlova = [0.0] * pocet
+        self.min_dopredna = 0.1
+        self.max_dopredna = 0.5
+        self.min_uhlova = 1.0
+        self.max_uhlova = 8.0
+        self.krok = 0.1  # o kolik (podil) se zrychli, dokud nic neselhalo
+        self.presnost = 0.02  # podil, pri kterem se puleni zastavi
+        self.cas_bezpecne_dopredne = [0] * pocet  # us na usecce s bezpecna_dopredna (0 = zatim nezmereno)
+        self.zacni_kolo(0)
+
+    def zacni_kolo(self, cas_us):
+        self.usecka = -1
+        self.zacatek_usecky = cas_us
+        self.zacatek_kola = cas_us
+        self.ztraty = [0] * self.pocet  # kolikrat robot na usecce ztratil caru
+        self.chyby = [0] * self.pocet  # kolikrat otoceni na krizovatce skoncilo mimo caru
+        self.otaceni = [0] * self.pocet  # kolikrat se na krizovatce otacel
+        self.casy = [0] * self.pocet  # us na usecce
+
+    def dalsi_usecka(self, cas_us):
+        # vola se, kdyz robot vyrazi z krizovatky (nebo ze startu) po care k dalsi krizovatce
+        self.konec_usecky(cas_us)
+        self.usecka = min(self.usecka + 1, self.pocet - 1)
+        self.zacatek_usecky = cas_us
+        return self.usecka
+
+    def konec_usecky(self, cas_us):
+        if self.usecka >= 0:
+            self.casy[self.usecka] += ticks_diff(cas_us, self.zacatek_usecky)
+
+    def dopredna_usecky(self):
+        return self.dopredna[max(self.usecka, 0)]
+
+    def uhlova_usecky(self):
+        return self.uhlova[max(self.usecka, 0)]
+
+    def ztrata(self):
+        self.ztraty[max(self.usecka, 0)] += 1
+
+    def otoceni(self, chyba):
+        # po otoceni na krizovatce, chyba = prostredni senzor caru nevidi (robot se pretocil)
+        i = max(self.usecka, 0)
+        self.otaceni[i] += 1
+        if chyba:
+            self.chyby[i] += 1
+
+    def po_kole(self, cas_us):
+        """
+        Upravi rychlosti podle prave dokonceneho (nebo nedokonceneho) kola, vrati cas kola v s
+        """
+        self.konec_usecky(cas_us)
+        for i in range(self.pocet):
+            if i <= self.usecka:  # kam robot nedojel, o tom se nic nevi
+                # vyssi rychlost, se kterou usecka netrvala kratseji (treba ji robot nestihne rozjet), nema smysl
+                zbytecna = (self.dopredna[i] > self.bezpecna_dopredna[i] > 0
+                            and 0 < self.cas_bezpecne_dopredne[i] <= self.casy[i])
+                selhalo = self.ztraty[i] > 0 or zbytecna
+                if not selhalo and self.dopredna[i] >= self.bezpecna_dopredna[i]:
+                    self.cas_bezpecne_dopredne[i] = self.casy[i]
+                self.uprav(self.dopredna, self.bezpecna_dopredna, self.selhala_dopredna, i, selhalo,
+                           self.min_dopredna, self.max_dopredna)
+            if self.otaceni[i] > 0:
+                self.uprav(self.uhlova, self.bezpecna_uhlova, self.selhala_uhlova, i, self.chyby[i] > 0,
+                           self.min_uhlova, self.max_uhlova)
+        return ticks_diff(cas_us, self.zacatek_kola) / 1000000
+
+    def uprav(self, hodnoty, bezpecne, selhane, i, selhalo, nejmene, nejvic):
+        hodnota = hodnoty[i]
+        if selhalo:
+            selhane[i] = hodnota
+            if bezpecne[i] >= hodnota:
+                bezpecne[i] = 0.0  # ani to nebylo bezpecne
+            if bezpecne[i] == 0:
+                nova = hodnota * (1 - self.krok)
+            elif hodnota - bezpecne[i] <= self.presnost * hodnota:
+                nova = bezpecne[i]
+            else:
+                nova = (bezpecne[i] + hodnota) / 2
+        else:
+            bezpecne[i] = max(bezpecne[i], hodnota)
+            if selhane[i] <= hodnota:
+                selhane[i] = 0.0
+                nova = hodnota * (1 + self.krok)
+            elif selhane[i] - hodnota <= self.presnost * hodnota:
+                nova = hodnota  # nasel nejrychlejsi spolehlivou hodnotu
+            else:
+                nova = (hodnota + selhane[i]) / 2
+        hodnoty[i] = max(nejmene, min(nejvic, nova))
+
+    def uloz(self, jmeno_souboru):
+        with open(jmeno_souboru, "w") as soubor:
+            soubor.write("# dopredna uhlova bezpecna_dopredna selhala_dopredna bezpecna_uhlova selhala_uhlova"
+                         " cas_bezpecne_dopredne_us\n")
+            for i in range(self.pocet):
+                hodnoty = (self.dopredna[i], self.uhlova[i], self.bezpecna_dopredna[i], self.selhala_dopredna[i],
+                           self.bezpecna_uhlova[i], self.selhala_uhlova[i], self.cas_bezpecne_dopredne[i])
+                soubor.write(" ".join(str(h) for h in hodnoty) + "\n")
+        return 0
+
+    def nacti(jmeno_souboru):
+        """
+        Vrati UceniRychlosti ze souboru (radek na usecku), nebo None, pokud neexistuje nebo je poskozeny;
+        soubory starsi verze bez casu usecek (6 sloupcu) se nactou s casem 0 (zatim nezmereno)
+        """
+        try:
+            with open(jmeno_souboru) as soubor:
+                obsah = soubor.read()
+        except OSError:
+            return None
+        radky = [radek for radek in obsah.split("\n") if radek.strip() != "" and radek[0] != "#"]
+        if len(radky) == 0:
+            return None
+        uceni = UceniRychlosti(len(radky))
+        try:
+            for i, radek in enumerate(radky):
+                hodnoty = [float(h) for h in radek.split()]
+                if len(hodnoty) == 6:
+                    hodnoty.append(0)
+                if len(hodnoty) != 7:
+                    return None
+                (uceni.dopredna[i], uceni.uhlova[i], uceni.bezpecna_dopredna[i], uceni.selhala_dopredna[i],
+                 uceni.bezpecna_uhlova[i], uceni.selhala_uhlova[i]) = hodnoty[:6]
+                uceni.cas_bezpecne_dopredne[i] = int(hodnoty[6])
+        except ValueError:
+            return None
+        return uceni
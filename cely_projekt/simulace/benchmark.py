@@ -0,0 +1,264 @@
+# Mereni rychlosti nejcasteji volanych metod z cely_projekt.py na pocitaci
+#
+# Pro kazdou metodu zmeri cas na jedno volani, pocet alokaci na volani a pocet
+# i2c transakci na volani (v nahrade modulu microbit). Vysledky se daji ulozit
+# jako JSON a pozdeji porovnat, takze je videt, jestli zmena v cely_projekt.py
+# neco zrychlila nebo zpomalila. Casy jsou z pocitace (CPython), v robotovi budou
+# jine, ale pomery mezi verzemi kodu se daji porovnavat.
+# Kazde opakovani meri na novem robotovi a vsechny metody se v nem stridaji, takze
+# se zmena rychlosti pocitace behem mereni projevi u vsech metod a v rozptylu. Kazde
+# opakovani zmeri i referencni vypocet, ktery se v kodu nemeni, a cas metody se
+# porovnava i jako nasobek reference - tim se odecte, ze je pocitac pri jinem
+# spusteni pomalejsi nebo rychlejsi.
+#
+# Priklady:
+#   python benchmark.py --uloz zaklad.json
+#   python benchmark.py --porovnej zaklad.json --prah 10 --prah_us 0.5 || echo zhorseni
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+SLOZKA = os.path.dirname(os.path.abspath(__file__))
+SLOZKA_PROJEKTU = os.path.dirname(SLOZKA)
+for cesta in (SLOZKA_PROJEKTU, SLOZKA):
+    if cesta not in sys.path:
+        sys.path.insert(0, cesta)
+
+import microbit  # noqa: E402  nahrada ze slozky simulace
+from cely_projekt import Robot  # noqa: E402
+
+VERZE = 3
+
+
+def pripraveny_robot():
+    microbit.vynuluj()
+    robot = Robot(0.15, 0.067, False)
+    robot.inicializuj()
+    for motor in (robot.levy_motor, robot.pravy_motor):
+        motor.a = 25
+        motor.b = 30
+        motor.zkalibrovano = True
+    robot.jed(0.1, 0)
+    return robot
+
+
+def pripraveny_robot_s_regulaci():
+    robot = pripraveny_robot()
+    robot.levy_motor.perioda_regulace = 0  # at se reguluje pri kazdem volani
+    robot.levy_motor.enkoder.perioda_rychlosti = 0
+    robot.perioda_cary_us = 0
+    return robot
+
+
+def mereni():
+    """
+    Vrati slovnik jmeno -> funkce, ktera pripravenemu robotovi vrati funkci bez parametru volajici merenou metodu
+    """
+    return {
+        "Senzory.precti_senzory": lambda robot: robot.senzory.precti_senzory,
+        "Enkoder.aktualizuj_se": lambda robot: robot.levy_motor.enkoder.aktualizuj_se,
+        "Enkoder.vypocti_rychlost": lambda robot: robot.levy_motor.enkoder.vypocti_rychlost,
+        "Motor.jed_doprednou_rychlosti": lambda robot: lambda: robot.levy_motor.jed_doprednou_rychlosti(0.1),
+        "Motor.aktualizuj_se": lambda robot: lambda: robot.levy_motor.aktualizuj_se(True),
+        "Robot.jed": lambda robot: lambda: robot.jed(0.1, 0.5),
+        "Robot.vycti_senzory_cary": lambda robot: robot.vycti_senzory_cary,
+        "Robot.jed_po_care": lambda robot: lambda: robot.jed_po_care(0.1, 0.5),
+        "Robot.aktualizuj_se": lambda robot: lambda: robot.aktualizuj_se(False),
+        "Odometrie.aktualizuj": lambda robot: lambda: robot.odometrie.aktualizuj(1, 2),
+    }
+
+
+def kvantil(hodnoty, podil):
+    # linearni interpolace mezi serazenymi hodnotami, podil 0.5 = median
+    serazene = sorted(hodnoty)
+    pozice = (len(serazene) - 1) * podil
+    dolni = int(pozice)
+    horni = min(dolni + 1, len(serazene) - 1)
+    return serazene[dolni] + (serazene[horni] - serazene[dolni]) * (pozice - dolni)
+
+
+def referencni_vypocet():
+    # stejna prace pri kazdem spusteni, meri jen rychlost pocitace a interpretu
+    soucet = 0
+    for i in range(50):
+        soucet += i * i % 7
+    return soucet
+
+
+def zmer_cas(funkce, volani: int):
+    """
+    Vrati cas na jedno volani funkce v us
+    """
+    funkce()
+    gc.collect()
+    gc.disable()
+    try:
+        zacatek = time.perf_counter_ns()
+        for j in range(volani):
+            funkce()
+        return (time.perf_counter_ns() - zacatek) / volani / 1000
+    finally:
+        gc.enable()
+
+
+def pocet_alokaci(funkce, volani: int):
+    """
+    Vrati prumerny pocet alokaci na jedno volani funkce. Tracemalloc zna jen pamet, ktera je prave alokovana,
+    proto se funkce sleduje po instrukcich (sys.settrace) a pocita se, za kolik instrukci pamet pribyla - tak
+    se zapocitaji i docasne objekty uvolnene jeste v tomtez volani. Nezapocitaji se objekty z volnych seznamu
+    CPythonu (float, tuple...), ktere pamet nealokuji, a vic alokaci v jedne instrukci se pocita jako jedna.
+    """
+    stav = [0, 0]  # pamet po posledni instrukci, pocet alokaci
+
+    def sleduj(ramec, udalost, arg):
+        if udalost == "call":
+            ramec.f_trace_opcodes = True
+        aktualni = tracemalloc.get_traced_memory()[0]
+        # pri "call" pribyde objekt ramce, ktery vytvori jen samo sledovani
+        if aktualni > stav[0] and udalost != "call":
+            stav[1] += 1
+        stav[0] = aktualni
+        return sleduj
+
+    def opakuj(f):
+        for j in range(volani):
+            f()
+
+    def spocitej(f):
+        stav[1] = 0
+        tracemalloc.start()
+        try:
+            stav[0] = tracemalloc.get_traced_memory()[0]
+            sys.settrace(sleduj)
+            try:
+                opakuj(f)
+            finally:
+                sys.settrace(None)
+        finally:
+            tracemalloc.stop()
+        return stav[1]
+
+    funkce()
+    # sledovani samo alokuje pri spusteni, odecte se podle prazdne funkce
+    return (spocitej(funkce) - spocitej(lambda: None)) / volani
+
+
+def zmer_vse(volani: int, opakovani: int, filtr=None):
+    """
+    Vrati slovnik jmeno -> {cas_us: median casu na volani, rozptyl_us: mezikvartilove rozpeti opakovani,
+    relativni: median casu vydeleneho referenci z tehoz opakovani, rozptyl_relativni, alokace: na volani,
+    i2c: transakci na volani}
+    """
+    merene = {jmeno: priprav for jmeno, priprav in mereni().items() if not filtr or filtr in jmeno}
+    casy = {jmeno: [] for jmeno in merene}
+    relativni = {jmeno: [] for jmeno in merene}
+    for i in range(opakovani):
+        reference = zmer_cas(referencni_vypocet, volani)
+        for jmeno, priprav in merene.items():
+            cas = zmer_cas(priprav(pripraveny_robot_s_regulaci()), volani)
+            casy[jmeno].append(cas)
+            relativni[jmeno].append(cas / reference)
+
+    vysledky = {}
+    for jmeno, priprav in merene.items():
+        funkce = priprav(pripraveny_robot_s_regulaci())
+        funkce()
+        microbit.i2c.vynuluj_pocitadla()
+        funkce()
+        i2c = microbit.i2c.pocet_cteni + microbit.i2c.pocet_zapisu
+        alokace = pocet_alokaci(priprav(pripraveny_robot_s_regulaci()), 10)
+        vysledky[jmeno] = {"cas_us": round(kvantil(casy[jmeno], 0.5), 3),
+                           "rozptyl_us": round(kvantil(casy[jmeno], 0.75) - kvantil(casy[jmeno], 0.25), 3),
+                           "relativni": round(kvantil(relativni[jmeno], 0.5), 4),
+                           "rozptyl_relativni": round(kvantil(relativni[jmeno], 0.75) -
+                                                      kvantil(relativni[jmeno], 0.25), 4),
+                           "alokace": round(alokace, 1), "i2c": i2c}
+    return vysledky
+
+
+def porovnej(zaklad: dict, nove: dict, prah_procent: float, prah_us: float):
+    """
+    Vrati seznam radku porovnani a seznam zhorsenych metod. Cas se porovnava jako nasobek reference (pokud ho
+    obe mereni maji) a hlasi se, jen kdyz je zpomaleni vetsi nez prah_procent, nez prah_us (prepocteno na rychlost
+    pocitace pri mereni zakladu) i nez dvojnasobek rozptylu obou mereni dohromady (sum)
+    """
+    radky = []
+    zhorseni = []
+    for jmeno, hodnoty in nove.items():
+        puvodni = zaklad.get(jmeno)
+        if puvodni is None:
+            radky.append("%-32s %10.3f us  (nove)" % (jmeno, hodnoty["cas_us"]))
+            continue
+
+        if "relativni" in puvodni and puvodni["relativni"] > 0:
+            # us na jednotku reference v dobe mereni zakladu
+            meritko = puvodni["cas_us"] / puvodni["relativni"]
+            rozdil = (hodnoty["relativni"] - puvodni["relativni"]) * meritko
+            zmena = (hodnoty["relativni"] / puvodni["relativni"] - 1) * 100
+            sum_us = 2 * (puvodni["rozptyl_relativni"] + hodnoty["rozptyl_relativni"]) * meritko
+        else:
+            rozdil = hodnoty["cas_us"] - puvodni["cas_us"]
+            zmena = rozdil / puvodni["cas_us"] * 100
+            sum_us = 2 * (puvodni.get("rozptyl_us", 0) + hodnoty.get("rozptyl_us", 0))
+        duvody = []
+        if zmena > prah_procent and rozdil > prah_us and rozdil > sum_us:
+            duvody.append("cas")
+        if hodnoty["i2c"] > puvodni["i2c"]:
+            duvody.append("i2c")
+        # alokace jsou prumer z vice volani, polovina alokace na volani je jeste zaokrouhleni
+        alokace = puvodni.get("alokace", hodnoty["alokace"])
+        if hodnoty["alokace"] >= alokace + 0.5:
+            duvody.append("alokace")
+        if duvody:
+            zhorseni.append(jmeno)
+
+        radky.append("%-32s %10.3f -> %10.3f us %+7.1f %% (sum %.3f us)  i2c %d -> %d  alokaci %.1f -> %.1f  %s" % (
+            jmeno, puvodni["cas_us"], hodnoty["cas_us"], zmena, sum_us, puvodni["i2c"], hodnoty["i2c"],
+            alokace, hodnoty["alokace"], "ZHORSENI (" + ", ".join(duvody) + ")" if duvody else ""))
+    return radky, zhorseni
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mereni rychlosti metod z cely_projekt.py")
+    parser.add_argument("--volani", type=int, default=2000, help="pocet volani v jednom opakovani")
+    parser.add_argument("--opakovani", type=int, default=9, help="pocet opakovani, bere se median")
+    parser.add_argument("-k", dest="filtr", default=None, help="jen metody, jejichz jmeno obsahuje tento text")
+    parser.add_argument("--uloz", default=None, help="ulozi vysledky jako JSON")
+    parser.add_argument("--porovnej", default=None, help="porovna s drive ulozenymi vysledky")
+    parser.add_argument("--prah", type=float, default=10.0, help="od kolika procent se zpomaleni hlasi")
+    parser.add_argument("--prah_us", type=float, default=0.5, help="od kolika us na volani se zpomaleni hlasi")
+    args = parser.parse_args(argv)
+
+    vysledky = zmer_vse(args.volani, args.opakovani, args.filtr)
+
+    if args.uloz:
+        with open(args.uloz, "w") as f:
+            json.dump({"verze": VERZE, "python": platform.python_version(), "stroj": platform.machine(),
+                       "vysledky": vysledky}, f, indent=2, sort_keys=True)
+
+    if args.porovnej:
+        with open(args.porovnej) as f:
+            zaklad = json.load(f)
+        radky, zhorseni = porovnej(zaklad["vysledky"], vysledky, args.prah, args.prah_us)
+        for radek in radky:
+            print(radek)
+        if zhorseni:
+            print()
+            print("zhorseni nad " + str(args.prah) + " % a " + str(args.prah_us) + " us:", ", ".join(zhorseni))
+            return 1
+        return 0
+
+    for jmeno, hodnoty in vysledky.items():
+        print("%-32s %10.3f us +-%7.3f %6.1f alokaci %3d i2c" % (jmeno, hodnoty["cas_us"], hodnoty["rozptyl_us"] / 2,
+                                                                 hodnoty["alokace"], hodnoty["i2c"]))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
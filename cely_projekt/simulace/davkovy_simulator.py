@@ -0,0 +1,615 @@
+# Davkovy simulator robota pro ladeni parametru jizdy po care
+#
+# Bezi na pocitaci (ne na microbitu) a potrebuje numpy.
+# Drzi stav N robotu v numpy polich a krokuje je vsechny najednou,
+# kazdy robot muze mit jine parametry (dopredna, uhlova, perioda_cary_us, ...).
+# Logika rozhodovani odpovida Robot.jed_po_care (OdhadCary, RegulatorCary), Robot.vycti_senzory_cary
+# (DetektorKrizovatek, typ krizovatky se nesimuluje, v mrizce jsou vsechny krizovatky X),
+# Robot.jed_vzdalenost, Robot.zatoc, Robot.otoc_se, Robot.jed_obloukem, PlanRychlosti, SynchronizaceKol
+# a stavovemu automatu
+# state_machine_krizovatky_all.py (se zastav_za_krizovatkou = False, oblouky, otaceni_uhlem
+# a planovat_rychlost podle parametru).
+#
+# Draha je mrizka car (kazda krizovatka je krizovatka do vsech 4 smeru)
+# s rozteci krok_mrizky, robot startuje na care pred krizovatkou a projede
+# vsechny prikazy z trasy.
+#
+# Priklad:
+#   python davkovy_simulator.py --trasa vpravo,vpravo,rovne,vlevo --dopredna 0.05:0.3:6 --uhlova 0.2:2:10
+
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+ROVNE = "rovne"
+VLEVO = "vlevo"
+VPRAVO = "vpravo"
+VZAD = "vzad"
+
+KODY_PRIKAZU = {ROVNE: 0, VLEVO: 1, VPRAVO: 2, VZAD: 3}
+# o kolik ctvrtotacek (proti smeru hodinovych rucicek) se zmeni smer po prikazu
+ZMENA_SMERU = np.array([0, 1, -1, 2], dtype=np.int64)
+
+# stavy automatu, stejne jako v state_machine_krizovatky_all.py
+ST_JED_PO_CARE = 0
+ST_POPOJED = 1
+ST_NAROVNEJ = 2
+ST_ZATOC = 3
+ST_OBLOUK = 4
+ST_OTOC = 5
+ST_KONEC = 6
+ST_SELHAL = 7  # robot se zasekl nebo ztratil caru natrvalo, dal se nesimuluje
+
+# smer narovnani, "" / K.LEVY / K.PRAVY ve stavovem automatu
+NAROVNANI_NIC = 0
+NAROVNANI_LEVY = 1
+NAROVNANI_PRAVY = 2
+
+MAX_SKLON_CARY = 50  # OdhadCary.MAX_SKLON
+MIN_DOPREDNA = 0.08  # m/s, Robot.min_dopredna
+TOLERANCE_OTOCENI = 0.35  # rad, Robot.tolerance_otoceni
+
+# zvysit pri kazde zmene, po ktere simulace pro stejne parametry vrati jine vysledky
+# (optimalizace.py podle ni nepouzije stare vysledky z cache)
+VERZE = 2
+
+# parametry, ktere muze mit kazdy robot jine, a jejich vychozi hodnoty
+VYCHOZI_PARAMETRY = {
+    "dopredna": 0.1,  # m/s, Robot.jed_po_care
+    "uhlova": 0.5,  # rad/s, Robot.jed_po_care
+    "kd_cary": 0.1,  # s, RegulatorCary.kd
+    "zpomaleni_cary": 0.5,  # RegulatorCary.zpomaleni
+    "min_podil_rychlosti": 0.4,  # RegulatorCary.min_podil_rychlosti
+    "interpolace_cary": 0.0,  # OdhadCary.interpolovat (1 = ano, 0 = ne)
+    "min_vzorku_krizovatky": 2,  # DetektorKrizovatek.min_vzorku
+    "min_delka_krizovatky": 0.005,  # m, DetektorKrizovatek.min_delka
+    "ignoruj_krizovatky": 0.1,  # m, DetektorKrizovatek.ignoruj_vzdalenost
+    "perioda_cary_us": 75000,  # Robot.perioda_cary_us
+    "uhlova_zatoceni": 2.0,  # rad/s, robot.zatoc(0, +-2, ...)
+    "dopredna_popojeti": 0.2,  # m/s, robot.jed_vzdalenost za krizovatku
+    "vzdalenost_popojeti": 0.045,  # m od zacatku krizovatky, robot.jed_vzdalenost
+    "zrychleni": 0.5,  # m/s^2, Robot.zrychleni
+    "otaceni_uhlem": 0.0,  # 1 = na krizovatce Robot.otoc_se, 0 = zatoc a narovnej podle senzoru
+    "uhlova_otoceni": 4.0,  # rad/s, Robot.otoc_se
+    "oblouky": 0.0,  # 1 = krizovatkou obloukem (Robot.jed_obloukem), 0 = zastavit a tocit na miste
+    "dopredna_oblouku": 0.15,  # m/s, Robot.jed_obloukem
+    "polomer_oblouku": 0.03,  # m, Robot.polomer_oblouku
+    "planovat_rychlost": 0.0,  # 1 = rychlost jizdy po care z PlanRychlosti, 0 = stale dopredna
+    "dopredna_max": 0.3,  # m/s, PlanRychlosti.dopredna_max
+    "dopredna_krizovatky": 0.1,  # m/s, PlanRychlosti.dopredna_krizovatky
+    "rezerva_krizovatky": 0.08,  # m, PlanRychlosti.rezerva
+    "synchronizace_kol": 1.0,  # 1 = Robot.synchronizovat_kola (SynchronizaceKol), 0 = kola jedou kazde samo
+    "kp_synchronizace": 4.0,  # 1/s, SynchronizaceKol.kp
+    "zesileni_leve": 1.0,  # skutecna/pozadovana rychlost leveho kola (chyba kalibrace)
+    "zesileni_prave": 1.0,  # skutecna/pozadovana rychlost praveho kola
+}
+
+
+class Geometrie:
+    """
+    Rozmery robota a drahy, ktere jsou pro vsechny simulovane roboty stejne
+    """
+
+    def __init__(self):
+        self.rozchod_kol = 0.15
+        self.prumer_kola = 0.067
+        self.tiky_na_otocku = 40  # enkoder
+        self.krok_mrizky = 0.30  # vzdalenost krizovatek v m
+        self.sirka_cary = 0.015
+        self.senzory_vpredu = 0.05  # vzdalenost senzoru cary pred osou kol
+        self.rozestup_senzoru = 0.016  # vzdalenost krajnich senzoru od prostredniho
+        self.casova_konstanta_motoru = 0.05  # s, setrvacnost kol
+        self.min_rychlost_kola = 0.07  # m/s, pod touto rychlosti se kolo zastavi (min_rychlost * prumer/2)
+        self.max_rychlost_kola = 0.5  # m/s, odpovida PWM 255
+        self.krok_simulace = 0.01  # s, jedna obratka hlavni smycky (sleep(5) + komunikace)
+        self.ztrata_cary_s = 0.1  # jak dlouho musi byt vsechny senzory mimo caru, aby se to pocitalo jako ztrata
+        self.limit_ztraceni_s = 2.0  # po teto dobe mimo caru robot uz caru nenajde
+        self.limit_stani_s = 1.0  # po teto dobe bez pohybu (a mimo cil) se robot zasekl
+
+
+def priprav_parametry(parametry: dict, pocet: int = 0):
+    """
+    Doplni chybejici parametry vychozimi hodnotami a vrati (slovnik poli, pocet robotu)
+    """
+    pole = {}
+    for jmeno, hodnota in parametry.items():
+        if jmeno not in VYCHOZI_PARAMETRY:
+            raise AttributeError("neznamy parametr simulace: " + str(jmeno))
+        pole[jmeno] = np.atleast_1d(np.asarray(hodnota, dtype=np.float64))
+        pocet = max(pocet, pole[jmeno].shape[0])
+
+    if pocet == 0:
+        pocet = 1
+
+    for jmeno, hodnota in VYCHOZI_PARAMETRY.items():
+        if jmeno not in pole:
+            pole[jmeno] = np.full(pocet, hodnota, dtype=np.float64)
+        elif pole[jmeno].shape[0] == 1:
+            pole[jmeno] = np.full(pocet, pole[jmeno][0])
+        elif pole[jmeno].shape[0] != pocet:
+            raise AttributeError("parametr " + jmeno + " ma jinou delku nez ostatni")
+
+    return pole, pocet
+
+
+def zakoduj_trasu(prikazy):
+    """
+    Prevede seznam prikazu (K.ROVNE, K.VLEVO, ...) na pole cisel
+    """
+    try:
+        return np.array([KODY_PRIKAZU[p] for p in prikazy], dtype=np.int64)
+    except KeyError as e:
+        raise AttributeError("neznamy prikaz v trase: " + str(e))
+
+
+def na_care(x, y, g: Geometrie):
+    """
+    Vrati True pro body, ktere lezi na nektere care mrizky
+    """
+    s = g.krok_mrizky
+    dx = np.abs(x - s * np.rint(x * (1 / s)))
+    dy = np.abs(y - s * np.rint(y * (1 / s)))
+    return np.minimum(dx, dy) < g.sirka_cary / 2
+
+
+def simuluj(parametry: dict, prikazy, pocet: int = 0, geometrie: Geometrie = None,
+            max_cas: float = 120.0, sum_senzoru: float = 0.0, seed: int = 0):
+    """
+    Nasimuluje jizdu vsech robotu po trase a vrati slovnik poli:
+    cas_kola (nan, pokud robot nedojel), ztraty_cary, chyby_krizovatek, dokonceno
+    """
+    g = geometrie if geometrie is not None else Geometrie()
+    p, n = priprav_parametry(parametry, pocet)
+    trasa = zakoduj_trasu(prikazy)
+    rng = np.random.default_rng(seed)
+
+    d = g.rozchod_kol / 2
+    s = g.krok_mrizky
+    dt = g.krok_simulace
+    alfa = min(1.0, dt / g.casova_konstanta_motoru)
+    bocni = np.array([g.rozestup_senzoru, 0.0, -g.rozestup_senzoru])  # levy, prostredni, pravy
+
+    # robot stoji uprostred usecky pred prvni krizovatkou a miri v kladnem smeru x
+    x = np.full(n, -s / 2)
+    y = np.zeros(n)
+    theta = np.zeros(n)
+    v_leve = np.zeros(n)
+    v_prave = np.zeros(n)
+
+    stav = np.full(n, ST_JED_PO_CARE, dtype=np.int64)
+    index_prikazu = np.zeros(n, dtype=np.int64)
+    dopredna_povel = np.zeros(n)
+    uhlova_povel = np.zeros(n)
+    posledni_reg_cary = np.zeros(n)
+    chyba_cary = np.zeros(n)  # stav RegulatorCary
+    derivace = np.zeros(n)
+    zakriveni = np.zeros(n)
+    pocet_vzorku = np.zeros(n, dtype=np.int64)  # stav DetektorKrizovatek
+    zacatek_krizovatky = np.zeros(n)
+    posledni_krizovatka = np.full(n, -np.inf)
+    nahlaseno = np.zeros(n, dtype=bool)
+    stav_cary = np.zeros(n)  # stav OdhadCary
+    hrana = np.zeros(n)
+    sklon = np.zeros(n)
+    ujeto_hrany = np.zeros(n)
+    cas_hrany = np.zeros(n)
+    draha_leve = np.zeros(n)  # ujeta draha kol, enkodery z ni pocitaji cele tiky
+    draha_prave = np.zeros(n)
+    delka_tiku = np.pi * g.prumer_kola / g.tiky_na_otocku
+    tiky_leve_minule = np.zeros(n)  # stav SynchronizaceKol: ujeto kol v minulem kroku, odchylka a zadany smer
+    tiky_prave_minule = np.zeros(n)
+    odchylka_kol = np.zeros(n)
+    smer_leve = np.zeros(n)
+    smer_prave = np.zeros(n)
+    zacatek_popojeti = np.zeros(n)  # ujeto na zacatku krizovatky (Robot.posledni_krizovatka)
+    rychlost_rozjezdu = np.zeros(n)
+    zacatek_oblouku = np.zeros(n)  # ujeta draha vnejsiho kola na zacatku (pred rovnym kouskem)
+    oblouk_vnejsi = np.full(n, np.nan)  # drahy kol na zacatku otaceni, nan = jeste jede rovne
+    oblouk_vnitrni = np.zeros(n)
+    otoceni_leve = np.full(n, np.nan)  # drahy kol na zacatku otoc_se, nan = neotaci se
+    otoceni_prave = np.zeros(n)
+    smer_narovnani = np.zeros(n, dtype=np.int64)
+    zatoceno = np.zeros(n, dtype=bool)
+    jel_po_care = np.zeros(n, dtype=bool)  # stav PlanRychlosti, naplanuje se pri kazdem prechodu do JED_PO_CARE
+    prvni_usecka = np.ones(n, dtype=bool)
+    zacatek_planu = np.zeros(n)
+    delka_planu = np.zeros(n)
+    rozjezd_planu = np.zeros(n)
+    # kolik prikazu ROVNE je za sebou od indexu (Trasa.rovnych_dal), na konci trasy 0
+    rovnych_od = np.zeros(trasa.shape[0] + 1, dtype=np.int64)
+    for i in range(trasa.shape[0] - 1, -1, -1):
+        rovnych_od[i] = rovnych_od[i + 1] + 1 if trasa[i] == KODY_PRIKAZU[ROVNE] else 0
+
+    # ocekavana krizovatka v mrizce a ocekavany smer (ctvrtotacky)
+    uzel_x = np.full(n, -1, dtype=np.int64)
+    uzel_y = np.zeros(n, dtype=np.int64)
+    smer = np.zeros(n, dtype=np.int64)
+    posun_x = np.array([1, 0, -1, 0], dtype=np.int64)
+    posun_y = np.array([0, 1, 0, -1], dtype=np.int64)
+
+    cas_mimo_caru = np.zeros(n)
+    cas_stani = np.zeros(n)
+    ztraty_cary = np.zeros(n, dtype=np.int64)
+    chyby_krizovatek = np.zeros(n, dtype=np.int64)
+    cas_kola = np.full(n, np.nan)
+
+    perioda_cary = p["perioda_cary_us"] / 1000000
+    # vysledky vsech robotu, dojete a selhane roboty simulace prubezne vyrazuje (indexy = jejich puvodni poradi)
+    indexy = np.arange(n)
+    vysledne_ztraty = np.zeros(n, dtype=np.int64)
+    vysledne_chyby = np.zeros(n, dtype=np.int64)
+    vysledny_cas = np.full(n, np.nan)
+
+    krok = 0
+    while krok * dt < max_cas:
+        t = krok * dt
+        aktivni = stav < ST_KONEC
+        pocet_aktivnich = np.count_nonzero(aktivni)
+        if pocet_aktivnich == 0:
+            break
+        if krok % 20 == 0 and pocet_aktivnich <= 3 * n // 4:
+            # kazdy krok stoji cas umerny poctu robotu, cekat na nejpomalejsi se nemusi i ty, co uz skoncily
+            vysledne_ztraty[indexy] = ztraty_cary
+            vysledne_chyby[indexy] = chyby_krizovatek
+            vysledny_cas[indexy] = cas_kola
+            p = {jmeno: hodnoty[aktivni] for jmeno, hodnoty in p.items()}
+            (indexy, x, y, theta, v_leve, v_prave, stav, index_prikazu, dopredna_povel, uhlova_povel,
+             posledni_reg_cary, chyba_cary, derivace, zakriveni, pocet_vzorku, zacatek_krizovatky,
+             posledni_krizovatka, nahlaseno, stav_cary, hrana, sklon, ujeto_hrany, cas_hrany, draha_leve,
+             draha_prave, tiky_leve_minule, tiky_prave_minule, odchylka_kol, smer_leve, smer_prave,
+             zacatek_popojeti, rychlost_rozjezdu, zacatek_oblouku, oblouk_vnejsi, oblouk_vnitrni, otoceni_leve,
+             otoceni_prave, smer_narovnani, zatoceno, jel_po_care, prvni_usecka, zacatek_planu, delka_planu,
+             rozjezd_planu, uzel_x, uzel_y, smer, cas_mimo_caru, cas_stani, ztraty_cary, chyby_krizovatek,
+             cas_kola, perioda_cary) = (pole[aktivni] for pole in (
+                indexy, x, y, theta, v_leve, v_prave, stav, index_prikazu, dopredna_povel, uhlova_povel,
+                posledni_reg_cary, chyba_cary, derivace, zakriveni, pocet_vzorku, zacatek_krizovatky,
+                posledni_krizovatka, nahlaseno, stav_cary, hrana, sklon, ujeto_hrany, cas_hrany, draha_leve,
+                draha_prave, tiky_leve_minule, tiky_prave_minule, odchylka_kol, smer_leve, smer_prave,
+                zacatek_popojeti, rychlost_rozjezdu, zacatek_oblouku, oblouk_vnejsi, oblouk_vnitrni, otoceni_leve,
+                otoceni_prave, smer_narovnani, zatoceno, jel_po_care, prvni_usecka, zacatek_planu, delka_planu,
+                rozjezd_planu, uzel_x, uzel_y, smer, cas_mimo_caru, cas_stani, ztraty_cary, chyby_krizovatek,
+                cas_kola, perioda_cary))
+            n = pocet_aktivnich
+            aktivni = stav < ST_KONEC
+
+        # senzory cary: sloupce levy, prostredni, pravy
+        c = np.cos(theta)
+        si = np.sin(theta)
+        sx = x[:, None] + g.senzory_vpredu * c[:, None] - bocni[None, :] * si[:, None]
+        sy = y[:, None] + g.senzory_vpredu * si[:, None] + bocni[None, :] * c[:, None]
+        senzory = na_care(sx, sy, g)
+        if sum_senzoru > 0:
+            senzory ^= rng.random(senzory.shape) < sum_senzoru
+        levy = senzory[:, 0]
+        prostredni = senzory[:, 1]
+        pravy = senzory[:, 2]
+        pocet_na_care = levy.view(np.uint8) + prostredni.view(np.uint8) + pravy.view(np.uint8)
+
+        ujeto_leve = np.floor(draha_leve / delka_tiku) * delka_tiku
+        ujeto_prave = np.floor(draha_prave / delka_tiku) * delka_tiku
+        ujeto = (ujeto_leve + ujeto_prave) / 2
+
+        # --- stav JED_PO_CARE ---
+        jede = stav == ST_JED_PO_CARE
+
+        # Robot.vycti_senzory_cary (DetektorKrizovatek)
+        ztracen = pocet_na_care == 0
+        vzor = jede & (pocet_na_care >= 2)
+        zacatek_krizovatky = np.where(vzor & (pocet_vzorku == 0), ujeto, zacatek_krizovatky)
+        pocet_vzorku += vzor
+        potvrzena = (vzor & ~nahlaseno & (pocet_vzorku >= p["min_vzorku_krizovatky"])
+                     & (ujeto - zacatek_krizovatky >= p["min_delka_krizovatky"]))
+        blizko = zacatek_krizovatky - posledni_krizovatka < p["ignoruj_krizovatky"]
+        krizovatka = potvrzena & ~blizko
+        nahlaseno |= potvrzena
+        posledni_krizovatka = np.where(krizovatka, zacatek_krizovatky, posledni_krizovatka)
+        konec_vzoru = jede & ~vzor
+        pocet_vzorku = np.where(konec_vzoru, 0, pocet_vzorku)
+        nahlaseno = np.where(konec_vzoru, False, nahlaseno)
+
+        mimo = jede & ztracen
+        cas_mimo_caru = np.where(mimo, cas_mimo_caru + dt, 0.0)
+        ztraty_cary += (cas_mimo_caru >= g.ztrata_cary_s) & (cas_mimo_caru - dt < g.ztrata_cary_s)
+
+        nova_krizovatka = jede & krizovatka
+        rovne_dal = np.zeros(n, dtype=bool)
+        if nova_krizovatka.any():
+            # kontrola, ze robot vidi krizovatku tam, kde ji podle trasy ocekavame
+            ocek_x = (uzel_x + posun_x[smer]) * s
+            ocek_y = (uzel_y + posun_y[smer]) * s
+            predek_x = x + g.senzory_vpredu * c
+            predek_y = y + g.senzory_vpredu * si
+            daleko = np.hypot(predek_x - ocek_x, predek_y - ocek_y) > s / 4
+            odchylka = np.abs((theta - smer * np.pi / 2 + np.pi) % (2 * np.pi) - np.pi)
+            chyba = nova_krizovatka & (daleko | (odchylka > np.pi / 4))
+            chyby_krizovatek += chyba
+
+            uzel_x = np.where(nova_krizovatka, uzel_x + posun_x[smer], uzel_x)
+            uzel_y = np.where(nova_krizovatka, uzel_y + posun_y[smer], uzel_y)
+
+            # s oblouky se rovne jede dal po care a vlevo/vpravo obloukem, VZAD se toci na miste
+            prikaz_krizovatky = trasa[np.minimum(index_prikazu, trasa.shape[0] - 1)]
+            obloukem = nova_krizovatka & (p["oblouky"] > 0.5) & (prikaz_krizovatky != KODY_PRIKAZU[VZAD])
+            rovne_dal = obloukem & (prikaz_krizovatky == KODY_PRIKAZU[ROVNE])
+            index_prikazu += rovne_dal
+            zacatek_oblouku = np.where(obloukem, np.where(prikaz_krizovatky == KODY_PRIKAZU[VPRAVO],
+                                                          ujeto_leve, ujeto_prave), zacatek_oblouku)
+            zacatek_popojeti = np.where(nova_krizovatka, zacatek_krizovatky, zacatek_popojeti)
+            rychlost_rozjezdu = np.where(nova_krizovatka, np.maximum(MIN_DOPREDNA, np.abs(dopredna_povel)),
+                                         rychlost_rozjezdu)
+            stav = np.where(rovne_dal, ST_JED_PO_CARE,
+                            np.where(obloukem, ST_OBLOUK, np.where(nova_krizovatka, ST_POPOJED, stav)))
+
+        # PlanRychlosti.naplanuj ve stavu PROVED: zpomali se az na krizovatce, kde robot zatoci nebo zastavi
+        novy_plan = (jede & ~jel_po_care) | rovne_dal
+        usecek = 1 + np.where(p["oblouky"] > 0.5, rovnych_od[np.minimum(index_prikazu, trasa.shape[0])], 0)
+        vzdalenost_planu = np.where(prvni_usecka, s / 2, s) + (usecek - 1) * s
+        zacatek_planu = np.where(novy_plan, ujeto, zacatek_planu)
+        delka_planu = np.where(novy_plan, vzdalenost_planu - p["rezerva_krizovatky"], delka_planu)
+        rozjezd_planu = np.where(novy_plan, np.maximum(p["dopredna_krizovatky"], np.abs(dopredna_povel)),
+                                 rozjezd_planu)
+        prvni_usecka &= ~novy_plan
+        # PlanRychlosti.rychlost
+        ujeto_planu = np.maximum(ujeto - zacatek_planu, 0)
+        zbyva_planu = delka_planu - (ujeto - zacatek_planu)
+        rychlost_planu = np.where(zbyva_planu <= 0, p["dopredna_krizovatky"], np.minimum(
+            p["dopredna_max"],
+            np.minimum(np.sqrt(rozjezd_planu ** 2 + 2 * p["zrychleni"] * ujeto_planu),
+                       np.sqrt(p["dopredna_krizovatky"] ** 2 + 2 * p["zrychleni"] * np.maximum(zbyva_planu, 0)))))
+        dopredna_cary = np.where(p["planovat_rychlost"] > 0.5, rychlost_planu, p["dopredna"])
+
+        # Robot.jed_po_care, volane jen pro K.CARA: OdhadCary.aktualizuj pri kazdem volani
+        vola = jede & ~krizovatka & ~ztracen
+        novy_stav = np.where(pocet_na_care == 0, 2 * np.sign(stav_cary),
+                             np.where(pocet_na_care >= 2, stav_cary, (levy.astype(np.float64) - pravy)))
+        prechod = vola & (novy_stav != stav_cary)
+        nova_hrana = (stav_cary + novy_stav) / 2
+        vzdalenost = ujeto - ujeto_hrany
+        vzdalenost = np.where(vzdalenost <= 0, dopredna_povel * (t - cas_hrany), vzdalenost)
+        novy_sklon = np.where(nova_hrana == hrana, -sklon,
+                              np.where(vzdalenost > 0,
+                                       np.clip((nova_hrana - hrana) / np.maximum(vzdalenost, 1e-9),
+                                               -MAX_SKLON_CARY, MAX_SKLON_CARY), 0.0))
+        sklon = np.where(prechod, novy_sklon, sklon)
+        hrana = np.where(prechod, nova_hrana, hrana)
+        ujeto_hrany = np.where(prechod, ujeto, ujeto_hrany)
+        cas_hrany = np.where(prechod, t, cas_hrany)
+        stav_cary = np.where(prechod, novy_stav, stav_cary)
+        interpolovat = p["interpolace_cary"] > 0.5
+        odhad = np.clip(hrana + sklon * (ujeto - ujeto_hrany), stav_cary - 0.5, stav_cary + 0.5)
+        odhad = np.where(interpolovat, odhad, stav_cary)
+
+        # RegulatorCary.reguluj jen po perioda_cary_us
+        reguluj = vola & ((t - posledni_reg_cary) > perioda_cary)
+        posledni_reg_cary = np.where(reguluj, t, posledni_reg_cary)
+        derivace = np.where(reguluj, sklon * dopredna_povel, derivace)
+        chyba_cary = np.where(reguluj, odhad, chyba_cary)
+        zakriveni = np.where(reguluj, zakriveni + (np.abs(chyba_cary) - zakriveni) / 4, zakriveni)
+        akcni_zasah = np.clip(chyba_cary + p["kd_cary"] * derivace, -2, 2)
+        podil_rychlosti = np.maximum(p["min_podil_rychlosti"],
+                                     1 - p["zpomaleni_cary"] * np.minimum(1, zakriveni))
+        dopredna_povel = np.where(reguluj, dopredna_cary * podil_rychlosti, dopredna_povel)
+        uhlova_povel = np.where(reguluj, p["uhlova"] * akcni_zasah, uhlova_povel)
+
+        # --- stav POPOJED (Robot.jed_vzdalenost) ---
+        popojizdi = stav == ST_POPOJED
+        ujeto_popojeti = ujeto - zacatek_popojeti
+        zbyva = p["vzdalenost_popojeti"] - ujeto_popojeti
+        popojel = popojizdi & (zbyva <= 0)
+        rychlost_popojeti = np.minimum(
+            p["dopredna_popojeti"],
+            np.minimum(np.sqrt(rychlost_rozjezdu ** 2 + 2 * p["zrychleni"] * np.maximum(ujeto_popojeti, 0)),
+                       np.sqrt(MIN_DOPREDNA ** 2 + 2 * p["zrychleni"] * np.maximum(zbyva, 0))))
+        dopredna_povel = np.where(popojizdi, np.where(popojel, 0.0, rychlost_popojeti), dopredna_povel)
+        uhlova_povel = np.where(popojizdi, 0.0, uhlova_povel)
+
+        prikaz = trasa[np.minimum(index_prikazu, trasa.shape[0] - 1)]
+        rovne = popojel & (prikaz == KODY_PRIKAZU[ROVNE])
+        index_prikazu += rovne
+        # VZAD se otaci o uhel vzdy (zatoc by skoncil na prvni care vlevo, po 90 stupnich)
+        uhlem = (p["otaceni_uhlem"] > 0.5) | (prikaz == KODY_PRIKAZU[VZAD])
+        stav = np.where(rovne, ST_JED_PO_CARE, np.where(popojel, np.where(uhlem, ST_OTOC, ST_NAROVNEJ), stav))
+        smer_narovnani = np.where(popojel, NAROVNANI_NIC, smer_narovnani)
+        zatoceno = np.where(popojel, False, zatoceno)
+
+        # --- stav NAROVNEJ ---
+        rovna = (stav == ST_NAROVNEJ) & ~popojel
+        bez_smeru = rovna & (smer_narovnani == NAROVNANI_NIC)
+        smer_narovnani = np.where(bez_smeru & levy, NAROVNANI_LEVY,
+                                  np.where(bez_smeru & ~levy & pravy, NAROVNANI_PRAVY, smer_narovnani))
+        toci = rovna & (smer_narovnani != NAROVNANI_NIC)
+        # Robot.zatoc(0, +-uhlova_zatoceni, K.PROS_S_CARY)
+        narovnano = (bez_smeru & ~levy & ~pravy & prostredni) | (toci & prostredni)
+        uhlova_narovnani = np.where(smer_narovnani == NAROVNANI_LEVY, p["uhlova_zatoceni"], -p["uhlova_zatoceni"])
+        dopredna_povel = np.where(rovna, 0.0, dopredna_povel)
+        uhlova_povel = np.where(rovna, np.where(toci & ~prostredni, uhlova_narovnani, 0.0), uhlova_povel)
+
+        po_zatoceni = narovnano & zatoceno
+        stav = np.where(po_zatoceni, ST_JED_PO_CARE, np.where(narovnano, ST_ZATOC, stav))
+        zatoceno = np.where(narovnano, False, zatoceno)
+        smer_narovnani = np.where(narovnano, NAROVNANI_NIC, smer_narovnani)
+
+        # --- stav ZATOC ---
+        toci_se = (stav == ST_ZATOC) & ~narovnano
+        vpravo = prikaz == KODY_PRIKAZU[VPRAVO]
+        zatocil = toci_se & np.where(vpravo, pravy, levy)
+        dopredna_povel = np.where(toci_se, 0.0, dopredna_povel)
+        uhlova_povel = np.where(toci_se & ~zatocil,
+                                np.where(vpravo, -p["uhlova_zatoceni"], p["uhlova_zatoceni"]),
+                                np.where(toci_se, 0.0, uhlova_povel))
+        smer = np.where(zatocil, (smer + ZMENA_SMERU[prikaz]) % 4, smer)
+        index_prikazu += zatocil
+        hotovo = zatocil & (index_prikazu >= trasa.shape[0])
+        stav = np.where(hotovo, ST_KONEC, np.where(zatocil, ST_NAROVNEJ, stav))
+        zatoceno = np.where(zatocil & ~hotovo, True, zatoceno)
+
+        # --- stav OTOC (Robot.otoc_se na miste s potvrzenim prostrednim senzorem) ---
+        otaci = stav == ST_OTOC
+        if otaci.any():  # stavy, ve kterych zadny robot neni, se preskoci
+            zacina = otaci & np.isnan(otoceni_leve)
+            otoceni_leve = np.where(zacina, ujeto_leve, otoceni_leve)
+            otoceni_prave = np.where(zacina, ujeto_prave, otoceni_prave)
+            smer_otoceni = np.where(prikaz == KODY_PRIKAZU[VPRAVO], -1.0, 1.0)
+            cilovy_uhel = np.where(prikaz == KODY_PRIKAZU[VZAD], np.pi, np.pi / 2)
+            # na miste: leve kolo couva, prave jede dopredu (doleva), znamenka podle smeru
+            otoceno = smer_otoceni * ((ujeto_prave - otoceni_prave) + (ujeto_leve - otoceni_leve)) / (2 * d)
+            zbyva_uhel = cilovy_uhel - smer_otoceni * otoceno
+            otocil = otaci & ((zbyva_uhel <= -TOLERANCE_OTOCENI) | ((zbyva_uhel <= TOLERANCE_OTOCENI) & prostredni))
+            rychlost_otoceni = np.minimum(p["uhlova_otoceni"], np.sqrt(
+                MIN_DOPREDNA ** 2 + 2 * p["zrychleni"] * d * np.maximum(zbyva_uhel, 0)) / d)
+            dopredna_povel = np.where(otaci, 0.0, dopredna_povel)
+            uhlova_povel = np.where(otaci, np.where(otocil, 0.0, smer_otoceni * rychlost_otoceni), uhlova_povel)
+            otoceni_leve = np.where(otocil, np.nan, otoceni_leve)
+            smer = np.where(otocil, (smer + ZMENA_SMERU[prikaz]) % 4, smer)
+            index_prikazu += otocil
+            stav = np.where(otocil & (index_prikazu >= trasa.shape[0]), ST_KONEC,
+                            np.where(otocil, ST_JED_PO_CARE, stav))
+
+        # --- stav OBLOUK (Robot.jed_obloukem) ---
+        v_oblouku = stav == ST_OBLOUK
+        if v_oblouku.any():
+            vpravo = prikaz == KODY_PRIKAZU[VPRAVO]
+            polomer = np.minimum(p["polomer_oblouku"], g.senzory_vpredu)
+            vnejsi = np.where(vpravo, ujeto_leve, ujeto_prave)
+            vnitrni = np.where(vpravo, ujeto_prave, ujeto_leve)
+            rovny_kus = v_oblouku & np.isnan(oblouk_vnejsi) & (vnejsi < zacatek_oblouku + g.senzory_vpredu - polomer)
+            zacina_tocit = v_oblouku & np.isnan(oblouk_vnejsi) & ~rovny_kus
+            oblouk_vnejsi = np.where(zacina_tocit, vnejsi, oblouk_vnejsi)
+            oblouk_vnitrni = np.where(zacina_tocit, vnitrni, oblouk_vnitrni)
+            znamenko = np.where(polomer >= d, 1.0, -1.0)
+            uhel = ((vnejsi - oblouk_vnejsi) - znamenko * (vnitrni - oblouk_vnitrni)) / (2 * d)
+            projel = v_oblouku & ~rovny_kus & (uhel >= np.pi / 2)
+            uhlova_oblouku = np.where(rovny_kus, 0.0, np.where(vpravo, -1.0, 1.0) * p["dopredna_oblouku"] / polomer)
+            dopredna_povel = np.where(v_oblouku & ~projel, p["dopredna_oblouku"], dopredna_povel)
+            uhlova_povel = np.where(v_oblouku & ~projel, uhlova_oblouku, uhlova_povel)
+            oblouk_vnejsi = np.where(projel, np.nan, oblouk_vnejsi)
+            smer = np.where(projel, (smer + ZMENA_SMERU[prikaz]) % 4, smer)
+            index_prikazu += projel
+            stav = np.where(projel, ST_JED_PO_CARE, stav)
+
+        # trasa konci i po poslednim prikazu rovne
+        dojel = (stav == ST_JED_PO_CARE) & (index_prikazu >= trasa.shape[0])
+        stav = np.where(dojel, ST_KONEC, stav)
+
+        konec = (stav == ST_KONEC) & aktivni
+        cas_kola = np.where(konec, t, cas_kola)
+
+        jel_po_care = jede
+
+        selhal = (cas_mimo_caru >= g.limit_ztraceni_s) | (cas_stani >= g.limit_stani_s)
+        stav = np.where(selhal & (stav < ST_KONEC), ST_SELHAL, stav)
+        dopredna_povel = np.where(stav >= ST_KONEC, 0.0, dopredna_povel)
+        uhlova_povel = np.where(stav >= ST_KONEC, 0.0, uhlova_povel)
+
+        # --- motory (Robot.jed) a kinematika ---
+        pozad_leve = dopredna_povel - d * uhlova_povel
+        pozad_prave = dopredna_povel + d * uhlova_povel
+        # SynchronizaceKol: tiky se znamenkem zadane rychlosti, odchylka kolmo k zadanemu smeru (v rovine kol)
+        velikost = np.hypot(pozad_leve, pozad_prave)
+        deleno = np.where(velikost > 0, velikost, 1.0)
+        novy_leve = pozad_leve / deleno
+        novy_prave = pozad_prave / deleno
+        odchylka_kol = np.where((velikost == 0) | (novy_leve * smer_leve + novy_prave * smer_prave < 0.9),
+                                0.0, odchylka_kol)
+        smer_leve, smer_prave = novy_leve, novy_prave
+        odchylka_kol += (np.sign(smer_leve) * (ujeto_leve - tiky_leve_minule) * smer_prave
+                         - np.sign(smer_prave) * (ujeto_prave - tiky_prave_minule) * smer_leve)
+        korekce = np.clip(p["kp_synchronizace"] * odchylka_kol, -0.05, 0.05) * (p["synchronizace_kol"] > 0.5)
+        korekce_leve = pozad_leve - korekce * smer_prave
+        korekce_prave = pozad_prave + korekce * smer_leve
+        pozad_leve = np.where(pozad_leve * korekce_leve > 0, korekce_leve, pozad_leve)
+        pozad_prave = np.where(pozad_prave * korekce_prave > 0, korekce_prave, pozad_prave)
+        tiky_leve_minule = ujeto_leve
+        tiky_prave_minule = ujeto_prave
+        pozad_leve = pozad_leve * p["zesileni_leve"]
+        pozad_prave = pozad_prave * p["zesileni_prave"]
+        pozad_leve = np.where(np.abs(pozad_leve) < g.min_rychlost_kola, 0.0, pozad_leve)
+        pozad_prave = np.where(np.abs(pozad_prave) < g.min_rychlost_kola, 0.0, pozad_prave)
+        pozad_leve = np.clip(pozad_leve, -g.max_rychlost_kola, g.max_rychlost_kola)
+        pozad_prave = np.clip(pozad_prave, -g.max_rychlost_kola, g.max_rychlost_kola)
+        v_leve += (pozad_leve - v_leve) * alfa
+        v_prave += (pozad_prave - v_prave) * alfa
+
+        v = (v_leve + v_prave) / 2
+        omega = (v_prave - v_leve) / g.rozchod_kol
+        x += v * c * dt  # c a si jsou z theta na zacatku kroku, stejne jako pro senzory
+        y += v * si * dt
+        theta += omega * dt
+        draha_leve += np.abs(v_leve) * dt
+        draha_prave += np.abs(v_prave) * dt
+        stoji = (np.abs(v_leve) < 1e-3) & (np.abs(v_prave) < 1e-3)
+        cas_stani = np.where(stoji, cas_stani + dt, 0.0)
+
+        krok += 1
+
+    vysledne_ztraty[indexy] = ztraty_cary
+    vysledne_chyby[indexy] = chyby_krizovatek
+    vysledny_cas[indexy] = cas_kola
+    return {
+        "cas_kola": vysledny_cas,
+        "ztraty_cary": vysledne_ztraty,
+        "chyby_krizovatek": vysledne_chyby,
+        "dokonceno": ~np.isnan(vysledny_cas),
+    }
+
+
+def rozsah(text: str):
+    """
+    "od:do:pocet" -> np.linspace, "hodnota" -> [hodnota]
+    """
+    casti = text.split(":")
+    if len(casti) == 1:
+        return np.array([float(casti[0])])
+    if len(casti) == 3:
+        return np.linspace(float(casti[0]), float(casti[1]), int(casti[2]))
+    raise argparse.ArgumentTypeError("rozsah musi byt hodnota nebo od:do:pocet, zadano " + text)
+
+
+def mrizka_parametru(rozsahy: dict):
+    """
+    Vytvori vsechny kombinace zadanych hodnot parametru (kartezsky soucin)
+    """
+    jmena = list(rozsahy.keys())
+    site = np.meshgrid(*[rozsahy[j] for j in jmena], indexing="ij")
+    return {j: sit.ravel() for j, sit in zip(jmena, site)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Davkova simulace jizdy po care pro mnoho sad parametru")
+    parser.add_argument("--trasa", default=",".join([VPRAVO] * 4),
+                        help="prikazy oddelene carkou (rovne, vlevo, vpravo, vzad)")
+    for jmeno in VYCHOZI_PARAMETRY:
+        parser.add_argument("--" + jmeno, type=rozsah, default=None,
+                            help="hodnota nebo od:do:pocet, vychozi " + str(VYCHOZI_PARAMETRY[jmeno]))
+    parser.add_argument("--max_cas", type=float, default=120.0, help="maximalni simulovany cas v s")
+    parser.add_argument("--sum_senzoru", type=float, default=0.0, help="pravdepodobnost chybneho cteni senzoru")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vystup", default=None, help="CSV soubor s vysledky (jinak stdout)")
+    args = parser.parse_args(argv)
+
+    rozsahy = {j: getattr(args, j) for j in VYCHOZI_PARAMETRY if getattr(args, j) is not None}
+    parametry = mrizka_parametru(rozsahy) if rozsahy else {}
+    parametry, pocet = priprav_parametry(parametry)
+
+    vysledky = simuluj(parametry, args.trasa.split(","), pocet, max_cas=args.max_cas,
+                       sum_senzoru=args.sum_senzoru, seed=args.seed)
+
+    soubor = open(args.vystup, "w", newline="") if args.vystup else sys.stdout
+    try:
+        zapis = csv.writer(soubor, lineterminator="\n")
+        sloupce = list(VYCHOZI_PARAMETRY) + ["cas_kola", "ztraty_cary", "chyby_krizovatek", "dokonceno"]
+        zapis.writerow(sloupce)
+        for i in range(pocet):
+            radek = [parametry[j][i] for j in VYCHOZI_PARAMETRY]
+            radek += [vysledky["cas_kola"][i], vysledky["ztraty_cary"][i],
+                      vysledky["chyby_krizovatek"][i], int(vysledky["dokonceno"][i])]
+            zapis.writerow(radek)
+    finally:
+        if soubor is not sys.stdout:
+            soubor.close()
+
+
+if __name__ == "__main__":
+    main()
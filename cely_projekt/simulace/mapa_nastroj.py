@@ -0,0 +1,140 @@
+# Vytvoreni a vypis souboru s mapou bludiste a trasou (mapa.bin, viz navigace.py)
+#
+# Robot si soubor ulozi sam po pruzkumu bludiste (state_machine_krizovatky_all.py, pruzkum = True)
+# a pri dalsim zapnuti ho nacte v Robot.inicializuj. Tady se da soubor prohlednout, nebo
+# bludiste zadat rucne, trasa ze startu (pred krizovatkou (0, 0) smerem +x) do cile se naplanuje.
+#
+# Priklady:
+#   python mapa_nastroj.py vypis mapa.bin
+#   python mapa_nastroj.py vytvor mapa.bin --sirka 3 --vyska 2 --cil 2,1 --cary 0,0-1,0 1,0-1,1 1,1-2,1
+#   python mapa_nastroj.py vytvor mapa.bin --sirka 5 --vyska 5 --cil 4,4 --otevrena
+
+import argparse
+import os
+import sys
+
+SLOZKA = os.path.dirname(os.path.abspath(__file__))
+SLOZKA_PROJEKTU = os.path.dirname(SLOZKA)
+for cesta in (SLOZKA_PROJEKTU, SLOZKA):
+    if cesta not in sys.path:
+        sys.path.insert(0, cesta)
+
+from cely_projekt import Smer  # noqa: E402
+from navigace import Mapa  # noqa: E402
+
+
+def bod(text: str):
+    """
+    "x,y" -> (x, y)
+    """
+    try:
+        x, y = text.split(",")
+        return int(x), int(y)
+    except ValueError:
+        raise argparse.ArgumentTypeError("bod musi byt x,y, zadano " + text)
+
+
+def cara(text: str):
+    """
+    "x1,y1-x2,y2" -> ((x1, y1), (x2, y2)), krizovatky musi byt sousedni
+    """
+    casti = text.split("-")
+    if len(casti) != 2:
+        raise argparse.ArgumentTypeError("cara musi byt x1,y1-x2,y2, zadano " + text)
+    a, b = bod(casti[0]), bod(casti[1])
+    if abs(a[0] - b[0]) + abs(a[1] - b[1]) != 1:
+        raise argparse.ArgumentTypeError("cara musi spojovat sousedni krizovatky, zadano " + text)
+    return a, b
+
+
+def vykresli(mapa: Mapa, cil, trasa):
+    """
+    Vrati seznam radku s obrazkem mapy, y roste nahoru, S je prvni krizovatka, C cil,
+    cara -- / |, ? = o vystupu se nevi
+    """
+    radky = []
+    for y in range(mapa.vyska - 1, -1, -1):
+        krizovatky = ""
+        svisle = ""
+        for x in range(mapa.sirka):
+            znak = "C" if (x, y) == tuple(cil) else "S" if (x, y) == (0, 0) else "+"
+            if not mapa.vystupy(x, y):
+                znak = "."
+            krizovatky += znak
+            if x < mapa.sirka - 1:
+                krizovatky += "--" if mapa.ma_vystup(x, y, 0) else "  " if mapa.zna_vystup(x, y, 0) else " ?"
+            if y > 0:
+                svisle += "|" if mapa.ma_vystup(x, y, 3) else " " if mapa.zna_vystup(x, y, 3) else "?"
+                svisle += "  "
+        radky.append(krizovatky)
+        if y > 0:
+            radky.append(svisle.rstrip())
+    return radky
+
+
+def prujezd(trasa):
+    """
+    Vrati seznam krizovatek, kterymi trasa ze startu projede
+    """
+    x, y, kvadrant = 0, 0, 0
+    body = [(x, y)]
+    for prikaz in trasa:
+        kvadrant = Smer.po_prikazu(kvadrant, prikaz)
+        x, y = Smer.posun(x, y, kvadrant)
+        body.append((x, y))
+    return body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vytvoreni a vypis souboru s mapou bludiste pro robota")
+    prikazy = parser.add_subparsers(dest="prikaz", required=True)
+
+    vypis = prikazy.add_parser("vypis", help="vypise mapu, cil a trasu ze souboru")
+    vypis.add_argument("soubor")
+
+    vytvor = prikazy.add_parser("vytvor", help="ulozi mapu zadanou rucne a naplanuje trasu do cile")
+    vytvor.add_argument("soubor")
+    vytvor.add_argument("--sirka", type=int, required=True)
+    vytvor.add_argument("--vyska", type=int, required=True)
+    vytvor.add_argument("--cil", type=bod, required=True, help="x,y")
+    vytvor.add_argument("--cary", type=cara, nargs="*", default=[], help="x1,y1-x2,y2 ...")
+    vytvor.add_argument("--otevrena", action="store_true", help="vsechny sousedni krizovatky jsou spojene")
+    args = parser.parse_args(argv)
+
+    if args.prikaz == "vytvor":
+        if args.otevrena:
+            mapa = Mapa.otevrena(args.sirka, args.vyska)
+        else:
+            mapa = Mapa(args.sirka, args.vyska)
+            # vsechny vystupy jsou zname, cary vedou jen tam, kde jsou zadane
+            for y in range(args.vyska):
+                for x in range(args.sirka):
+                    for kvadrant in range(4):
+                        mapa.nastav_vystup(x, y, kvadrant, False)
+            for a, b in args.cary:
+                kvadrant = [k for k in range(4) if Smer.posun(a[0], a[1], k) == b][0]
+                if mapa.nastav_vystup(a[0], a[1], kvadrant, True) != 0 or not mapa.na_mape(*b):
+                    print("cara mimo mapu:", a, b)
+                    return 1
+        trasa = mapa.naplanuj(0, 0, 0, args.cil[0], args.cil[1])
+        if trasa is None:
+            print("do cile", args.cil, "cesta nevede")
+            return 1
+        mapa.uloz(args.soubor, args.cil, trasa)
+
+    nacteno = Mapa.nacti(args.soubor)
+    if nacteno is None:
+        print("soubor", args.soubor, "neexistuje, je jine verze nebo je poskozeny")
+        return 1
+    mapa, cil, trasa = nacteno
+    print("mapa %dx%d, cil %s, %d bytu" % (mapa.sirka, mapa.vyska, cil, os.path.getsize(args.soubor)))
+    for radek in vykresli(mapa, cil, trasa):
+        print(radek)
+    print("trasa:", ",".join(trasa) if trasa else "(zadna)")
+    if trasa:
+        print("pres:", " ".join("%d,%d" % b for b in prujezd(trasa)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,265 @@
+# Nahrada modulu microbit pro beh na pocitaci
+#
+# Hodnoty senzoru, enkoderu a tlacitek dodava "zdroj":
+#   ModelRobota - jednoduchy model robota (PWM -> otacky kol -> enkodery), vychozi
+#   ZdrojZaznamu (prehravac.py) - prehrava zaznam z opravdove jizdy
+# Zdroj se meni funkci nastav_zdroj.
+#
+# i2c pocita vsechny transakce (pocet_cteni, pocet_zapisu), hodi se na mereni vykonu.
+
+import math
+
+import utime
+from utime import hodiny
+
+ADRESA_EXPANDERU = 0x38
+ADRESA_MOTORU = 0x70
+
+# bity v bytu z IO expanderu (0x38), viz Senzory.precti_senzory
+BIT_LV_ENKODER = 0
+BIT_PR_ENKODER = 1
+BIT_LV_S_CARY = 2
+BIT_PROS_S_CARY = 3
+BIT_PR_S_CARY = 4
+BIT_LV_IR = 5
+BIT_PR_IR = 6
+BIT_NEPOUZITY = 7  # musi byt 1, jinak by bin() vratil kratsi retezec
+
+
+def sloz_byte_expanderu(lv_cara, pros_cara, pr_cara, lv_ir=False, pr_ir=False, lv_enkoder=0, pr_enkoder=0):
+    """
+    Slozi byte, ktery vraci IO expander, ze stavu jednotlivych senzoru
+    """
+    return ((1 << BIT_NEPOUZITY) | (bool(pr_ir) << BIT_PR_IR) | (bool(lv_ir) << BIT_LV_IR)
+            | (bool(pr_cara) << BIT_PR_S_CARY) | (bool(pros_cara) << BIT_PROS_S_CARY)
+            | (bool(lv_cara) << BIT_LV_S_CARY) | (bool(pr_enkoder) << BIT_PR_ENKODER)
+            | (bool(lv_enkoder) << BIT_LV_ENKODER))
+
+
+class ModelMotoru:
+    """
+    Motor s kolem: PWM = a * uhlova_rychlost + b (jako v kalibraci), pod min_pwm_dojezd se kolo zastavi,
+    z klidu se rozjede az od min_pwm_rozjezd; kalibrace plati pri napeti baterie NAPETI_KALIBRACE,
+    pri nizsim napeti se motor chova jako pri umerne mensim PWM; s casovou_konstantou > 0 se otacky
+    meni setrvacne (prvni rad), jinak hned; zablokovane kolo se netoci
+    """
+
+    def __init__(self, a, b, min_pwm_rozjezd, min_pwm_dojezd, tiky_na_otocku=40):
+        self.a = a
+        self.b = b
+        self.min_pwm_rozjezd = min_pwm_rozjezd
+        self.min_pwm_dojezd = min_pwm_dojezd
+        self.tiky_na_otocku = tiky_na_otocku
+        self.pwm_dopredu = 0
+        self.pwm_dozadu = 0
+        self.uhel = 0.0
+        self.uhlova_rychlost = 0.0
+        self.pomer_napeti = 1.0  # napeti baterie / napeti pri kalibraci
+        self.casova_konstanta = 0.0  # s
+        self.zablokovano = False  # kolo se neotaci (naraz do prekazky)
+
+    def pozadovana_uhlova_rychlost(self):
+        pwm = self.pwm_dopredu - self.pwm_dozadu
+        velikost = abs(pwm) * self.pomer_napeti
+        if self.uhlova_rychlost == 0 and velikost < self.min_pwm_rozjezd:
+            return 0.0
+        if velikost < self.min_pwm_dojezd:
+            return 0.0
+        return math.copysign(max(0.0, (velikost - self.b) / self.a), pwm)
+
+    def posun(self, dt_s):
+        if self.zablokovano:
+            self.uhlova_rychlost = 0.0
+            return
+        cil = self.pozadovana_uhlova_rychlost()
+        if self.casova_konstanta > 0 and not (cil == 0 and abs(self.uhlova_rychlost) < 0.1):
+            # pod 0.1 rad/s uz kolo stoji, z klidu se zase rozjede az od min_pwm_rozjezd
+            cil = self.uhlova_rychlost + (cil - self.uhlova_rychlost) * min(1.0, dt_s / self.casova_konstanta)
+        self.uhlova_rychlost = cil
+        self.uhel += self.uhlova_rychlost * dt_s
+
+    def enkoder(self):
+        # uroven se zmeni tiky_na_otocku krat za otacku
+        return int(abs(self.uhel) / (2 * math.pi / self.tiky_na_otocku)) % 2
+
+
+NAPETI_KALIBRACE = 850  # hodnota z pin2 (cca 7.6 V), pri ktere plati kalibrace motoru v ModelRobota
+
+
+class ModelRobota:
+    """
+    Vychozi zdroj: motory podle kalibrace z testy/test_robot.py, senzory cary nastavitelne rucne
+    """
+
+    def __init__(self):
+        self.levy = ModelMotoru(24.3732783404646, 8.21172006498485, 79, 41)
+        self.pravy = ModelMotoru(27.4515630414309, 61.3869817945568, 113, 113)
+        self.cara = (False, True, False)  # levy, prostredni, pravy senzor cary
+        self.ir = (False, False)
+        self.napeti_adc = NAPETI_KALIBRACE  # pin2, napeti baterie = 0.00898 * napeti_adc
+        self.stisky = {"a": [], "b": []}  # casy stisknuti tlacitek v us
+        self.cas_posledni_aktualizace = 0
+        self.kanaly = {0x05: (self.levy, True), 0x04: (self.levy, False),
+                       0x03: (self.pravy, True), 0x02: (self.pravy, False)}
+
+    def aktualizuj(self, cas_us):
+        dt = (cas_us - self.cas_posledni_aktualizace) / 1000000
+        if dt > 0:
+            self.levy.pomer_napeti = self.pravy.pomer_napeti = self.napeti_adc / NAPETI_KALIBRACE
+            self.levy.posun(dt)
+            self.pravy.posun(dt)
+            self.cas_posledni_aktualizace = cas_us
+
+    def stiskni(self, tlacitko, cas_us):
+        self.stisky[tlacitko].append(cas_us)
+
+    def expander(self, cas_us):
+        self.aktualizuj(cas_us)
+        return sloz_byte_expanderu(self.cara[0], self.cara[1], self.cara[2], self.ir[0], self.ir[1],
+                                   self.levy.enkoder(), self.pravy.enkoder())
+
+    def pin(self, cislo, cas_us):
+        self.aktualizuj(cas_us)
+        if cislo == 14:
+            return self.levy.enkoder()
+        if cislo == 15:
+            return self.pravy.enkoder()
+        return 0
+
+    def analog(self, cislo, cas_us):
+        if cislo == 2:
+            return self.napeti_adc
+        return 0
+
+    def tlacitko(self, jmeno, metoda, cas_us):
+        stisky = [t for t in self.stisky[jmeno] if t <= cas_us]
+        if metoda == "is_pressed":
+            return bool(stisky) and cas_us - stisky[-1] < 100000
+        self.stisky[jmeno] = [t for t in self.stisky[jmeno] if t > cas_us]
+        if metoda == "get_presses":
+            return len(stisky)
+        return bool(stisky)
+
+    def zapis_pwm(self, kanal, pwm, cas_us):
+        self.aktualizuj(cas_us)
+        if kanal in self.kanaly:
+            motor, dopredu = self.kanaly[kanal]
+            if dopredu:
+                motor.pwm_dopredu = pwm
+            else:
+                motor.pwm_dozadu = pwm
+
+
+zdroj = ModelRobota()
+
+
+def nastav_zdroj(novy_zdroj):
+    global zdroj
+    zdroj = novy_zdroj
+    return zdroj
+
+
+class I2C:
+    def __init__(self):
+        self.pocet_cteni = 0
+        self.pocet_zapisu = 0
+
+    def init(self, freq=100000, sda=None, scl=None):
+        pass
+
+    def vynuluj_pocitadla(self):
+        self.pocet_cteni = 0
+        self.pocet_zapisu = 0
+
+    def read(self, addr, n, repeat=False):
+        self.pocet_cteni += 1
+        if addr == ADRESA_EXPANDERU:
+            return bytes([zdroj.expander(hodiny.cas_us)])
+        return bytes(n)
+
+    def write(self, addr, buf, repeat=False):
+        self.pocet_zapisu += 1
+        if addr == ADRESA_MOTORU and len(buf) == 2:
+            zdroj.zapis_pwm(buf[0], buf[1], hodiny.cas_us)
+
+    def scan(self):
+        return [ADRESA_EXPANDERU, ADRESA_MOTORU]
+
+
+class Pin:
+    def __init__(self, cislo):
+        self.cislo = cislo
+
+    def read_digital(self):
+        return zdroj.pin(self.cislo, hodiny.cas_us)
+
+    def read_analog(self):
+        return zdroj.analog(self.cislo, hodiny.cas_us)
+
+    def write_digital(self, hodnota):
+        pass
+
+    def write_analog(self, hodnota):
+        pass
+
+
+class Tlacitko:
+    def __init__(self, jmeno):
+        self.jmeno = jmeno
+
+    def was_pressed(self):
+        return zdroj.tlacitko(self.jmeno, "was_pressed", hodiny.cas_us)
+
+    def is_pressed(self):
+        return zdroj.tlacitko(self.jmeno, "is_pressed", hodiny.cas_us)
+
+    def get_presses(self):
+        return zdroj.tlacitko(self.jmeno, "get_presses", hodiny.cas_us)
+
+
+class Displej:
+    def __init__(self):
+        self.historie = []  # vse, co se zobrazilo
+
+    def show(self, hodnota, *args, **kwargs):
+        self.historie.append(str(hodnota))
+
+    def scroll(self, hodnota, *args, **kwargs):
+        self.historie.append(str(hodnota))
+
+    def clear(self):
+        pass
+
+
+def vynuluj():
+    """
+    Vrati vse do vychoziho stavu (cas 0, novy ModelRobota, nulova pocitadla), vrati novy model
+    """
+    hodiny.vynuluj()
+    i2c.vynuluj_pocitadla()
+    display.historie = []
+    return nastav_zdroj(ModelRobota())
+
+
+def sleep(ms):
+    utime.sleep_ms(ms)
+
+
+def running_time():
+    return hodiny.cas_us // 1000
+
+
+i2c = I2C()
+display = Displej()
+button_a = Tlacitko("a")
+button_b = Tlacitko("b")
+
+pin0 = Pin(0)
+pin1 = Pin(1)
+pin2 = Pin(2)
+pin8 = Pin(8)
+pin12 = Pin(12)
+pin13 = Pin(13)
+pin14 = Pin(14)
+pin15 = Pin(15)
+pin16 = Pin(16)
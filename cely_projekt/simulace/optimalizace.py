@@ -0,0 +1,334 @@
+# Hledani nejlepsich parametru jizdy po care a zataceni pomoci davkoveho simulatoru
+#
+# Bezi na pocitaci, potrebuje numpy. Vypocet se rozdeli mezi vsechna jadra procesoru.
+# Kazda sada parametru se vyzkousi v nekolika scenarich (ruzna chyba kalibrace kol
+# a sum senzoru), z toho se spocita:
+#   cas - median casu kola ve scenarich, kde robot dojel
+#   robustnost - podil scenaru, kde robot dojel bez chyby na krizovatce
+#
+# Vysledky se ukladaji do cache (--cache), opakovane spusteni tedy pocita jen nove sady.
+# Na konci se zapise Paretova fronta (cas proti robustnosti) do JSON a vybrane
+# parametry do souboru, ktery nacte robot pres Nastaveni.nacti (viz cely_projekt.py).
+#
+# Priklady:
+#   python optimalizace.py mrizka --dopredna 0.1:0.4:8 --uhlova 0.2:4:8
+#   python optimalizace.py nahodne --pocet 5000 --dopredna 0.1:0.5 --uhlova 0.2:4
+#   python optimalizace.py bayes --pocet 3000 --kolo 500 --dopredna 0.1:0.5 --uhlova 0.2:4 --uhlova_zatoceni 1:5
+
+import argparse
+import hashlib
+import json
+import math
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from davkovy_simulator import VERZE, VYCHOZI_PARAMETRY, simuluj
+
+# parametry, ktere se daji optimalizovat: vsechny, ktere simulator zna a stavovy automat cte z parametry.txt
+# (zesileni kol jsou soucasti scenaru, ostatni robot z parametry.txt necte)
+LADITELNE = ["dopredna", "uhlova", "kd_cary", "zpomaleni_cary", "perioda_cary_us", "uhlova_zatoceni",
+             "dopredna_popojeti", "vzdalenost_popojeti", "zrychleni", "min_vzorku_krizovatky",
+             "min_delka_krizovatky", "ignoruj_krizovatky", "otaceni_uhlem", "uhlova_otoceni", "oblouky",
+             "dopredna_oblouku", "polomer_oblouku", "planovat_rychlost", "dopredna_max", "dopredna_krizovatky",
+             "rezerva_krizovatky"]
+CELA_CISLA = ["perioda_cary_us", "min_vzorku_krizovatky", "otaceni_uhlem", "oblouky", "planovat_rychlost"]
+
+VERZE_CACHE = 2
+
+
+def scenare(pocet: int, seed: int):
+    """
+    Vrati seznam scenaru (zesileni_leve, zesileni_prave, sum_senzoru, seed), prvni je idealni robot
+    """
+    rng = np.random.default_rng(seed)
+    vysledek = [(1.0, 1.0, 0.0, seed)]
+    for i in range(1, pocet):
+        leve, prave = rng.normal(1.0, 0.1, 2)
+        vysledek.append((float(leve), float(prave), 0.002, seed + i))
+    return vysledek
+
+
+def zaokrouhli(parametry: dict):
+    """
+    Zaokrouhli parametry, aby se daly pouzit jako klic do cache a zapsat do robota
+    """
+    vysledek = {}
+    for jmeno, hodnota in parametry.items():
+        if jmeno in CELA_CISLA:
+            vysledek[jmeno] = int(round(hodnota))
+        else:
+            vysledek[jmeno] = round(float(hodnota), 4)
+    return vysledek
+
+
+def klic(parametry: dict, prikazy, seznam_scenaru, max_cas: float):
+    # vsechny parametry, se kterymi simulace bezi (i vychozi), a verze simulatoru, ktery je spocital
+    efektivni = dict(VYCHOZI_PARAMETRY)
+    efektivni.update(parametry)
+    text = json.dumps([VERZE_CACHE, VERZE, efektivni, list(prikazy), seznam_scenaru, max_cas], sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def vyhodnot_davku(uloha):
+    """
+    Spousti se v pracovnim procesu: vyhodnoti davku sad parametru ve vsech scenarich
+    """
+    davka, prikazy, seznam_scenaru, max_cas = uloha
+    n = len(davka)
+    parametry = {j: np.array([p[j] for p in davka], dtype=np.float64) for j in LADITELNE}
+
+    casy = np.full((len(seznam_scenaru), n), np.nan)
+    bez_chyby = np.zeros((len(seznam_scenaru), n), dtype=bool)
+    for i, (leve, prave, sum_senzoru, seed) in enumerate(seznam_scenaru):
+        parametry["zesileni_leve"] = leve
+        parametry["zesileni_prave"] = prave
+        vysledky = simuluj(parametry, prikazy, n, max_cas=max_cas, sum_senzoru=sum_senzoru, seed=seed)
+        casy[i] = vysledky["cas_kola"]
+        bez_chyby[i] = vysledky["dokonceno"] & (vysledky["chyby_krizovatek"] == 0)
+
+    vysledek = []
+    for j in range(n):
+        uspesne = casy[bez_chyby[:, j], j]
+        cas = float(np.median(uspesne)) if uspesne.size else None
+        vysledek.append({"cas": cas, "robustnost": float(bez_chyby[:, j].mean())})
+    return vysledek
+
+
+class Cache:
+    """
+    Vysledky simulaci ulozene po radcich v JSON, klicem je hash parametru, trasy a scenaru
+    """
+
+    def __init__(self, soubor):
+        self.soubor = soubor
+        self.data = {}
+        if soubor and os.path.exists(soubor):
+            with open(soubor) as f:
+                for radek in f:
+                    if radek.strip():
+                        zaznam = json.loads(radek)
+                        self.data[zaznam["klic"]] = zaznam
+
+    def uloz(self, zaznamy):
+        for zaznam in zaznamy:
+            self.data[zaznam["klic"]] = zaznam
+        if self.soubor:
+            with open(self.soubor, "a") as f:
+                for zaznam in zaznamy:
+                    f.write(json.dumps(zaznam, sort_keys=True) + "\n")
+
+
+def vyhodnot(kandidati, prikazy, seznam_scenaru, cache: Cache, pool, procesu: int, max_davka: int, max_cas: float):
+    """
+    Vyhodnoti seznam sad parametru, spocitane sady vezme z cache, zbytek rozdeli rovnomerne mezi procesy
+    (davka nejvys max_davka sad)
+    """
+    kandidati = [zaokrouhli(k) for k in kandidati]
+    klice = [klic(k, prikazy, seznam_scenaru, max_cas) for k in kandidati]
+
+    nove = {}
+    for k, parametry in zip(klice, kandidati):
+        if k not in cache.data and k not in nove:
+            nove[k] = parametry
+
+    if nove:
+        seznam = list(nove.items())
+        # aspon jedna davka na proces, jinak by u mensich kol vetsina jader stala
+        velikost_davky = max(1, min(max_davka, math.ceil(len(seznam) / procesu)))
+        ulohy = []
+        for i in range(0, len(seznam), velikost_davky):
+            davka = [p for _, p in seznam[i:i + velikost_davky]]
+            ulohy.append((davka, prikazy, seznam_scenaru, max_cas))
+
+        zaznamy = []
+        for i, vysledky in enumerate(pool.imap(vyhodnot_davku, ulohy)):
+            for (k, parametry), vysledek in zip(seznam[i * velikost_davky:], vysledky):
+                zaznam = {"klic": k, "parametry": parametry}
+                zaznam.update(vysledek)
+                zaznamy.append(zaznam)
+        cache.uloz(zaznamy)
+
+    return [cache.data[k] for k in klice]
+
+
+def paretova_fronta(zaznamy):
+    """
+    Sady parametru, ktere nejsou horsi v case i v robustnosti nez jina sada
+    """
+    platne = [z for z in zaznamy if z["cas"] is not None]
+    platne.sort(key=lambda z: (z["cas"], -z["robustnost"]))
+    fronta = []
+    nejlepsi_robustnost = -1.0
+    for z in platne:
+        if z["robustnost"] > nejlepsi_robustnost:
+            fronta.append(z)
+            nejlepsi_robustnost = z["robustnost"]
+    return fronta
+
+
+def vyber(fronta, min_robustnost: float):
+    """
+    Nejrychlejsi sada z Paretovy fronty s dostatecnou robustnosti, jinak ta nejrobustnejsi
+    """
+    for z in fronta:
+        if z["robustnost"] >= min_robustnost:
+            return z
+    return fronta[-1] if fronta else None
+
+
+def skore(zaznam):
+    # mensi je lepsi: nedojeti je horsi nez jakykoli cas, robustnost se pocita jako penalizace casu
+    if zaznam["cas"] is None:
+        return math.inf
+    return zaznam["cas"] * (2.0 - zaznam["robustnost"])
+
+
+def kandidati_mrizka(rozsahy: dict, pocty: dict):
+    jmena = list(rozsahy)
+    osy = [np.linspace(rozsahy[j][0], rozsahy[j][1], pocty[j]) for j in jmena]
+    site = np.meshgrid(*osy, indexing="ij")
+    return [dict(zip(jmena, hodnoty)) for hodnoty in zip(*[s.ravel() for s in site])]
+
+
+def kandidati_nahodne(rozsahy: dict, pocet: int, rng):
+    hodnoty = {j: rng.uniform(od, do, pocet) for j, (od, do) in rozsahy.items()}
+    return [{j: hodnoty[j][i] for j in rozsahy} for i in range(pocet)]
+
+
+def kandidati_bayes(rozsahy: dict, zaznamy, pocet: int, rng, podil_dobrych: float = 0.2):
+    """
+    Zjednoduseny TPE (Tree-structured Parzen Estimator): vygeneruje kandidaty kolem dobrych sad
+    a vybere ty, u kterych je pomer hustoty dobrych a spatnych sad nejvetsi
+    """
+    pevne = {j: od for j, (od, do) in rozsahy.items() if do <= od}
+    jmena = [j for j in rozsahy if j not in pevne]
+    dolni = np.array([rozsahy[j][0] for j in jmena])
+    sirka = np.array([rozsahy[j][1] - rozsahy[j][0] for j in jmena])
+
+    body = np.array([[z["parametry"][j] for j in jmena] for z in zaznamy])
+    body = (body - dolni) / sirka
+    poradi = np.argsort([skore(z) for z in zaznamy])
+    pocet_dobrych = max(1, int(len(zaznamy) * podil_dobrych))
+    dobre = body[poradi[:pocet_dobrych]]
+    spatne = body[poradi[pocet_dobrych:]]
+    if spatne.shape[0] == 0:
+        spatne = dobre
+
+    sigma = max(0.02, 1.0 / (len(zaznamy) ** (1.0 / (len(jmena) + 4))))
+
+    def hustota(x, stred):
+        vzd = ((x[:, None, :] - stred[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-vzd / (2 * sigma * sigma)).mean(axis=1) + 1e-12
+
+    navrhy = dobre[rng.integers(0, dobre.shape[0], pocet * 10)]
+    navrhy = np.clip(navrhy + rng.normal(0, sigma, navrhy.shape), 0.0, 1.0)
+    pomer = hustota(navrhy, dobre) / hustota(navrhy, spatne)
+    vybrane = navrhy[np.argsort(-pomer)[:pocet]] * sirka + dolni
+    vysledek = []
+    for radek in vybrane:
+        kandidat = dict(pevne)
+        kandidat.update(zip(jmena, radek))
+        vysledek.append(kandidat)
+    return vysledek
+
+
+def zapis_pro_robota(soubor, parametry: dict):
+    """
+    Zapise parametry ve formatu jmeno=hodnota, ktery umi nacist Nastaveni.nacti v robotovi
+    """
+    with open(soubor, "w") as f:
+        for jmeno in LADITELNE:
+            if jmeno in parametry:
+                f.write(jmeno + "=" + str(parametry[jmeno]) + "\n")
+
+
+def rozsah(text: str):
+    """
+    "od:do" nebo "od:do:pocet" (pocet jen pro mrizku) nebo jedna hodnota
+    """
+    casti = [float(c) for c in text.split(":")]
+    if len(casti) == 1:
+        return casti[0], casti[0], 1
+    if len(casti) == 2:
+        return casti[0], casti[1], 5
+    if len(casti) == 3:
+        return casti[0], casti[1], int(casti[2])
+    raise argparse.ArgumentTypeError("rozsah musi byt hodnota, od:do nebo od:do:pocet, zadano " + text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hledani parametru jizdy po care a zataceni v simulatoru")
+    parser.add_argument("metoda", choices=["mrizka", "nahodne", "bayes"])
+    parser.add_argument("--trasa", default="vpravo,rovne,vlevo,vlevo,vpravo",
+                        help="prikazy oddelene carkou (rovne, vlevo, vpravo, vzad)")
+    for jmeno in LADITELNE:
+        parser.add_argument("--" + jmeno, type=rozsah, default=None,
+                            help="od:do[:pocet] nebo hodnota, vychozi " + str(VYCHOZI_PARAMETRY[jmeno]))
+    parser.add_argument("--pocet", type=int, default=2000, help="pocet vyhodnocenych sad (nahodne, bayes)")
+    parser.add_argument("--kolo", type=int, default=500, help="velikost jednoho kola metody bayes")
+    parser.add_argument("--scenaru", type=int, default=4, help="pocet scenaru pro robustnost")
+    parser.add_argument("--procesu", type=int, default=os.cpu_count(), help="pocet procesu")
+    parser.add_argument("--davka", type=int, default=256, help="nejvetsi pocet sad simulovanych najednou v jednom procesu "
+                        "(mensi, aby meli praci vsechny procesy)")
+    parser.add_argument("--max_cas", type=float, default=60.0, help="maximalni simulovany cas trasy v s")
+    parser.add_argument("--min_robustnost", type=float, default=1.0, help="minimalni robustnost vybrane sady")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", default="optimalizace_cache.jsonl")
+    parser.add_argument("--fronta", default="pareto.json", help="JSON s Paretovou frontou")
+    parser.add_argument("--parametry", default="parametry.txt", help="soubor s vybranymi parametry pro robota")
+    args = parser.parse_args(argv)
+
+    prikazy = args.trasa.split(",")
+    rozsahy = {}
+    pocty = {}
+    for jmeno in LADITELNE:
+        hodnota = getattr(args, jmeno)
+        if hodnota is None:
+            hodnota = (VYCHOZI_PARAMETRY[jmeno], VYCHOZI_PARAMETRY[jmeno], 1)
+        rozsahy[jmeno] = (hodnota[0], hodnota[1])
+        pocty[jmeno] = hodnota[2]
+
+    rng = np.random.default_rng(args.seed)
+    seznam_scenaru = scenare(args.scenaru, args.seed)
+    cache = Cache(args.cache)
+
+    with Pool(args.procesu) as pool:
+        if args.metoda == "mrizka":
+            zaznamy = vyhodnot(kandidati_mrizka(rozsahy, pocty), prikazy, seznam_scenaru,
+                               cache, pool, args.procesu, args.davka, args.max_cas)
+        elif args.metoda == "nahodne":
+            zaznamy = vyhodnot(kandidati_nahodne(rozsahy, args.pocet, rng), prikazy, seznam_scenaru,
+                               cache, pool, args.procesu, args.davka, args.max_cas)
+        else:
+            zaznamy = vyhodnot(kandidati_nahodne(rozsahy, min(args.kolo, args.pocet), rng), prikazy,
+                               seznam_scenaru, cache, pool, args.procesu, args.davka, args.max_cas)
+            while len(zaznamy) < args.pocet:
+                pocet = min(args.kolo, args.pocet - len(zaznamy))
+                kandidati = kandidati_bayes(rozsahy, zaznamy, pocet, rng)
+                zaznamy += vyhodnot(kandidati, prikazy, seznam_scenaru, cache, pool, args.procesu, args.davka,
+                                    args.max_cas)
+                nejlepsi = min(zaznamy, key=skore)
+                print("vyhodnoceno", len(zaznamy), "nejlepsi cas", nejlepsi["cas"],
+                      "robustnost", nejlepsi["robustnost"])
+
+    fronta = paretova_fronta(zaznamy)
+    with open(args.fronta, "w") as f:
+        json.dump({"trasa": prikazy, "scenare": seznam_scenaru, "fronta": fronta}, f, indent=2)
+
+    vybrana = vyber(fronta, args.min_robustnost)
+    if vybrana is None:
+        print("zadna sada parametru nedojela do cile")
+        return 1
+
+    zapis_pro_robota(args.parametry, vybrana["parametry"])
+    print("vyhodnoceno", len(zaznamy), "sad, Paretova fronta ma", len(fronta), "bodu ->", args.fronta)
+    print("vybrano: cas", vybrana["cas"], "robustnost", vybrana["robustnost"], "->", args.parametry)
+    for jmeno in LADITELNE:
+        print("  " + jmeno + " = " + str(vybrana["parametry"][jmeno]))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
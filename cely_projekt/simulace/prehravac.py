@@ -0,0 +1,250 @@
+# Prehravani zaznamu z robota (nahravac.py) na pocitaci
+#
+# Zaznam obsahuje vsechna cteni IO expanderu (0x38), enkoderu na pinech 14/15,
+# napeti baterie (pin2), tlacitek a casu (ticks_us) tak, jak je program v robotovi videl. Prehravac je
+# podstrci programu ve stejnem poradi, takze stavovy automat se rozhoduje presne
+# jako pri jizde. Sleep se preskoci, prehrani tedy trva zlomek puvodni jizdy.
+#
+# Prehrava se stejny program, ktery zaznam nahral (tedy s nahravat = True):
+# misto modulu nahravac dostane program prehravaci verzi se stejnym rozhranim.
+# Co program precetl pred nahravac.zacni(), v zaznamu neni.
+#
+# Priklady:
+#   python prehravac.py zaznam.bin ../state_machine_krizovatky_all.py
+#   python prehravac.py zaznam.bin --vypis
+
+import argparse
+import os
+import runpy
+import sys
+import types
+from collections import deque
+
+SLOZKA = os.path.dirname(os.path.abspath(__file__))
+SLOZKA_PROJEKTU = os.path.dirname(SLOZKA)
+for cesta in (SLOZKA_PROJEKTU, SLOZKA):
+    if cesta not in sys.path:
+        sys.path.insert(0, cesta)
+
+import microbit  # noqa: E402  nahrada ze slozky simulace
+import nahravac  # noqa: E402
+from utime import hodiny  # noqa: E402
+
+JMENA_TYPU = {
+    nahravac.EXPANDER: "expander",
+    nahravac.CAS: "cas",
+    nahravac.PIN14: "pin14",
+    nahravac.PIN15: "pin15",
+    nahravac.A_WAS_PRESSED: "a.was_pressed",
+    nahravac.A_IS_PRESSED: "a.is_pressed",
+    nahravac.B_WAS_PRESSED: "b.was_pressed",
+    nahravac.B_IS_PRESSED: "b.is_pressed",
+    nahravac.ANALOG2: "pin2.analog",
+}
+
+TYPY_S_HODNOTOU_V_TYPU = [nahravac.PIN14, nahravac.PIN15, nahravac.A_WAS_PRESSED, nahravac.A_IS_PRESSED,
+                          nahravac.B_WAS_PRESSED, nahravac.B_IS_PRESSED]
+
+
+class KonecZaznamu(Exception):
+    pass
+
+
+def nacti_zaznam(data: bytes):
+    """
+    Prevede obsah souboru na (cas zacatku, seznam (cas_us, typ, hodnota))
+    """
+    if len(data) < 7 or data[:2] != b"NZ":
+        raise ValueError("soubor neni zaznam z nahravac.py")
+    if data[2] != nahravac.VERZE:
+        raise ValueError("nepodporovana verze zaznamu: " + str(data[2]))
+
+    zacatek = int.from_bytes(data[3:7], "little")
+    zaznamy = []
+    cas = zacatek
+    i = 7
+    while i < len(data):
+        if i + 2 > len(data):
+            raise ValueError("zaznam je useknuty")
+        typ = data[i] >> 4
+        rozdil = ((data[i] & 0x0F) << 8) | data[i + 1]
+        i += 2
+
+        if typ == nahravac.PRETECENI:
+            cas += rozdil << 12
+            continue
+
+        cas += rozdil
+        if typ == nahravac.EXPANDER:
+            if i >= len(data):
+                raise ValueError("zaznam je useknuty")
+            zaznamy.append((cas, typ, data[i]))
+            i += 1
+        elif typ == nahravac.ANALOG2:
+            if i + 2 > len(data):
+                raise ValueError("zaznam je useknuty")
+            zaznamy.append((cas, typ, data[i] | (data[i + 1] << 8)))
+            i += 2
+        elif typ == nahravac.CAS:
+            zaznamy.append((cas, typ, 0))
+        else:
+            zaklad = typ - (typ - nahravac.PIN14) % 2
+            if zaklad not in TYPY_S_HODNOTOU_V_TYPU:
+                raise ValueError("neznamy typ zaznamu: " + str(typ))
+            zaznamy.append((cas, zaklad, typ - zaklad))
+
+    return zacatek, zaznamy
+
+
+class ZdrojZaznamu:
+    """
+    Zdroj pro microbit.nastav_zdroj: kazdy druh vstupu se bere postupne ze zaznamu
+    """
+
+    def __init__(self, zaznamy):
+        self.fronty = {typ: deque() for typ in JMENA_TYPU}
+        for cas, typ, hodnota in zaznamy:
+            self.fronty[typ].append((cas, hodnota))
+        self.pwm = []  # (cas_us, kanal, pwm) vsechny zapisy do motoru
+
+    def dalsi(self, typ):
+        fronta = self.fronty[typ]
+        if not fronta:
+            raise KonecZaznamu(JMENA_TYPU[typ])
+        cas, hodnota = fronta.popleft()
+        hodiny.nastav(cas)
+        return cas, hodnota
+
+    def zbyva(self):
+        return sum(len(f) for f in self.fronty.values())
+
+    def expander(self, cas_us):
+        return self.dalsi(nahravac.EXPANDER)[1]
+
+    def pin(self, cislo, cas_us):
+        if cislo == 14:
+            return self.dalsi(nahravac.PIN14)[1]
+        if cislo == 15:
+            return self.dalsi(nahravac.PIN15)[1]
+        return 0
+
+    def analog(self, cislo, cas_us):
+        if cislo == 2:
+            return self.dalsi(nahravac.ANALOG2)[1]
+        return 0
+
+    def tlacitko(self, jmeno, metoda, cas_us):
+        # tlacitka se prehravaji pres PrehravaneTlacitko, primo pouzita tlacitka nejsou v zaznamu
+        return False
+
+    def zapis_pwm(self, kanal, pwm, cas_us):
+        self.pwm.append((cas_us, kanal, pwm))
+
+
+class PrehravaneTlacitko:
+    def __init__(self, zdroj, typ_was, typ_is):
+        self.zdroj = zdroj
+        self.typ_was = typ_was
+        self.typ_is = typ_is
+
+    def was_pressed(self):
+        return bool(self.zdroj.dalsi(self.typ_was)[1])
+
+    def is_pressed(self):
+        return bool(self.zdroj.dalsi(self.typ_is)[1])
+
+
+class PrehravaciNahravac:
+    """
+    Ma stejne rozhrani jako nahravac.Nahravac, ale cas a tlacitka bere ze zaznamu
+    """
+
+    def __init__(self, zdroj):
+        self.zdroj = zdroj
+
+    def zacni(self):
+        pass
+
+    def ukonci(self):
+        pass
+
+    def ticks_us(self):
+        return self.zdroj.dalsi(nahravac.CAS)[0]
+
+    def zapis_expander(self, byte):
+        return 0
+
+    def zapis_pin(self, cislo, hodnota):
+        return 0
+
+    def zapis_analog(self, cislo, hodnota):
+        return 0
+
+    def obal_tlacitko(self, tlacitko, jmeno):
+        if jmeno == "a":
+            return PrehravaneTlacitko(self.zdroj, nahravac.A_WAS_PRESSED, nahravac.A_IS_PRESSED)
+        return PrehravaneTlacitko(self.zdroj, nahravac.B_WAS_PRESSED, nahravac.B_IS_PRESSED)
+
+
+def prehravaci_modul(zdroj):
+    """
+    Modul, ktery se programu podstrci misto nahravac.py
+    """
+    modul = types.ModuleType("nahravac")
+    for jmeno in dir(nahravac):
+        if jmeno.isupper():
+            setattr(modul, jmeno, getattr(nahravac, jmeno))
+    modul.Nahravac = lambda *args, **kwargs: PrehravaciNahravac(zdroj)
+    return modul
+
+
+def prehraj(zacatek, zaznamy, skript):
+    """
+    Spusti skript (napr. state_machine_krizovatky_all.py) nad zaznamem, vrati pouzity zdroj
+    """
+    zdroj = microbit.nastav_zdroj(ZdrojZaznamu(zaznamy))
+    hodiny.cas_us = zacatek
+    hodiny.krok_us = 0
+    hodiny.spanek_posouva = False
+
+    slozka_skriptu = os.path.dirname(os.path.abspath(skript))
+    if slozka_skriptu not in sys.path:
+        sys.path.insert(0, slozka_skriptu)
+
+    puvodni = sys.modules.get("nahravac")
+    sys.modules["nahravac"] = prehravaci_modul(zdroj)
+    try:
+        runpy.run_path(skript, run_name="__main__")
+    except KonecZaznamu as e:
+        print("konec zaznamu (" + str(e) + ") v case", hodiny.cas_us - zacatek, "us")
+    finally:
+        sys.modules["nahravac"] = puvodni
+    return zdroj
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prehrani zaznamu senzoru, enkoderu a tlacitek z robota")
+    parser.add_argument("zaznam", help="soubor ulozeny nahravac.py v robotovi")
+    parser.add_argument("skript", nargs="?", help="program robota, ktery se ma nad zaznamem spustit")
+    parser.add_argument("--vypis", action="store_true", help="vypise obsah zaznamu")
+    args = parser.parse_args(argv)
+
+    with open(args.zaznam, "rb") as f:
+        zacatek, zaznamy = nacti_zaznam(f.read())
+
+    if args.vypis:
+        for cas, typ, hodnota in zaznamy:
+            if typ == nahravac.EXPANDER:
+                print(cas - zacatek, JMENA_TYPU[typ], format(hodnota, "08b"))
+            else:
+                print(cas - zacatek, JMENA_TYPU[typ], hodnota)
+
+    if args.skript:
+        zdroj = prehraj(zacatek, zaznamy, args.skript)
+        print("zobrazeno:", "".join(microbit.display.historie))
+        print("zapisu do motoru:", len(zdroj.pwm), "nepouzitych zaznamu:", zdroj.zbyva())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
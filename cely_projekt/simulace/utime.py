@@ -0,0 +1,68 @@
+# Nahrada modulu utime z MicroPythonu pro beh na pocitaci
+#
+# Cas je virtualni: neplyne sam od sebe, posouva ho jen sleep (a kazde volani
+# ticks_us o krok_us, aby nezamrzly smycky, ktere jen cekaji na cas),
+# pripadne prehravany zaznam (viz prehravac.py).
+# Diky tomu je beh na pocitaci deterministicky a bezi tak rychle, jak to jde.
+
+
+class CasVyprsel(Exception):
+    pass
+
+
+class Hodiny:
+    def __init__(self):
+        self.cas_us = 0
+        self.krok_us = 10  # o kolik se posune cas pri kazdem cteni (doba vykonani kodu)
+        self.spanek_posouva = True  # pri prehravani zaznamu urcuje cas zaznam, ne sleep
+        self.limit_us = None  # po tomto case se program prerusi vyjimkou CasVyprsel
+
+    def vynuluj(self):
+        self.__init__()
+
+    def kontroluj_limit(self):
+        if self.limit_us is not None and self.cas_us > self.limit_us:
+            raise CasVyprsel(str(self.cas_us) + " us")
+
+    def posun(self, us):
+        if self.spanek_posouva:
+            self.cas_us += int(us)
+            self.kontroluj_limit()
+
+    def nastav(self, cas_us):
+        # cas nikdy necouva
+        if cas_us > self.cas_us:
+            self.cas_us = int(cas_us)
+
+
+hodiny = Hodiny()
+
+
+def ticks_us():
+    hodiny.cas_us += hodiny.krok_us
+    hodiny.kontroluj_limit()
+    return hodiny.cas_us
+
+
+def ticks_ms():
+    return ticks_us() // 1000
+
+
+def ticks_diff(ticks1, ticks2):
+    return ticks1 - ticks2
+
+
+def ticks_add(ticks, delta):
+    return ticks + delta
+
+
+def sleep_us(us):
+    hodiny.posun(us)
+
+
+def sleep_ms(ms):
+    hodiny.posun(ms * 1000)
+
+
+def sleep(s):
+    hodiny.posun(s * 1000000)
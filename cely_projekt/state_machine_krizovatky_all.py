@@ -1,5 +1,8 @@
 from microbit import button_a, sleep, button_b
-from cely_projekt import Robot, K, Obrazovka
+from cely_projekt import Robot, K, Obrazovka, Nastaveni
+from trasa import Trasa, preloz, PRIKAZY, OP_JED, OP_RYCHLOST, OP_TLACITKO
+# nahravac.py a navigace.py se importuji az v rezimech, ktere je potrebuji (robot je pak nemusi mit
+# nahrane a zakladni jizda po care se vejde do pameti)
 
 from utime import ticks_diff, ticks_us
 
@@ -14,34 +17,138 @@ if __name__ == "__main__":
     st_zatoc = "ZATOC"
     st_narovnej = "NAROVNEJ"
     st_mimo = "MIMO"
+    st_oblouk = "OBLOUK"
+    st_otoc = "OTOC"
+    st_prozkoumej = "PROZKOUMEJ"
+    st_cekam_na_start = "VRAT_NA_START"
+    st_proved = "PROVED"
+    st_ujed = "UJED"
+    st_konec_kola = "KONEC_KOLA"
+    st_vyprost = "VYPROST"
 
     stav = st_start
     Obrazovka.pis(stav)
-    index_prikazu = 0
+    prikaz = None  # co udelat na dalsi krizovatce, None = trasa skoncila
 
     robot = Robot(0.15, 0.067, False)
+    # kalibrace a regulace otacek z robot.nalad_regulaci (staci jednou, napr. z REPL) se ulozi a priste nactou
+    robot.soubor_kalibrace = "kalibrace.txt"
 
-    # zmente na vase prikazy
-    prikazy = [K.VPRAVO] * 10
-    #napr prikazy = [K.ROVNE, K.ROVNE, K.VPRAVO]
+    # zmente na vasi trasu, prikazy plati pro krizovatky od prvni, na ktere robot ze startu prijede
+    trasa = Trasa(preloz("10*vpravo"))
+    #napr trasa = Trasa(preloz("rovne rovne rychlost=0.2 vpravo jed=0.1 tlacitko vlevo"))
+    # nebo si trasu nechte naplanovat z mapy (navigace.py), napr. na mrizce 5x5 z prvni krizovatky do (3, 2):
+    # from navigace import Mapa
+    # trasa = Trasa(preloz(Mapa.otevrena(5, 5).naplanuj(0, 0, 0, 3, 2)))
 
     # zmente na vami odladene parametry jizdy po care
-    dopredna = 0.1
-    uhlova = 0.5
+    # nebo je nahrajte do robota jako soubor parametry.txt (vystup simulace/optimalizace.py)
+    parametry = Nastaveni.nacti("parametry.txt", {
+        "dopredna": 0.1,
+        "uhlova": 0.5,
+        "kd_cary": 0.1,
+        "zpomaleni_cary": 0.5,
+        "perioda_cary_us": 75000,
+        "uhlova_zatoceni": 2.0,
+        "dopredna_popojeti": 0.2,
+        "vzdalenost_popojeti": 0.045,
+        "zrychleni": 0.5,
+        "uhlova_otoceni": 4.0,
+        "dopredna_rychle": 0.2,
+        "slepa_ulicka": 0.03,
+        "dopredna_oblouku": 0.15,
+        "polomer_oblouku": 0.03,
+        "dopredna_max": 0.3,
+        "dopredna_krizovatky": 0.1,
+        "krok_mrizky": 0.3,
+        "rezerva_krizovatky": 0.08,
+        "vzdalenost_startu": 0.15,
+        "dopredna_hledani": 0.1,
+        "uhlova_hledani": 3.0,
+        "limit_hledani_us": 8000000,
+        "vzdalenost_vyprosteni": 0.05,
+        "max_zaseknuti": 3,
+        "min_vzorku_krizovatky": 2,
+        "min_delka_krizovatky": 0.005,
+        "ignoruj_krizovatky": 0.1,
+        # rezimy jizdy, 1 = zapnuto (optimalizace.py je umi vybrat taky)
+        "oblouky": 0,
+        "otaceni_uhlem": 0,
+        "planovat_rychlost": 0,
+    })
+    dopredna = parametry["dopredna"]
+    uhlova = parametry["uhlova"]
+    uhlova_zatoceni = parametry["uhlova_zatoceni"]
+    robot.perioda_cary_us = parametry["perioda_cary_us"]
+    robot.regulator_cary.kd = parametry["kd_cary"]
+    robot.regulator_cary.zpomaleni = parametry["zpomaleni_cary"]
+    robot.detektor_krizovatek.min_vzorku = parametry["min_vzorku_krizovatky"]
+    robot.detektor_krizovatek.min_delka = parametry["min_delka_krizovatky"]
+    robot.detektor_krizovatek.ignoruj_vzdalenost = parametry["ignoruj_krizovatky"]
+    robot.polomer_oblouku = parametry["polomer_oblouku"]
+    robot.zrychleni = parametry["zrychleni"]
     zastav_za_krizovatkou = True # nastavte na False pokud nechcete, aby vam robot za kazdou krizovatkou cekal na tlacitko
+    oblouky = parametry["oblouky"] == 1 # 1, pokud ma robot krizovatkou projet obloukem bez zastaveni (VZAD se toci na miste)
+    otaceni_uhlem = parametry["otaceni_uhlem"] == 1 # 1, pokud se ma robot na krizovatce otocit o uhel podle enkoderu (misto zatoc a narovnej, VZAD se otaci o uhel vzdy)
+    nahravat = False # nastavte na True, pokud chcete jizdu nahrat do souboru zaznam.bin (prehrani viz simulace/prehravac.py)
+    pruzkum = False # nastavte na True, pokud ma robot nejdriv prozkoumat bludiste a pak projet nejkratsi cestu do cile
+    planovat_rychlost = parametry["planovat_rychlost"] == 1 # 1, pokud ma robot na rovinkach jet az dopredna_max a pred krizovatkou zpomalit
+    ucit_se = False # nastavte na True, pokud ma robot trasu jezdit dokola a ucit se rychlosti na useckach (ne s pruzkum)
+
+    prvni_usecka = True
+    if planovat_rychlost:
+        from navigace import PlanRychlosti
+        # vzdalenosti krizovatek na mrizce (krok_mrizky) a od startu k prvni krizovatce (vzdalenost_startu) zmerte na vasi draze
+        plan = PlanRychlosti(parametry["krok_mrizky"], parametry["dopredna_max"], parametry["dopredna_krizovatky"],
+                             robot.zrychleni, parametry["rezerva_krizovatky"])
+
+    if pruzkum:
+        from navigace import Mapa, Pruzkumnik
+        # zmente na velikost vaseho bludiste, robot startuje pred krizovatkou (0, 0) a miri k (1, 0)
+        mapa = Mapa(5, 5)
+        cil = (4, 4)
+        pruzkumnik = Pruzkumnik(mapa)
+        trasa = Trasa()
+        zacatek_ztraceni = None
+        slepa_ulicka = False
+        # mapa a trasa z minuleho pruzkumu (pro novy pruzkum soubor mapa.bin z robota smazte)
+        robot.soubor_mapy = "mapa.bin"
+
+    if ucit_se:
+        from navigace import UceniRychlosti
+        # naucene rychlosti z minulych kol, pro jinou trasu (jiny pocet usecek) se zacina znovu
+        pocet_usecek = len(trasa.prikazy()) + 1
+        uceni = UceniRychlosti.nacti("uceni.txt")
+        if uceni is None or uceni.pocet != pocet_usecek:
+            uceni = UceniRychlosti(pocet_usecek, dopredna, parametry["uhlova_otoceni"])
+
+    if nahravat:
+        from nahravac import Nahravac
+        nahravac = Nahravac("zaznam.bin")
+        robot.nahravej(nahravac)
+        button_a = nahravac.obal_tlacitko(button_a, "a")
+        button_b = nahravac.obal_tlacitko(button_b, "b")
+        nahravac.zacni()
 
     smer_narovnani = ""
     zatoceno = False
+    zaseknuti = 0
 
     while not button_a.was_pressed():
         if stav == st_start:
             if robot.inicializuj():
+                if pruzkum and robot.ulozena_mapa is not None:
+                    # bludiste uz je prozkoumane, rovnou rychla jizda
+                    mapa, cil, prikazy = robot.ulozena_mapa
+                    trasa = Trasa(preloz(prikazy))
+                    pruzkum = False
+                    dopredna = parametry["dopredna_rychle"]
                 stav = st_kalibruj
                 Obrazovka.pis(stav)
 
         if stav == st_kalibruj:
             if robot.kalibruj(100,200,10) == 0:
-                stav = st_cekam_na_tlacitko
+                stav = st_cekam_na_start
                 Obrazovka.pis(stav)
             else:
                 break
@@ -49,45 +156,203 @@ if __name__ == "__main__":
         elif stav == st_jed_po_care:
             situace = robot.vycti_senzory_cary()
             if situace == K.CARA:
-                robot.jed_po_care(dopredna, uhlova)
+                if planovat_rychlost:
+                    robot.jed_po_care(plan.rychlost(robot.ujeta_vzdalenost()), uhlova)
+                else:
+                    robot.jed_po_care(dopredna, uhlova)
             elif situace == K.KRIZOVATKA:
                 stav = st_reaguj_na_krizovatku
                 Obrazovka.pis(stav)
-            # elif situace == K.ZTRACEN:
-            # TODO
+            elif situace == K.ZTRACEN and pruzkum:
+                # cara skoncila, po kousku bez cary je to slepa ulicka
+                if zacatek_ztraceni is None:
+                    zacatek_ztraceni = robot.ujeta_vzdalenost()
+                elif robot.ujeta_vzdalenost() - zacatek_ztraceni > parametry["slepa_ulicka"]:
+                    robot.jed(0, 0)
+                    slepa_ulicka = True
+                    stav = st_prozkoumej
+                    Obrazovka.pis(stav)
+            elif situace == K.ZTRACEN:
+                if ucit_se:
+                    uceni.ztrata()
+                stav = st_mimo
+                Obrazovka.pis(stav)
+            if pruzkum and situace != K.ZTRACEN:
+                zacatek_ztraceni = None
 
         elif stav == st_reaguj_na_krizovatku:
-            if index_prikazu == len(prikazy):
-                stav = st_stop
+            if pruzkum and prikaz is None:
+                stav = st_prozkoumej
+                Obrazovka.pis(stav)
+            elif prikaz is None:
+                stav = st_konec_kola if ucit_se else st_stop
+                Obrazovka.pis(stav)
+            elif oblouky and prikaz != K.VZAD:
+                if zastav_za_krizovatkou:
+                    robot.jed(0, 0)
+                    stav = st_cekam_na_tlacitko
+                elif prikaz == K.ROVNE:
+                    stav = st_proved
+                else:
+                    stav = st_oblouk
                 Obrazovka.pis(stav)
             else:
-                dopredna_popojeti = 0.1
-                # if prikazy[index_prikazu] == K.VZAD:
+                dopredna_popojeti = parametry["dopredna_popojeti"]
+                # if prikaz == K.VZAD:
                 #    dopredna = -0.1
 
-                popojel = robot.popojed(dopredna_popojeti, 500000)
+                # osa kol nad krizovatku, meri se od zacatku krizovatky (senzory jsou pred osou)
+                popojel = robot.jed_vzdalenost(dopredna_popojeti, parametry["vzdalenost_popojeti"],
+                                               robot.posledni_krizovatka()[2])
 
                 if popojel:
                     if zastav_za_krizovatkou:
                         robot.jed(0, 0)
                         stav = st_cekam_na_tlacitko
                     else:
-                        if (prikazy[index_prikazu] == K.ROVNE):  # or prikazy[index_prikazu] == K.VZAD:
-                            index_prikazu += 1
-                            stav = st_jed_po_care
+                        if prikaz == K.ROVNE:  # or prikaz == K.VZAD:
+                            stav = st_proved
+                        elif otaceni_uhlem or prikaz == K.VZAD:
+                            stav = st_otoc  # zatoc konci na prvni care vlevo, na VZAD by se otocil jen o 90 stupnu
                         else:
                             stav = st_narovnej
                     Obrazovka.pis(stav)
 
+        elif stav == st_mimo:
+            # ztracena cara: oblouk na stranu, kde byla naposledy, rozmitani, couvnuti po odometrii
+            nalezeno = robot.hledej_caru(parametry["dopredna_hledani"], parametry["uhlova_hledani"],
+                                         parametry["limit_hledani_us"])
+            if nalezeno == K.CARA:
+                stav = st_jed_po_care
+                Obrazovka.pis(stav)
+            elif nalezeno == K.ZTRACEN:
+                stav = st_konec_kola if ucit_se else st_stop
+                Obrazovka.pis(stav)
+
+        elif stav == st_vyprost:
+            # kolo se zaseklo, robot odjede zpet a caru hleda znovu
+            if robot.vyprosti_se(parametry["dopredna_hledani"], parametry["vzdalenost_vyprosteni"]):
+                stav = st_mimo
+                Obrazovka.pis(stav)
+
+        elif stav == st_konec_kola:
+            # rychlosti se upravi podle kola a ulozi, robot se da zpet na start a po tlacitku B jede dalsi kolo
+            robot.jed(0, 0)
+            print("kolo", uceni.po_kole(ticks_us()), "s")
+            uceni.uloz("uceni.txt")
+            trasa.na_zacatek()
+            prvni_usecka = True
+            stav = st_cekam_na_start
+            Obrazovka.pis(stav)
+
         elif stav == st_cekam_na_tlacitko:
             if button_b.was_pressed():
-                if (prikazy[index_prikazu] == K.ROVNE):  # or prikazy[index_prikazu] == K.VZAD:
-                    index_prikazu += 1
-                    stav = st_jed_po_care
+                if prikaz == K.ROVNE:  # or prikaz == K.VZAD:
+                    stav = st_proved
+                elif oblouky and prikaz != K.VZAD:
+                    stav = st_oblouk
+                elif otaceni_uhlem or prikaz == K.VZAD:
+                    stav = st_otoc
                 else:
                     stav = st_narovnej
                 Obrazovka.pis(stav)
 
+        elif stav == st_prozkoumej:
+            # popojede na krizovatku (na konci slepe ulicky uz na ni je), zapise ji do mapy a vybere prikaz
+            if slepa_ulicka:
+                popojel = True
+                vlevo = rovne = vpravo = False
+            else:
+                robot.vycti_senzory_cary()  # detektor jeste upresnuje typ krizovatky
+                popojel = robot.jed_vzdalenost(parametry["dopredna_popojeti"], parametry["vzdalenost_popojeti"],
+                                               robot.posledni_krizovatka()[2])
+                if popojel:
+                    typ = robot.posledni_krizovatka()[0]
+                    vlevo = typ != K.ODBOCKA_VPRAVO
+                    vpravo = typ != K.ODBOCKA_VLEVO
+                    rovne = robot.senzory.precti_senzory()[K.PROS_S_CARY]
+
+            if popojel:
+                slepa_ulicka = False
+                prikaz = pruzkumnik.na_krizovatce(vlevo, rovne, vpravo)
+                if prikaz is None:
+                    # vse prozkoumano, robot se da zpet na start a po tlacitku B jede nejkratsi cestou rychleji
+                    prikazy = mapa.naplanuj(0, 0, 0, cil[0], cil[1]) or []
+                    mapa.uloz(robot.soubor_mapy, cil, prikazy)
+                    trasa = Trasa(preloz(prikazy))
+                    prvni_usecka = True
+                    pruzkum = False
+                    dopredna = parametry["dopredna_rychle"]
+                    stav = st_cekam_na_start
+                elif prikaz == K.ROVNE:
+                    stav = st_proved
+                else:
+                    stav = st_otoc  # VZAD umi jen otoc_se
+                Obrazovka.pis(stav)
+
+        elif stav == st_cekam_na_start:
+            if button_b.was_pressed():
+                if ucit_se and trasa.pc == 0:
+                    uceni.zacni_kolo(ticks_us())
+                stav = st_proved
+                Obrazovka.pis(stav)
+
+        elif stav == st_proved:
+            # dalsi instrukce trasy: nastaveni rychlosti hned, prikaz pro krizovatku az na ni
+            kod, argument = trasa.dalsi()
+            if kod < len(PRIKAZY):
+                prikaz = PRIKAZY[kod]
+                stav = st_jed_po_care
+            elif kod == OP_RYCHLOST:
+                dopredna = argument / 100
+                if planovat_rychlost:
+                    plan.dopredna_max = dopredna
+            elif kod == OP_JED:
+                vzdalenost = argument / 1000
+                stav = st_ujed
+            elif kod == OP_TLACITKO:
+                robot.jed(0, 0)
+                stav = st_cekam_na_start
+            else:
+                prikaz = None  # konec trasy, zastavi se na dalsi krizovatce (pri pruzkumu ji prozkouma)
+                stav = st_jed_po_care
+            if stav == st_jed_po_care and ucit_se:
+                uceni.dalsi_usecka(ticks_us())
+                dopredna = uceni.dopredna_usecky()
+                if planovat_rychlost:
+                    plan.dopredna_max = dopredna
+            if stav == st_jed_po_care and planovat_rychlost:
+                # zpomali se az na krizovatce, kde robot zatoci nebo zastavi, pres rovne (obloukem) se jede rychle
+                usecek = 1
+                if oblouky and prikaz == K.ROVNE:
+                    usecek += 1 + trasa.rovnych_dal()
+                vzdalenost = plan.delka_usecek(usecek, parametry["vzdalenost_startu"] if prvni_usecka else None)
+                plan.naplanuj(robot.ujeta_vzdalenost(), vzdalenost, robot.pozadovana_dopredna)
+                prvni_usecka = False
+            if stav != st_proved:
+                Obrazovka.pis(stav)
+
+        elif stav == st_ujed:
+            if robot.jed_vzdalenost(dopredna, vzdalenost):
+                stav = st_proved
+                Obrazovka.pis(stav)
+
+        elif stav == st_oblouk:
+            if robot.jed_obloukem(parametry["dopredna_oblouku"], prikaz):
+                stav = st_proved
+                Obrazovka.pis(stav)
+
+        elif stav == st_otoc:
+            # osa kol je nad krizovatkou, otoci se o uhel a prostredni senzor potvrdi novou caru
+            uhly = {K.VLEVO: K.PI / 2, K.VPRAVO: -K.PI / 2, K.VZAD: K.PI}
+            uhlova_otoceni = uceni.uhlova_usecky() if ucit_se else parametry["uhlova_otoceni"]
+            if robot.otoc_se(uhlova_otoceni, uhly[prikaz], True, K.PROS_S_CARY):
+                if ucit_se:
+                    # otoceni skoncilo az za tolerance_otoceni bez cary pod prostrednim senzorem
+                    uceni.otoceni(not robot.senzory.precti_senzory()[K.PROS_S_CARY])
+                stav = st_proved
+                Obrazovka.pis(stav)
+
         elif stav == st_narovnej:
             senzoricka_data = robot.senzory.precti_senzory()
             if smer_narovnani == "":
@@ -103,14 +368,14 @@ if __name__ == "__main__":
                     Obrazovka.pis(stav)
 
             if smer_narovnani == K.LEVY:
-                zatocil = robot.zatoc(0,2, K.PROS_S_CARY)
+                zatocil = robot.zatoc(0, uhlova_zatoceni, K.PROS_S_CARY)
             elif smer_narovnani == K.PRAVY:
-                zatocil = robot.zatoc(0,-2, K.PROS_S_CARY)
+                zatocil = robot.zatoc(0, -uhlova_zatoceni, K.PROS_S_CARY)
 
             if zatocil:
                 if zatoceno:
                     zatoceno = False
-                    stav = st_jed_po_care
+                    stav = st_proved
                 else:
                     stav = st_zatoc
                 Obrazovka.pis(stav)
@@ -119,26 +384,33 @@ if __name__ == "__main__":
         elif stav == st_zatoc:
             zatocil = False
 
-            if prikazy[index_prikazu] == K.VPRAVO:
-                zatocil = robot.zatoc(0,-2, K.PR_S_CARY)
+            if prikaz == K.VPRAVO:
+                zatocil = robot.zatoc(0, -uhlova_zatoceni, K.PR_S_CARY)
             else:
-                zatocil = robot.zatoc(0,2, K.LV_S_CARY,)
+                zatocil = robot.zatoc(0, uhlova_zatoceni, K.LV_S_CARY)
 
             if zatocil:
-                index_prikazu += 1
-                if index_prikazu == len(prikazy):
-                    stav = st_stop
-                else:
-                    stav = st_narovnej
-                    zatoceno = True
-
+                stav = st_narovnej
+                zatoceno = True
                 Obrazovka.pis(stav)
 
         elif stav == st_stop:
             robot.jed(0, 0)
             break
 
-        robot.aktualizuj_se(False)
+        if robot.aktualizuj_se(False) == K.ZASEKNUTO and stav != st_stop:
+            # naraz do prekazky: zaseknute kolo uz stoji, zastavi se i druhe; zaseklo-li se i pri vyprosteni
+            # nebo uz po max_zaseknuti, robot zastavi uplne
+            zaseknuti += 1
+            robot.jed(0, 0)
+            if stav == st_vyprost or zaseknuti > parametry["max_zaseknuti"]:
+                stav = st_stop
+            else:
+                stav = st_vyprost
+            Obrazovka.pis(stav)
         sleep(5)
 
     robot.jed(0, 0)
+
+    if nahravat:
+        nahravac.ukonci()
@@ -0,0 +1,130 @@
+# Spousteni testu ze slozky testy na pocitaci
+#
+# Misto robota se pouzije nahrada modulu microbit a utime ze slozky simulace.
+# Testem je kazda funkce test_* bez parametru v souborech test_*.py, ktera vrati 1 (prosel)
+# nebo 0 (neprosel). Testy bezi paralelne ve vice procesech, kazdy test zacina
+# s cistym modelem robota (cas 0) a tlacitko A se "zmackne" po --stisk_a ms.
+#
+# Priklady:
+#   python spust_testy.py
+#   python spust_testy.py -k motor --procesu 1 -v
+
+import argparse
+import contextlib
+import glob
+import importlib
+import inspect
+import io
+import os
+import sys
+import time
+import traceback
+from multiprocessing import Pool
+
+SLOZKA_TESTU = os.path.dirname(os.path.abspath(__file__))
+SLOZKA_PROJEKTU = os.path.dirname(SLOZKA_TESTU)
+for cesta in (SLOZKA_TESTU, SLOZKA_PROJEKTU, os.path.join(SLOZKA_PROJEKTU, "simulace")):
+    if cesta not in sys.path:
+        sys.path.insert(0, cesta)
+
+import microbit  # noqa: E402  nahrada ze slozky simulace
+from utime import hodiny, CasVyprsel  # noqa: E402
+
+PROSEL = "OK"
+NEPROSEL = "NEPROSEL"
+CHYBA = "CHYBA"
+
+
+def najdi_testy(filtr=None):
+    """
+    Vrati seznam (modul, funkce) vsech testu, volitelne jen tech, jejichz jmeno obsahuje filtr
+    """
+    testy = []
+    for soubor in sorted(glob.glob(os.path.join(SLOZKA_TESTU, "test_*.py"))):
+        jmeno_modulu = os.path.basename(soubor)[:-3]
+        modul = importlib.import_module(jmeno_modulu)
+        for jmeno, funkce in inspect.getmembers(modul, inspect.isfunction):
+            if not jmeno.startswith("test_") or funkce.__module__ != jmeno_modulu:
+                continue
+            povinne = [p for p in inspect.signature(funkce).parameters.values() if p.default is p.empty]
+            if povinne:
+                continue
+            if filtr and filtr not in jmeno_modulu + "." + jmeno:
+                continue
+            testy.append((jmeno_modulu, jmeno))
+    return testy
+
+
+def spust_test(uloha):
+    """
+    Spousti se v pracovnim procesu, vrati slovnik s vysledkem a casy testu
+    """
+    jmeno_modulu, jmeno, stisk_a_ms, limit_ms = uloha
+    model = microbit.vynuluj()
+    model.stiskni("a", stisk_a_ms * 1000)
+    hodiny.limit_us = limit_ms * 1000
+
+    vystup = io.StringIO()
+    chyba = None
+    zacatek = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(vystup):
+            funkce = getattr(importlib.import_module(jmeno_modulu), jmeno)
+            navrat = funkce()
+        stav = PROSEL if navrat == 1 else NEPROSEL
+    except CasVyprsel:
+        stav = CHYBA
+        chyba = "test nedobehl do " + str(limit_ms) + " ms virtualniho casu"
+    except Exception:
+        stav = CHYBA
+        chyba = traceback.format_exc()
+    cas_ms = (time.perf_counter() - zacatek) * 1000
+
+    return {
+        "test": jmeno_modulu + "." + jmeno,
+        "stav": stav,
+        "cas_ms": cas_ms,
+        "virtualni_cas_ms": hodiny.cas_us / 1000,
+        "i2c_cteni": microbit.i2c.pocet_cteni,
+        "i2c_zapisu": microbit.i2c.pocet_zapisu,
+        "chyba": chyba,
+        "vystup": vystup.getvalue(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spusti testy robota na pocitaci")
+    parser.add_argument("-k", dest="filtr", default=None, help="jen testy, jejichz jmeno obsahuje tento text")
+    parser.add_argument("--procesu", type=int, default=os.cpu_count(), help="pocet procesu")
+    parser.add_argument("--stisk_a", type=int, default=2000, help="kdy se zmackne tlacitko A (ms virtualniho casu)")
+    parser.add_argument("--limit", type=int, default=60000, help="maximalni virtualni cas testu v ms")
+    parser.add_argument("-v", dest="podrobne", action="store_true", help="vypise i vystup testu")
+    args = parser.parse_args(argv)
+
+    testy = najdi_testy(args.filtr)
+    ulohy = [(modul, jmeno, args.stisk_a, args.limit) for modul, jmeno in testy]
+
+    zacatek = time.perf_counter()
+    if args.procesu > 1 and len(ulohy) > 1:
+        with Pool(args.procesu) as pool:
+            vysledky = pool.map(spust_test, ulohy)
+    else:
+        vysledky = [spust_test(u) for u in ulohy]
+    celkem_ms = (time.perf_counter() - zacatek) * 1000
+
+    for v in vysledky:
+        print("%-9s %9.1f ms %9.0f ms virt. %6d/%-6d i2c  %s" % (
+            v["stav"], v["cas_ms"], v["virtualni_cas_ms"], v["i2c_cteni"], v["i2c_zapisu"], v["test"]))
+        if v["chyba"]:
+            print(v["chyba"])
+        if args.podrobne and v["vystup"]:
+            print(v["vystup"])
+
+    neproslo = [v for v in vysledky if v["stav"] != PROSEL]
+    print()
+    print(len(vysledky) - len(neproslo), "proslo,", len(neproslo), "neproslo, celkem %.0f ms" % celkem_ms)
+    return 1 if neproslo else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,43 @@
+import json
+import os
+import tempfile
+
+from benchmark import porovnej, main
+
+ZAKLAD = {"Robot.jed": {"cas_us": 10.0, "rozptyl_us": 0.1, "relativni": 2.0, "rozptyl_relativni": 0.02,
+                        "alokace": 12.0, "i2c": 4}}
+
+def nove(**zmeny):
+    hodnoty = dict(ZAKLAD["Robot.jed"])
+    hodnoty.update(zmeny)
+    return {"Robot.jed": hodnoty}
+
+def test_porovnani_benchmarku():
+    # pomalejsi pocitac (delsi cas i reference) neni zhorseni
+    if porovnej(ZAKLAD, nove(cas_us=15.0), 10, 0.5)[1]:
+        return 0
+    # zpomaleni o 3 % vuci referenci je pod prahem, o 30 % (3 us) uz ne
+    if porovnej(ZAKLAD, nove(relativni=2.06), 10, 0.5)[1]:
+        return 0
+    if porovnej(ZAKLAD, nove(relativni=2.6), 10, 0.5)[1] != ["Robot.jed"]:
+        return 0
+    # ... ale ne, kdyz je to min nez absolutni prah
+    if porovnej(ZAKLAD, nove(relativni=2.6), 10, 5.0)[1]:
+        return 0
+    # i2c transakce a alokace navic jsou zhorseni vzdy
+    return int(porovnej(ZAKLAD, nove(i2c=5), 10, 0.5)[1] == ["Robot.jed"] and
+               porovnej(ZAKLAD, nove(alokace=13.0), 10, 0.5)[1] == ["Robot.jed"])
+
+def test_benchmark_vraci_chybu():
+    with tempfile.TemporaryDirectory() as slozka:
+        soubor = os.path.join(slozka, "zaklad.json")
+        argumenty = ["-k", "Robot.jed", "--volani", "20", "--opakovani", "3"]
+        if main(argumenty + ["--uloz", soubor]) != 0:
+            return 0
+        with open(soubor) as f:
+            zaklad = json.load(f)
+        # v zakladu ubereme i2c transakci, porovnani musi skoncit chybovym kodem
+        zaklad["vysledky"]["Robot.jed"]["i2c"] -= 1
+        with open(soubor, "w") as f:
+            json.dump(zaklad, f)
+        return int(main(argumenty + ["--porovnej", soubor]) == 1)
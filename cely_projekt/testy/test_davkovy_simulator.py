@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+
+import microbit
+from microbit import sleep
+from utime import ticks_us
+from cely_projekt import K, Robot
+from davkovy_simulator import Geometrie, na_care, simuluj
+
+UHLY = {K.VLEVO: K.PI / 2, K.VPRAVO: -K.PI / 2, K.VZAD: K.PI}
+SMERY = {K.ROVNE: 0, K.VLEVO: 1, K.VPRAVO: -1, K.VZAD: 2}
+
+def jizda_robota(prikazy, limit_s=30):
+    """
+    Stejna jizda jako v davkovem simulatoru (otaceni_uhlem = 1), ale jednim Robotem z cely_projekt.py
+    na ModelRobota: senzory cary se pocitaji z polohy robota na mrizce, poloha z otaceni kol modelu.
+    Vrati (cas trasy v s nebo None, kolik ctvrtotacek se robot otocil)
+    """
+    g = Geometrie()
+    zdroj = microbit.zdroj
+    zdroj.levy.casova_konstanta = zdroj.pravy.casova_konstanta = g.casova_konstanta_motoru
+    robot = Robot(g.rozchod_kol, g.prumer_kola, False)
+    robot.inicializuj()
+    # kalibrace jako z robot.kalibruj, vcetne mrtveho pasma motoru modelu
+    for motor, a, b, rozjezd, dojezd in ((robot.levy_motor, 24.3732783404646, 8.21172006498485, 79, 41),
+                                         (robot.pravy_motor, 27.4515630414309, 61.3869817945568, 113, 113)):
+        motor.a, motor.b, motor.zkalibrovano = a, b, True
+        motor.min_pwm_rozjezd, motor.min_pwm_dojezd = rozjezd, dojezd
+
+    x, y, theta = -g.krok_mrizky / 2, 0.0, 0.0
+    r = g.prumer_kola / 2
+    leve, prave = zdroj.levy.uhel, zdroj.pravy.uhel
+    bocni = (g.rozestup_senzoru, 0.0, -g.rozestup_senzoru)
+    zacatek = ticks_us()
+    stav = "JED"
+    i = 0
+    while ticks_us() - zacatek < limit_s * 1000000:
+        zdroj.aktualizuj(ticks_us())
+        dl, dp = (zdroj.levy.uhel - leve) * r, (zdroj.pravy.uhel - prave) * r
+        leve, prave = zdroj.levy.uhel, zdroj.pravy.uhel
+        x += (dl + dp) / 2 * math.cos(theta)
+        y += (dl + dp) / 2 * math.sin(theta)
+        theta += (dp - dl) / g.rozchod_kol
+        sx = [x + g.senzory_vpredu * math.cos(theta) - b * math.sin(theta) for b in bocni]
+        sy = [y + g.senzory_vpredu * math.sin(theta) + b * math.cos(theta) for b in bocni]
+        zdroj.cara = tuple(bool(v) for v in na_care(np.array(sx), np.array(sy), g))
+
+        if stav == "JED":
+            if robot.vycti_senzory_cary() == K.KRIZOVATKA:
+                stav = "POPOJED"
+            else:
+                robot.jed_po_care(0.1, 0.5)
+        elif stav == "POPOJED":
+            if robot.jed_vzdalenost(0.2, 0.045, robot.posledni_krizovatka()[2]):
+                stav = "JED" if prikazy[i] == K.ROVNE else "OTOC"
+                i += prikazy[i] == K.ROVNE
+        elif robot.otoc_se(4.0, UHLY[prikazy[i]], True, K.PROS_S_CARY):
+            stav = "JED"
+            i += 1
+        if i == len(prikazy):
+            return (ticks_us() - zacatek) / 1000000, round(theta / (K.PI / 2))
+        robot.aktualizuj_se(False)
+        sleep(5)
+    return None, round(theta / (K.PI / 2))
+
+def stejne_jako_robot(prikazy):
+    cas, ctvrtotacek = jizda_robota(prikazy)
+    vysledek = simuluj({"otaceni_uhlem": 1}, prikazy)
+    print(prikazy, "robot", cas, "simulator", vysledek["cas_kola"][0])
+    if cas is None or not vysledek["dokonceno"][0] or vysledek["chyby_krizovatek"][0] != 0:
+        return 0
+    # robot se otocil, kam mel, a simulator s jeho modelem motoru a kroku 10 ms trval skoro stejne
+    if ctvrtotacek != sum(SMERY[p] for p in prikazy) or abs(vysledek["cas_kola"][0] - cas) > 0.1 * cas:
+        return 0
+    # i se zatacenim podle senzoru (VZAD se otaci o uhel vzdy) a obloukem projede robot trasu bez chyby
+    for parametry in ({}, {"oblouky": 1}):
+        vysledek = simuluj(parametry, prikazy)
+        if not vysledek["dokonceno"][0] or vysledek["chyby_krizovatek"][0] != 0:
+            return 0
+    return 1
+
+def test_simulator_rovne():
+    return stejne_jako_robot([K.ROVNE, K.ROVNE])
+
+def test_simulator_zataceni():
+    for prikaz in (K.VLEVO, K.VPRAVO, K.VZAD):
+        microbit.vynuluj()
+        if not stejne_jako_robot([prikaz, K.ROVNE]):
+            return 0
+    return 1
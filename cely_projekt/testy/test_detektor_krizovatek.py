@@ -0,0 +1,44 @@
+from cely_projekt import K, DetektorKrizovatek
+
+def data_cary(levy, prostredni, pravy):
+    return {K.LV_S_CARY: levy, K.PROS_S_CARY: prostredni, K.PR_S_CARY: pravy}
+
+def projed(detektor, vzorky, ujeto=0.0, krok=0.003):
+    # vrati seznam situaci a ujetou vzdalenost, vzorky jsou (levy, prostredni, pravy)
+    situace = []
+    for vzorek in vzorky:
+        ujeto += krok
+        situace.append(detektor.aktualizuj(data_cary(*vzorek), ujeto, int(ujeto * 1000000)))
+    return situace, ujeto
+
+CARA = (False, True, False)
+VSE = (True, True, True)
+
+def test_jeden_zablesk_neni_krizovatka():
+    detektor = DetektorKrizovatek(2, 0.005, 0.1)
+    situace, ujeto = projed(detektor, [CARA, (True, True, False), CARA, CARA])
+    return int(K.KRIZOVATKA not in situace and detektor.udalost is None)
+
+def test_krizovatka_x_jednou():
+    detektor = DetektorKrizovatek(2, 0.005, 0.1)
+    situace, ujeto = projed(detektor, [CARA, VSE, VSE, VSE, VSE, CARA, CARA])
+    if situace.count(K.KRIZOVATKA) != 1:
+        return 0
+    return int(detektor.udalost[0] == K.KRIZOVATKA_X)
+
+def test_krizovatka_t_a_odbocka():
+    detektor = DetektorKrizovatek(2, 0.005, 0.1)
+    situace, ujeto = projed(detektor, [CARA, VSE, VSE, VSE, (False, False, False)])
+    if situace.count(K.KRIZOVATKA) != 1 or detektor.udalost[0] != K.KRIZOVATKA_T:
+        return 0
+
+    situace, ujeto = projed(detektor, [CARA] * 50 + [(False, True, True)] * 4 + [CARA], ujeto)
+    if situace.count(K.KRIZOVATKA) != 1:
+        return 0
+    return int(detektor.udalost[0] == K.ODBOCKA_VPRAVO)
+
+def test_siroka_krizovatka_jednou():
+    # krizovatka se dvema carami tesne za sebou (nebo rozmazana cara) se hlasi jen jednou
+    detektor = DetektorKrizovatek(2, 0.005, 0.1)
+    situace, ujeto = projed(detektor, [CARA] + [VSE] * 4 + [CARA] * 3 + [VSE] * 4 + [CARA])
+    return int(situace.count(K.KRIZOVATKA) == 1)
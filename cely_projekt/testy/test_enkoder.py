@@ -1,7 +1,6 @@
 from microbit import button_a, sleep
 
-from enkoder import Enkoder
-from konstanty import Konstanty
+from cely_projekt import Enkoder, K
 
 def zakladni_test_spusteni(jmeno, nova_verze):
     hodnota_testu = -1
@@ -17,8 +16,48 @@ def zakladni_test_spusteni(jmeno, nova_verze):
 
     return 1
 
+def test_bez_inicializace():
+    enkoder = Enkoder(K.LV_ENKODER, 1, True)
+    if enkoder.aktualizuj_se() == -1:
+        return 1
+    else:
+        return 0
+
+def test_spusteni_levy():
+    return zakladni_test_spusteni(K.LV_ENKODER, False)
+
+def test_spusteni_pravy():
+    return zakladni_test_spusteni(K.PR_ENKODER, False)
+
+def test_rychlost_zastaveneho_kola():
+    from microbit import zdroj
+    from cely_projekt import Motor
+    motor = Motor(K.LEVY, 0.067, False)
+    motor.inicializuj()
+    motor.a, motor.b, motor.zkalibrovano = 24.3732783404646, 8.21172006498485, True
+    enkoder = motor.enkoder
+    enkoder.perioda_rychlosti = 200000
+    motor.smer = K.DOPREDU
+    motor.jed_PWM(200)
+    for i in range(200):
+        motor.aktualizuj_se(False)
+        sleep(5)
+    enkoder.vypocti_rychlost()  # nove okno
+    for i in range(20):
+        motor.aktualizuj_se(False)
+        sleep(5)
+    plna = zdroj.levy.uhlova_rychlost
+    # v pulce okna se kolo zasekne, rychlost za okno je zhruba polovicni, ne ta pred zaseknutim
+    zdroj.levy.zablokovano = True
+    for i in range(21):
+        motor.aktualizuj_se(False)
+        sleep(5)
+    rychlost = enkoder.vypocti_rychlost()
+    motor.jed_PWM(0)
+    return int(0.3 * plna < rychlost < 0.7 * plna)
+
 if __name__ == "__main__":
 
-    print(zakladni_test_spusteni(Konstanty.LV_ENKODER, False), "zakladni_test_spusteni")
-    print(zakladni_test_spusteni(Konstanty.PR_ENKODER, False), "zakladni_test_spusteni")
+    print(zakladni_test_spusteni(K.LV_ENKODER, False), "zakladni_test_spusteni")
+    print(zakladni_test_spusteni(K.PR_ENKODER, False), "zakladni_test_spusteni")
 
@@ -1,5 +1,5 @@
 from microbit import i2c, button_a, sleep
-from cely_projekt import Motor, KalibracniFaktory, Konstanty
+from cely_projekt import Motor, K
 
 def test_konstruktor_string_levy():
     hodnota_testu = -1
@@ -24,7 +24,7 @@ def test_konstruktor_string_pravy():
 def test_konstruktor_konstakty_levy():
     hodnota_testu = -1
     try:
-        motor = Motor(Konstanty.LEVY, 0.067)
+        motor = Motor(K.LEVY, 0.067)
         hodnota_testu = 1
     except AttributeError as e:
         print(e)
@@ -34,7 +34,7 @@ def test_konstruktor_konstakty_levy():
 def test_konstruktor_konstanty_pravy():
     hodnota_testu = -1
     try:
-        motor = Motor(Konstanty.PRAVY, 0.067)
+        motor = Motor(K.PRAVY, 0.067)
         hodnota_testu = 1
     except AttributeError as e:
         print(e)
@@ -73,21 +73,30 @@ def test_konstruktor_velke_pismeno():
 def test_inicializace():
     motor = Motor("levy", 0.067)
     motor.inicializuj()
-    return int(motor.__inicializovano)
+    return int(motor.inicializovano)
 
-def test_kalibrace_po_inicializaci():
+def test_kalibrace_po_rozjezdu():
     motor = Motor("levy", 0.067)
     motor.inicializuj()
-    hodnota = motor.kalibrace()
-    if hodnota == 0:
+    motor.pwm_rozjezd = 79
+    motor.rych_rozjezd = 2.165826
+    hodnota = motor.kalibruj(6.27, 180)
+    if hodnota == 0 and motor.zkalibrovano:
         return 1
     else:
         return 0
 
-def test_kalibrace_bez_inicializaci():
+def test_kalibrace_bez_rozjezdu():
     motor = Motor("levy", 0.067)
-    hodnota = motor.kalibrace()
-    if hodnota == -1:
+    hodnota = motor.kalibruj(6.27, 180)
+    if hodnota == -1 and not motor.zkalibrovano:
+        return 1
+    else:
+        return 0
+
+def test_jizda_bez_inicializace():
+    motor = Motor("levy", 0.067)
+    if motor.jed_doprednou_rychlosti(0.1) == -1:
         return 1
     else:
         return 0
@@ -98,29 +107,33 @@ def porovnej_floaty(a,b, rel_tol=1e-04, abs_tol=0.0):
 
 def test_uhlova_01():
     motor = Motor("levy", 0.067)
-    skutecna = motor.__dopredna_na_uhlovou(0.1052)
+    skutecna = motor.dopredna_na_uhlovou(0.067/2*K.PI)
     print("skutecna", skutecna)
-    ocekavana = Konstanty.PI
+    ocekavana = K.PI
     return int(porovnej_floaty(ocekavana, skutecna))
 
 def zakladni_test_spusteni(nova_verze):
-    min_rychlost = 2.165826 # ziskej z excelu
-    min_pwm_rozjezd = 79 # kalibrace vytiskne na konci pri "zrychluj"
-    min_pwm_dojezd = 41 # kalibrace vytiskne na konci pri "zpomaluj"
     a = 24.3732783404646 # ziskej z excelu
     b = 8.21172006498485 # ziskej z excelu
 
-    levy_faktor = KalibracniFaktory(min_rychlost, min_pwm_rozjezd, min_pwm_dojezd, a, b)
-
-    motor = Motor(Konstanty.LEVY, 0.067, levy_faktor, nova_verze)
+    motor = Motor(K.LEVY, 0.067, nova_verze)
     motor.inicializuj()
-    motor.jed_doprednou_rychlosti(0.067*Konstanty.PI)
+    motor.a = a
+    motor.b = b
+    motor.zkalibrovano = True
+    hodnota_testu = 1
+    motor.jed_doprednou_rychlosti(0.067*K.PI)
     while not button_a.was_pressed():
-        if motor.aktualizuj_se() < 0:
+        if motor.aktualizuj_se(True) < 0:
+            hodnota_testu = 0
             break
         sleep(5)
 
     motor.jed_doprednou_rychlosti(0)
+    return hodnota_testu
+
+def test_spusteni():
+    return zakladni_test_spusteni(True)
 
 if __name__ == "__main__":
     i2c.init(4000000)
@@ -0,0 +1,64 @@
+import os
+import runpy
+import tempfile
+
+import microbit
+import cely_projekt
+import utime
+from prehravac import nacti_zaznam, prehraj
+import nahravac
+
+# jizda s kompenzaci napeti, baterie behem ni poklesne
+SKRIPT = """
+import microbit
+from microbit import sleep
+from cely_projekt import Robot
+from nahravac import Nahravac
+
+robot = Robot(0.15, 0.067, False)
+nahravac = Nahravac(%r)
+robot.nahravej(nahravac)
+nahravac.zacni()
+robot.inicializuj()
+for motor, a, b in ((robot.levy_motor, 24.3732783404646, 8.21172006498485),
+                    (robot.pravy_motor, 27.4515630414309, 61.3869817945568)):
+    motor.a, motor.b, motor.zkalibrovano = a, b, True
+robot.napajeni.nominalni = 0.00898 * 850
+robot.jed(0.1, 0)
+for i in range(400):
+    if i == 150:
+        microbit.zdroj.napeti_adc = 700  # pri prehravani se napeti bere ze zaznamu
+    robot.aktualizuj_se(False)
+    sleep(5)
+nahravac.ukonci()
+"""
+
+def test_prehrani_napeti_baterie():
+    with tempfile.TemporaryDirectory() as slozka:
+        jmeno_zaznamu = os.path.join(slozka, "zaznam.bin")
+        skript = os.path.join(slozka, "jizda.py")
+        with open(skript, "w") as soubor:
+            soubor.write(SKRIPT % jmeno_zaznamu)
+
+        zdroj = microbit.vynuluj()
+        zapisy = []
+        zapis_pwm = zdroj.zapis_pwm
+
+        def zapis(kanal, pwm, cas_us):
+            zapisy.append((kanal, pwm))
+            zapis_pwm(kanal, pwm, cas_us)
+        zdroj.zapis_pwm = zapis
+        try:
+            runpy.run_path(skript, run_name="__main__")
+            with open(jmeno_zaznamu, "rb") as soubor:
+                zacatek, zaznamy = nacti_zaznam(soubor.read())
+            prehrany = prehraj(zacatek, zaznamy, skript)
+        finally:
+            # Robot.nahravej podstrcil cely_projekt svuj ticks_us
+            cely_projekt.ticks_us = utime.ticks_us
+
+    napeti = [hodnota for cas, typ, hodnota in zaznamy if typ == nahravac.ANALOG2]
+    if 850 not in napeti or 700 not in napeti:
+        return 0
+    # pri prehrani jdou do motoru stejna PWM jako pri jizde, i po poklesu napeti
+    return int([(kanal, pwm) for cas, kanal, pwm in prehrany.pwm] == zapisy and prehrany.zbyva() == 0)
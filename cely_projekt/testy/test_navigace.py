@@ -0,0 +1,251 @@
+import os
+import tempfile
+
+from cely_projekt import K, Smer, Robot
+from navigace import Mapa, Pruzkumnik, PlanRychlosti, UceniRychlosti
+from trasa import Trasa, preloz, OP_JED, OP_RYCHLOST, OP_TLACITKO, OP_KONEC
+
+def test_trasa_v_otevrene_mape():
+    mapa = Mapa.otevrena(5, 5)
+    if mapa.naplanuj(0, 0, 0, 3, 0) != [K.ROVNE] * 3:
+        return 0
+    if mapa.naplanuj(0, 0, 0, 0, 2) != [K.VLEVO, K.ROVNE]:
+        return 0
+    if mapa.naplanuj(1, 0, 0, 0, 0) != [K.VZAD]:
+        return 0
+    # na uhlopricku staci jedno zatoceni
+    trasa = mapa.naplanuj(0, 0, 0, 2, 2)
+    return int(len(trasa) == 4 and trasa.count(K.ROVNE) == 3 and trasa.count(K.VLEVO) == 1)
+
+def test_trasa_bludistem():
+    #  (0,1)-(1,1)-(2,1)
+    #    |           |
+    #  (0,0)  (1,0)-(2,0)   (1,0) a (0,0) spojene nejsou
+    mapa = Mapa(3, 2)
+    for x, y, kvadrant in ((0, 0, 1), (0, 1, 0), (1, 1, 0), (2, 1, 3), (2, 0, 2)):
+        mapa.nastav_vystup(x, y, kvadrant, True)
+    mapa.nastav_vystup(0, 0, 0, False)
+    if not (mapa.ma_vystup(1, 0, 0) and mapa.zna_vystup(1, 0, 2) and not mapa.ma_vystup(1, 0, 2)):
+        return 0
+
+    trasa = mapa.naplanuj(0, 0, 0, 1, 0)
+    if trasa != [K.VLEVO, K.VPRAVO, K.ROVNE, K.VPRAVO, K.VPRAVO]:
+        return 0
+    # mimo mapu a do odriznute casti cesta neni
+    mapa.nastav_vystup(2, 0, 2, False)
+    return int(mapa.naplanuj(0, 0, 0, 1, 0) is None and mapa.naplanuj(0, 0, 0, 5, 0) is None)
+
+def test_pamatuje_si_trasy():
+    mapa = Mapa.otevrena(4, 4)
+    trasa = mapa.naplanuj(0, 0, 0, 3, 3)
+    trasa.append(K.VZAD)  # zmena vraceneho seznamu nesmi zmenit zapamatovanou trasu
+    if mapa.naplanuj(0, 0, 0, 3, 3) == trasa or len(mapa.trasy) != 1:
+        return 0
+    # po zmene mapy se trasy planuji znovu
+    mapa.nastav_vystup(1, 0, 0, False)
+    return int(len(mapa.trasy) == 0)
+
+# bludiste 4x3 pro pruzkum, usecky mezi krizovatkami; start je pred (0, 0) ve smeru +x
+#  (0,2)-(1,2)-(2,2)-(3,2)
+#    |           |
+#  (0,1)-(1,1) (2,1)-(3,1)
+#    |     |           |
+#  (0,0)-(1,0)-(2,0) (3,0)
+BLUDISTE = {((0, 0), (1, 0)), ((1, 0), (2, 0)), ((0, 0), (0, 1)), ((1, 0), (1, 1)), ((0, 1), (1, 1)),
+            ((0, 1), (0, 2)), ((0, 2), (1, 2)), ((1, 2), (2, 2)), ((2, 2), (3, 2)), ((2, 2), (2, 1)),
+            ((2, 1), (3, 1)), ((3, 1), (3, 0))}
+
+def vede(x, y, kvadrant):
+    sousedni = Smer.posun(x, y, kvadrant)
+    return ((x, y), sousedni) in BLUDISTE or (sousedni, (x, y)) in BLUDISTE
+
+def test_pruzkum_a_nejkratsi_trasa():
+    mapa = Mapa(4, 3)
+    pruzkumnik = Pruzkumnik(mapa)
+    navstivene = set()
+    for i in range(100):
+        x, y, k = pruzkumnik.x, pruzkumnik.y, pruzkumnik.kvadrant
+        navstivene.add((x, y))
+        prikaz = pruzkumnik.na_krizovatce(vede(x, y, (k + 1) % 4), vede(x, y, k), vede(x, y, (k + 3) % 4))
+        if prikaz is None:
+            break
+        # robot smi jet jen tam, kde cara opravdu vede
+        if not vede(x, y, Smer.po_prikazu(k, prikaz)):
+            return 0
+    else:
+        return 0
+
+    if len(navstivene) != 12:
+        return 0
+    for y in range(3):
+        for x in range(4):
+            for k in range(4):
+                if mapa.ma_vystup(x, y, k) != vede(x, y, k):
+                    return 0
+    # rychla jizda ze startu do (3, 0): jen pres horni radu, 7 usecek
+    trasa = mapa.naplanuj(0, 0, 0, 3, 0)
+    return int(trasa == [K.VLEVO, K.ROVNE, K.VPRAVO, K.ROVNE, K.VPRAVO, K.VLEVO, K.VPRAVO])
+
+def test_ulozeni_mapy():
+    mapa = Mapa(4, 3)
+    for x, y, kvadrant in ((0, 0, 1), (0, 1, 0), (1, 1, 3)):
+        mapa.nastav_vystup(x, y, kvadrant, True)
+    trasa = mapa.naplanuj(0, 0, 0, 1, 0)
+    with tempfile.TemporaryDirectory() as slozka:
+        jmeno = os.path.join(slozka, "mapa.bin")
+        mapa.uloz(jmeno, (1, 0), trasa)
+
+        # robot si mapu nacte pri inicializaci
+        robot = Robot(0.15, 0.067, False)
+        robot.soubor_mapy = jmeno
+        robot.inicializuj()
+        if robot.ulozena_mapa is None:
+            return 0
+        nactena, cil, nactena_trasa = robot.ulozena_mapa
+        if nactena.bunky != mapa.bunky or cil != (1, 0) or nactena_trasa != trasa:
+            return 0
+
+        # poskozeny soubor se nenacte
+        with open(jmeno, "rb") as soubor:
+            data = bytearray(soubor.read())
+        data[9] ^= 4
+        if Mapa.z_bytu(bytes(data)) is not None:
+            return 0
+    return int(Mapa.nacti(jmeno) is None)
+
+def test_prelozena_trasa():
+    kod = preloz("rychlost=0.3 2*rovne vlevo jed=0.15 tlacitko vpravo, vzad")
+    if kod != bytearray([OP_RYCHLOST, 30, 0, 0, 1, OP_JED, 150, 0, OP_TLACITKO, 2, 3]):
+        return 0
+    trasa = Trasa(kod)
+    instrukce = []
+    for i in range(20):
+        instrukce.append(trasa.dalsi())
+    if instrukce[:9] != [(OP_RYCHLOST, 30), (0, 0), (0, 0), (1, 0), (OP_JED, 150), (OP_TLACITKO, 0), (2, 0), (3, 0),
+                         (OP_KONEC, 0)] or instrukce[-1] != (OP_KONEC, 0):
+        return 0
+    if trasa.prikazy() != [K.ROVNE, K.ROVNE, K.VLEVO, K.VPRAVO, K.VZAD]:
+        return 0
+
+    # trasa z planovace je seznam prikazu, kody prikazu jsou stejne jako v souboru s mapou
+    prikazy = Mapa.otevrena(4, 4).naplanuj(0, 0, 0, 3, 3)
+    if Trasa(preloz(prikazy)).prikazy() != prikazy:
+        return 0
+    # nesmysly se neprelozi, useknuty bytecode trasu ukonci
+    if preloz("doleva") is not None or preloz("jed=100") is not None or preloz("x*rovne") is not None:
+        return 0
+    # opakovani nula nebo zaporne krat je chyba v popisu, ne prazdna trasa
+    if preloz("-1*rovne") is not None or preloz("0*vlevo") is not None or preloz("rovne 0*vlevo") is not None:
+        return 0
+    # priklad z dokumentace preloz
+    if preloz("rychlost=0.3 3*rovne vlevo jed=0.15 tlacitko vpravo") is None:
+        return 0
+    # nulova rychlost by robota na trase navzdy zastavila
+    if preloz("rychlost=0") is not None or preloz("rychlost=0.004") is not None or preloz("rychlost") is not None:
+        return 0
+    trasa = Trasa(bytearray([1, OP_JED, 5]))
+    return int(trasa.dalsi() == (1, 0) and trasa.dalsi() == (OP_KONEC, 0) and trasa.dalsi() == (OP_KONEC, 0))
+
+def test_plan_rychlosti():
+    trasa = Trasa(preloz("rovne rovne vlevo rovne"))
+    if trasa.rovnych_dal() != 2:
+        return 0
+    trasa.dalsi()
+    trasa.dalsi()
+    if trasa.rovnych_dal() != 0:
+        return 0
+
+    # 3 usecky po 0.3 m, rychlost krizovatky se ma mit uz 0.08 m pred koncem
+    plan = PlanRychlosti(0.3, 0.5, 0.1, 0.5, 0.08)
+    plan.naplanuj(1.0, plan.delka_usecek(3), 0.0)
+    if abs(plan.delka - 0.82) > 1e-9 or plan.rychlost(1.0) != 0.1:
+        return 0
+    rychlosti = [plan.rychlost(1.0 + i * 0.01) for i in range(100)]
+    nejvyssi = rychlosti.index(max(rychlosti))
+    # rozjede se, na rovince jede nejvys dopredna_max a pred krizovatkou zase zpomali
+    for i in range(nejvyssi):
+        if rychlosti[i + 1] < rychlosti[i]:
+            return 0
+    for i in range(nejvyssi, 99):
+        if rychlosti[i + 1] > rychlosti[i]:
+            return 0
+    if max(rychlosti) != 0.5 or rychlosti[82] != 0.1 or rychlosti[99] != 0.1:
+        return 0
+    if abs(plan.rychlost(1.72) - (0.1 ** 2 + 2 * 0.5 * 0.1) ** 0.5) > 1e-9:
+        return 0
+
+    # robot uz jede, takze se rozjizdi z aktualni rychlosti, prvni usecka ze startu je kratsi
+    plan.naplanuj(0.0, plan.delka_usecek(1, 0.15), 0.2)
+    return int(plan.rychlost(0.0) == 0.2 and abs(plan.delka - 0.07) < 1e-9)
+
+def test_uceni_rychlosti():
+    # na usecce robot ztrati caru nad limitem rychlosti, na krizovatce se pretoci nad limitem uhlove rychlosti
+    limity_dopredne = (0.25, 0.4, 0.18, 0.5)
+    limity_uhlove = (5.0, 3.0, 6.0, None)  # na posledni krizovatce (v cili) se netoci
+    uceni = UceniRychlosti(4, 0.1, 4.0)
+    cas = 0
+    for kolo in range(30):
+        uceni.zacni_kolo(cas)
+        chyb = 0
+        for i in range(4):
+            uceni.dalsi_usecka(cas)
+            cas += int(300000 / uceni.dopredna_usecky())
+            if uceni.dopredna_usecky() > limity_dopredne[i]:
+                uceni.ztrata()
+                chyb += 1
+            if limity_uhlove[i] is not None:
+                chyba = uceni.uhlova_usecky() > limity_uhlove[i]
+                uceni.otoceni(chyba)
+                chyb += chyba
+        uceni.po_kole(cas)
+    # posledni kolo bez chyby a rychlosti tesne pod limity
+    if chyb != 0:
+        return 0
+    for i in range(4):
+        if not 0.9 * limity_dopredne[i] <= uceni.dopredna[i] <= limity_dopredne[i]:
+            return 0
+        if limity_uhlove[i] is not None and not 0.9 * limity_uhlove[i] <= uceni.uhlova[i] <= limity_uhlove[i]:
+            return 0
+
+    with tempfile.TemporaryDirectory() as slozka:
+        jmeno = os.path.join(slozka, "uceni.txt")
+        uceni.uloz(jmeno)
+        nactene = UceniRychlosti.nacti(jmeno)
+        with open(jmeno, "a") as soubor:
+            soubor.write("0.1 4.0 nesmysl\n")
+        poskozene = UceniRychlosti.nacti(jmeno)
+    return int(nactene is not None and nactene.dopredna == uceni.dopredna and nactene.uhlova == uceni.uhlova
+               and nactene.selhala_dopredna == uceni.selhala_dopredna and poskozene is None)
+
+def test_uceni_rychlosti_podle_casu():
+    # na druhe usecce robot nad 0.2 m/s nezrychli (kratka usecka), i kdyz caru neztrati
+    uceni = UceniRychlosti(2, 0.1, 4.0)
+    cas = 0
+    for kolo in range(30):
+        uceni.zacni_kolo(cas)
+        for i in range(2):
+            uceni.dalsi_usecka(cas)
+            cas += int(300000 / (uceni.dopredna_usecky() if i == 0 else min(uceni.dopredna_usecky(), 0.2)))
+        uceni.po_kole(cas)
+    # prvni usecka se zrychluje az na maximum, druha zustane na prvni rychlosti, ktera uz cas nezkrati
+    if not (uceni.dopredna[0] == uceni.max_dopredna and 0.2 <= uceni.dopredna[1] <= 0.22):
+        return 0
+
+    # po ulozeni a nacteni pokracuje uceni stejne, vcetne casu usecek
+    with tempfile.TemporaryDirectory() as slozka:
+        jmeno = os.path.join(slozka, "uceni.txt")
+        uceni.uloz(jmeno)
+        nactene = UceniRychlosti.nacti(jmeno)
+        # soubor starsi verze bez casu usecek
+        with open(jmeno, "w") as soubor:
+            soubor.write("0.2 4.0 0.2 0.22 0.0 0.0\n")
+        stare = UceniRychlosti.nacti(jmeno)
+    if nactene is None or nactene.cas_bezpecne_dopredne != uceni.cas_bezpecne_dopredne or 0 in uceni.cas_bezpecne_dopredne:
+        return 0
+    for u in (uceni, nactene):
+        u.zacni_kolo(cas)
+        u.dalsi_usecka(cas)
+        u.dalsi_usecka(cas + 300000)
+        u.po_kole(cas + 300000 + int(300000 / 0.2))
+    return int(nactene.dopredna == uceni.dopredna and nactene.bezpecna_dopredna == uceni.bezpecna_dopredna
+               and stare is not None and stare.dopredna == [0.2] and stare.cas_bezpecne_dopredne == [0])
@@ -0,0 +1,84 @@
+from math import sin, cos, pi
+
+from microbit import sleep
+
+from cely_projekt import K, Robot, Odometrie, Goniometrie, Smer
+
+def blizko(a, b, tolerance=1e-9):
+    return abs(a - b) <= tolerance
+
+def test_rovne_a_na_miste():
+    odometrie = Odometrie(0.15, 0.067)
+    for i in range(100):
+        odometrie.aktualizuj(1, 1)
+    if not blizko(odometrie.x, 100 * odometrie.delka_tiku) or odometrie.y != 0:
+        return 0
+
+    # otoceni na miste polohu nemeni, uhel je presne v tikach
+    for i in range(20):
+        odometrie.aktualizuj(-1, 1)
+    x, y, uhel = odometrie.poloha()
+    return int(blizko(x, 100 * odometrie.delka_tiku) and blizko(y, 0) and blizko(uhel, 40 * odometrie.uhel_tiku))
+
+def test_sikmo_a_zpet():
+    odometrie = Odometrie(0.15, 0.067)
+    odometrie.aktualizuj(-7, 7)  # velky rozdil, sin a cos se spocitaji znovu
+    dilky = Goniometrie.na_dilky(odometrie.uhel())
+    for i in range(30):
+        odometrie.aktualizuj(2, 2)
+    if not (blizko(odometrie.x, 60 * odometrie.delka_tiku * Goniometrie.cos(dilky))
+            and blizko(odometrie.y, 60 * odometrie.delka_tiku * Goniometrie.sin(dilky))):
+        return 0
+
+    for i in range(60):
+        odometrie.aktualizuj(-1, -1)
+    odometrie.aktualizuj(7, -7)
+    x, y, uhel = odometrie.poloha()
+    return int(blizko(x, 0) and blizko(y, 0) and uhel == 0)
+
+def test_tabulka_sinu():
+    # chyba je nejvys pul dilku
+    for i in range(-1000, 1000):
+        uhel = i * 0.01
+        dilky = Goniometrie.na_dilky(uhel)
+        if abs(Goniometrie.sin(dilky) - sin(uhel)) > pi / Goniometrie.KROKU + 1e-6:
+            return 0
+        if abs(Goniometrie.cos(dilky) - cos(uhel)) > pi / Goniometrie.KROKU + 1e-6:
+            return 0
+    return int(Goniometrie.sin(Goniometrie.na_dilky(pi / 2)) == 1 and Goniometrie.cos(Goniometrie.na_dilky(pi)) == -1)
+
+def test_smer_na_mrizce():
+    x, y, kvadrant = 0, 0, 0
+    # 100x stejna smycka, ktera konci na startu, celociselne, takze presne
+    for i in range(100):
+        for prikaz in (K.ROVNE, K.VLEVO, K.VLEVO, K.VLEVO, K.VPRAVO, K.VZAD):
+            kvadrant = Smer.po_prikazu(kvadrant, prikaz)
+            x, y = Smer.posun(x, y, kvadrant)
+    if (x, y, kvadrant) != (0, 0, 0):
+        return 0
+    return int(Smer.z_uhlu(-K.PI / 2 + 0.3) == 3 and Smer.z_uhlu(Smer.na_uhel(2)) == 2)
+
+def test_robot_jede_a_otoci_se():
+    from microbit import zdroj
+    robot = Robot(0.15, 0.067, False)
+    robot.inicializuj()
+    for motor, a, b in ((robot.levy_motor, 24.3732783404646, 8.21172006498485),
+                        (robot.pravy_motor, 27.4515630414309, 61.3869817945568)):
+        motor.a = a
+        motor.b = b
+        motor.zkalibrovano = True
+
+    while not robot.jed_vzdalenost(0.2, 0.2):
+        robot.aktualizuj_se(False)
+        sleep(5)
+    while not robot.otoc_se(4, K.PI / 2):
+        robot.aktualizuj_se(False)
+        sleep(5)
+    for i in range(50):
+        robot.aktualizuj_se(False)
+        sleep(5)
+
+    # model kol v simulaci nejede presne rovne, natoceni se porovna se skutecnym
+    skutecny_uhel = (zdroj.pravy.uhel - zdroj.levy.uhel) * 0.067 / 2 / 0.15
+    x, y, uhel = robot.poloha()
+    return int(abs(x - 0.2) < 0.02 and abs(y) < 0.03 and abs(uhel - skutecny_uhel) < 0.05)
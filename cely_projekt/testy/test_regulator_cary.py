@@ -0,0 +1,61 @@
+from cely_projekt import K, RegulatorCary, OdhadCary
+
+def data_cary(levy, prostredni, pravy):
+    return {K.LV_S_CARY: levy, K.PROS_S_CARY: prostredni, K.PR_S_CARY: pravy}
+
+def test_odhad_chyby():
+    odhad = OdhadCary()
+    if odhad.poloha_ze_senzoru(True, False, False) != 1:
+        return 0
+    # na krizovatce plati posledni poloha
+    if odhad.poloha_ze_senzoru(True, True, False) != 0:
+        return 0
+    if odhad.poloha_ze_senzoru(False, True, False) != 0:
+        return 0
+    if odhad.poloha_ze_senzoru(False, False, True) != -1:
+        return 0
+
+    # cara zmizela za pravym senzorem
+    odhad.aktualizuj(data_cary(False, False, True), 0, 0.1, 0)
+    if odhad.poloha_ze_senzoru(False, False, False) != -2:
+        return 0
+    return 1
+
+def test_interpolace_mezi_senzory():
+    # robot jede sikmo ke care: cara prejde z praveho na prostredni senzor po 1 cm a za dalsi 2 cm na levy
+    odhad = OdhadCary(True)
+    odhad.aktualizuj(data_cary(False, False, True), 0.00, 0.2, 0)
+    odhad.aktualizuj(data_cary(False, True, False), 0.01, 0.2, 50000)
+    odhad.aktualizuj(data_cary(True, False, False), 0.03, 0.2, 150000)
+    # hranice -0.5 v 1 cm a 0.5 ve 3 cm -> 50 rozestupu na metr
+    if abs(odhad.sklon - 50) > 1e-6:
+        return 0
+    chyba = odhad.aktualizuj(data_cary(True, False, False), 0.035, 0.2, 175000)
+    if abs(chyba - 0.75) > 1e-6:
+        return 0
+    # dal nez na hranici se stavem "nikdo nevidi caru" odhad nejde
+    chyba = odhad.aktualizuj(data_cary(True, False, False), 0.06, 0.2, 300000)
+    return int(chyba == 1.5 and odhad.derivace > 0)
+
+def test_bez_d_a_zpomaleni_jako_puvodni():
+    # kd = 0 a zpomaleni = 0 a poloha jen ze senzoru musi jezdit jako puvodni jed_po_care
+    regulator = RegulatorCary(0, 0)
+    odhad = OdhadCary(False)
+    cas = 0
+    for levy, prostredni, pravy, ocekavana in [(True, False, False, 0.5), (False, True, False, 0),
+                                               (False, False, True, -0.5), (False, True, False, 0)]:
+        cas += 75000
+        chyba = odhad.aktualizuj(data_cary(levy, prostredni, pravy), 0, 0.1, cas)
+        dopredna, uhlova = regulator.reguluj(chyba, 0.1, 0.5, cas, odhad.derivace)
+        if dopredna != 0.1 or uhlova != ocekavana:
+            return 0
+    return 1
+
+def test_zpomaleni_v_zatacce():
+    regulator = RegulatorCary(0, 0.5, 0.4)
+    cas = 0
+    for i in range(20):
+        cas += 75000
+        dopredna, uhlova = regulator.reguluj(1, 0.2, 0.5, cas)
+    # cara je dlouho pod levym senzorem, robot musi zpomalit, ale ne pod min_podil_rychlosti
+    return int(0.08 <= dopredna < 0.15)
@@ -1,35 +1,385 @@
 from microbit import button_a, sleep, i2c
 
-from cely_projekt import Konstanty, KalibracniFaktory, Robot
+from cely_projekt import K, Robot
+
+def nastav_kalibraci(motor, a, b):
+    motor.a = a # ziskej z excelu nebo z robot.kalibruj
+    motor.b = b
+    motor.zkalibrovano = True
+
+def pripraveny_robot(verze=False):
+    # inicializovany robot s kalibraci obou motoru
+    robot = Robot(0.15, 0.067, verze)
+    robot.inicializuj()
+    nastav_kalibraci(robot.levy_motor, 24.3732783404646, 8.21172006498485)
+    nastav_kalibraci(robot.pravy_motor, 27.4515630414309, 61.3869817945568)
+    return robot
 
 def zakladni_test_spusteni():
 
-    min_rychlost = 2.1658
-    min_pwm_rozjezd = 79 # kalibrace vytiskne na konci pri "zrychluj"
-    min_pwm_dojezd = 41 # kalibrace vytiskne na konci pri "zpomaluj"
-    a = 24.3732783404646 # ziskej z excelu
-    b = 8.21172006498485 # ziskej z excelu
+    robot = pripraveny_robot(True)
+    robot.jed(0.067*K.PI, 0)
+
+    while not button_a.was_pressed():
+        sleep(5)
+        robot.aktualizuj_se(True)
 
-    levy_faktor = KalibracniFaktory(min_rychlost, min_pwm_rozjezd, min_pwm_dojezd, a, b)
+    robot.jed(0,0)
+    return 1
+
+def test_spusteni():
+    return zakladni_test_spusteni()
+
+def test_jed_bez_inicializace():
+    robot = Robot(0.15, 0.067, True)
+    if robot.jed(0.1, 0) == -1:
+        return 1
+    else:
+        return 0
+
+def test_jed_vzdalenost():
+    from microbit import zdroj
+    robot = pripraveny_robot()
+    rychlosti = []
+    for i in range(2000):
+        if robot.jed_vzdalenost(0.3, 0.2):
+            break
+        rychlosti.append(robot.pozadovana_dopredna)
+        robot.aktualizuj_se(False)
+        sleep(5)
+    # rozjezd a dojezd pomaleji nez 0.3 m/s, uprostred plnou rychlosti
+    if not (rychlosti[0] < 0.3 and rychlosti[-1] < 0.3 and max(rychlosti) == 0.3):
+        return 0
+    ujeto = (zdroj.levy.uhel + zdroj.pravy.uhel) / 2 * 0.067 / 2
+    # enkoder ma rozliseni cca 5 mm, kolo jeste chvili dobiha
+    return int(abs(ujeto - 0.2) < 0.015)
 
-    min_rychlost = 2.171571
-    min_pwm_rozjezd = 113
-    min_pwm_dojezd = 113
-    a = 27.4515630414309
-    b = 61.3869817945568
+def test_otoc_se_o_uhel():
+    from microbit import zdroj
+    for uhel, na_miste in ((K.PI / 2, True), (-K.PI, True), (-K.PI / 2, False)):
+        zdroj.levy.uhel = zdroj.pravy.uhel = 0.0
+        robot = pripraveny_robot()
+        for i in range(2000):
+            if robot.otoc_se(4, uhel, na_miste):
+                break
+            robot.aktualizuj_se(False)
+            sleep(5)
+        # skutecne otoceni podle modelu kol
+        otoceno = (zdroj.pravy.uhel - zdroj.levy.uhel) * 0.067 / 2 / (2 * robot.d)
+        if abs(otoceno - uhel) > 0.1:
+            return 0
+    return 1
 
-    pravy_faktor = KalibracniFaktory(min_rychlost, min_pwm_rozjezd, min_pwm_dojezd, a, b)
+def test_oblouk_otoci_o_90_stupnu():
+    from microbit import zdroj
+    for smer, znamenko in ((K.VLEVO, 1), (K.VPRAVO, -1)):
+        zdroj.levy.uhel = zdroj.pravy.uhel = 0.0
+        robot = pripraveny_robot()
+        for i in range(2000):
+            if robot.jed_obloukem(0.15, smer):
+                break
+            robot.aktualizuj_se(False)
+            sleep(5)
+        robot.jed(0, 0)
+        # skutecne otoceni podle modelu kol (model zna i smer otaceni)
+        uhel = (zdroj.pravy.uhel - zdroj.levy.uhel) * 0.067 / 2 / (2 * robot.d)
+        if abs(znamenko * uhel - K.PI / 2) > 0.2:
+            return 0
+    return 1
+
+def ztrat_caru(strana):
+    # robot jede po care, kterou vidi senzor strana (0 levy, 1 prostredni, 2 pravy), a pak ji ztrati
+    from microbit import zdroj
+    robot = pripraveny_robot()
+    zdroj.cara = tuple(i == strana for i in range(3))
+    for i in range(40):
+        robot.vycti_senzory_cary()
+        robot.jed_po_care(0.15, 0.5)
+        robot.aktualizuj_se(False)
+        sleep(5)
+    zdroj.cara = (False, False, False)
+    return robot
+
+def test_hledani_cary_obloukem():
+    from microbit import zdroj
+    robot = ztrat_caru(0)
+    if robot.vycti_senzory_cary() != K.ZTRACEN:
+        return 0
+    uhel_ztraceni = robot.poloha()[2]
+    for i in range(2000):
+        # cara se objevi, az se robot otoci o 0.5 rad
+        if robot.poloha()[2] - uhel_ztraceni > 0.5:
+            zdroj.cara = (False, True, False)
+        vysledek = robot.hledej_caru(0.1, 3)
+        if vysledek is not None:
+            break
+        robot.aktualizuj_se(False)
+        sleep(5)
+    # cara byla vlevo, takze ji nasel obloukem doleva a hned, bez rozmitani
+    return int(vysledek == K.CARA and robot.hledani is None and robot.pozadovana_dopredna > 0)
+
+def test_hledani_cary_vzda_to_na_miste_ztraty():
+    robot = ztrat_caru(2)
+    robot.vycti_senzory_cary()
+    x_cary, y_cary, uhel_cary = robot.poloha_u_cary
+    faze = set()
+    for i in range(4000):
+        vysledek = robot.hledej_caru(0.1, 3)
+        if vysledek is not None:
+            break
+        faze.add(robot.hledani[0])
+        robot.aktualizuj_se(False)
+        sleep(5)
+    # prosel vsechny faze a vratil se (podle odometrie) tam, kde caru videl naposledy
+    x, y, uhel = robot.poloha()
+    return int(vysledek == K.ZTRACEN and faze == {1, 2, 3, 4, 5, 6} and abs(x - x_cary) < 0.03
+               and abs(y - y_cary) < 0.03 and abs(uhel - uhel_cary) < 0.1)
+
+def test_kompenzace_napeti_baterie():
+    from microbit import zdroj
+    rychlosti = []
+    for nominalni in (None, 0.00898 * 850):
+        zdroj.napeti_adc = 680  # baterie vybita na 80 % napeti pri kalibraci
+        robot = pripraveny_robot()
+        robot.napajeni.nominalni = nominalni
+        robot.jed(0.15, 0)  # pravy motor ma jeste rezervu PWM i po kompenzaci
+        for i in range(50):
+            robot.aktualizuj_se(False)
+            sleep(5)
+        # prumerna rychlost za 0.5 s, synchronizace kol rychlosti kol po tikach dorovnava
+        levy, pravy, cas = zdroj.levy.uhel, zdroj.pravy.uhel, zdroj.cas_posledni_aktualizace
+        for i in range(50):
+            robot.aktualizuj_se(False)
+            sleep(5)
+        doba = (zdroj.cas_posledni_aktualizace - cas) / 1000000
+        rychlosti.append(((zdroj.levy.uhel - levy) * 0.067 / 2 / doba, (zdroj.pravy.uhel - pravy) * 0.067 / 2 / doba))
+        robot.jed(0, 0)
+
+    # bez kompenzace jede pomaleji, s kompenzaci jako pri plne baterii
+    if not (rychlosti[0][0] < 0.13 and rychlosti[0][1] < 0.13):
+        return 0
+    if not (abs(rychlosti[1][0] - 0.15) < 0.01 and abs(rychlosti[1][1] - 0.15) < 0.01):
+        return 0
+
+    # napeti se prumeruje, jeden vzorek po skoku napeti ho posune jen o kousek
+    zdroj.napeti_adc = 850
+    for i in range(110):
+        robot.aktualizuj_se(False)
+        sleep(5)
+    return int(0.00898 * 680 < robot.napajeni.napeti() < 0.00898 * 850 and robot.napajeni.koeficient() > 1)
 
-    robot = Robot(0.15, 0.067, levy_faktor, pravy_faktor, True)
+def test_pomala_jizda_pres_mrtve_pasmo():
+    from microbit import zdroj
+    vysledky = []
+    for s_mrtvym_pasmem in (False, True):
+        zdroj.levy.uhel = zdroj.pravy.uhel = 0.0
+        robot = pripraveny_robot()
+        if s_mrtvym_pasmem:
+            # rozjezd a dojezd modelu motoru v simulaci (z kalibrace.py nebo robot.kalibruj)
+            robot.levy_motor.min_pwm_rozjezd, robot.levy_motor.min_pwm_dojezd = 79, 41
+            robot.pravy_motor.min_pwm_rozjezd, robot.pravy_motor.min_pwm_dojezd = 113, 113
+        dojel = False
+        for i in range(400):
+            if robot.jed_vzdalenost(0.05, 0.05):
+                dojel = True
+                break
+            robot.aktualizuj_se(False)
+            sleep(5)
+        vysledky.append((dojel, (zdroj.levy.uhel + zdroj.pravy.uhel) / 2 * 0.067 / 2))
+
+    # pri 0.05 m/s je PWM obou kol pod rozjezdem, bez kompenzace se robot ani nehne
+    if vysledky[0] != (False, 0.0):
+        return 0
+    return int(vysledky[1][0] and abs(vysledky[1][1] - 0.05) < 0.01)
+
+def test_kalibrace_zmeri_mrtve_pasmo():
+    from microbit import zdroj
+    zdroj.stisky["a"] = []  # tlacitko A by kalibraci prerusilo
+    robot = Robot(0.15, 0.067, False)
     robot.inicializuj()
-    robot.jed(0.067*Konstanty.PI, 0)
+    if robot.kalibruj(60, 200, 10) != 0:
+        return 0
+    # model motoru: levy se rozjede od 79 a zastavi pod 41, pravy 113 a 113
+    levy, pravy = robot.levy_motor, robot.pravy_motor
+    return int(79 <= levy.min_pwm_rozjezd < 89 and 41 <= levy.min_pwm_dojezd < 51
+               and 113 <= pravy.min_pwm_rozjezd < 123 and 113 <= pravy.min_pwm_dojezd < 123)
 
-    while not button_a.was_pressed():
+def test_synchronizace_kol_drzi_smer():
+    import microbit
+    vysledky = []
+    for synchronizovat in (False, True):
+        zdroj = microbit.vynuluj()
+        robot = pripraveny_robot()
+        robot.synchronizovat_kola = synchronizovat
+        # kalibrace leveho kola je o 15 % vedle, samo jede rychleji, nez ma
+        robot.levy_motor.a *= 0.85
+        uhly = []
+        for dopredna, uhlova in ((0.15, 0), (0.15, 1.0)):
+            robot.jed(dopredna, uhlova)
+            for i in range(400):
+                robot.aktualizuj_se(False)
+                sleep(5)
+            uhly.append((zdroj.pravy.uhel - zdroj.levy.uhel) * 0.067 / 2 / 0.15)
+        robot.jed(0, 0)
+        # rovne za 2 s a oblouk 1 rad/s za 2 s
+        vysledky.append((uhly[0], uhly[1] - uhly[0]))
+
+    if not (abs(vysledky[0][0]) > 0.2 and abs(vysledky[0][1] - 2) > 0.1):
+        return 0
+    # se synchronizaci je odchylka nejvys par tiku enkoderu
+    return int(abs(vysledky[1][0]) < 0.07 and abs(vysledky[1][1] - 2) < 0.07)
+
+def test_naladeni_regulace_otacek():
+    import microbit
+    from utime import hodiny
+    vysledky = []
+    for naladit in (False, True):
+        zdroj = microbit.vynuluj()
+        zdroj.levy.casova_konstanta = zdroj.pravy.casova_konstanta = 0.05
+        robot = pripraveny_robot()
+        robot.synchronizovat_kola = False  # jen regulace otacek kazdeho kola
+        if naladit:
+            zacatek = hodiny.cas_us
+            if robot.nalad_regulaci() != 0 or hodiny.cas_us - zacatek > 8000000:
+                return 0
+
+        # baterie klesla a kalibrace uz nesedi, regulace otacek to ma dorovnat
+        zdroj.napeti_adc = 720
+        robot.jed(0.12, 0)
+        for i in range(400):
+            robot.aktualizuj_se(True)
+            sleep(5)
+        levy, pravy, cas = zdroj.levy.uhel, zdroj.pravy.uhel, zdroj.cas_posledni_aktualizace
+        for i in range(200):
+            robot.aktualizuj_se(True)
+            sleep(5)
+        doba = (zdroj.cas_posledni_aktualizace - cas) / 1000000
+        vysledky.append(((zdroj.levy.uhel - levy) * 0.067 / 2 / doba, (zdroj.pravy.uhel - pravy) * 0.067 / 2 / doba))
+
+    # puvodni P = 6 jednou za sekundu za 3 s nedorovna, naladena regulace ano
+    if not (vysledky[0][0] < 0.11 and vysledky[0][1] < 0.11):
+        return 0
+    return int(abs(vysledky[1][0] - 0.12) < 0.005 and abs(vysledky[1][1] - 0.12) < 0.005)
+
+def test_regulace_otacek_se_synchronizaci():
+    import microbit
+    zdroj = microbit.vynuluj()
+    zdroj.levy.casova_konstanta = zdroj.pravy.casova_konstanta = 0.05
+    robot = pripraveny_robot()  # synchronizace kol zapnuta
+    if robot.nalad_regulaci() != 0:
+        return 0
+
+    # korekce synchronizace nesmi zahodit, co regulace otacek dorovnala
+    zdroj.napeti_adc = 720
+    robot.jed(0.12, 0)
+    for i in range(400):
+        robot.aktualizuj_se(True)
+        sleep(5)
+    levy, pravy, cas = zdroj.levy.uhel, zdroj.pravy.uhel, zdroj.cas_posledni_aktualizace
+    for i in range(200):
+        robot.aktualizuj_se(True)
         sleep(5)
-        robot.aktualizuj_se()
+    doba = (zdroj.cas_posledni_aktualizace - cas) / 1000000
+    leva = (zdroj.levy.uhel - levy) * 0.067 / 2 / doba
+    prava = (zdroj.pravy.uhel - pravy) * 0.067 / 2 / doba
+    return int(abs(leva - 0.12) < 0.006 and abs(prava - 0.12) < 0.006)
 
-    robot.jed(0,0)
+def test_ulozena_regulace_otacek():
+    import os
+    import tempfile
+    import microbit
+    zdroj = microbit.vynuluj()
+    zdroj.levy.casova_konstanta = zdroj.pravy.casova_konstanta = 0.05
+    with tempfile.TemporaryDirectory() as slozka:
+        robot = pripraveny_robot()
+        robot.levy_motor.min_pwm_rozjezd, robot.levy_motor.min_pwm_dojezd = 79, 41
+        robot.soubor_kalibrace = os.path.join(slozka, "kalibrace.txt")
+        if robot.nalad_regulaci() != 0:
+            return 0
+        # dalsi spusteni: kalibrace i naladena regulace se nactou v inicializuj
+        nacteny = Robot(0.15, 0.067, False)
+        nacteny.soubor_kalibrace = robot.soubor_kalibrace
+        nacteny.inicializuj()
+    for motor, puvodni in ((nacteny.levy_motor, robot.levy_motor), (nacteny.pravy_motor, robot.pravy_motor)):
+        if not (motor.zkalibrovano and abs(motor.a - puvodni.a) < 1e-9 and abs(motor.b - puvodni.b) < 1e-9):
+            return 0
+        if not (abs(motor.kp_otacek - puvodni.kp_otacek) < 1e-9 and abs(motor.ki_otacek - puvodni.ki_otacek) < 1e-9
+                and motor.perioda_regulace == puvodni.perioda_regulace
+                and motor.enkoder.perioda_rychlosti == puvodni.enkoder.perioda_rychlosti):
+            return 0
+    # regulace se opravdu naladila (neni vychozi P = 6) a mrtve pasmo se ulozilo taky
+    return int(nacteny.levy_motor.kp_otacek > 0 and nacteny.levy_motor.min_pwm_rozjezd == 79
+               and nacteny.pravy_motor.min_pwm_rozjezd == -1)
+
+def test_zaseknute_kolo():
+    import microbit
+    from utime import hodiny
+    pwm_bez_detekce = None
+    for detekce in (False, True):
+        zdroj = microbit.vynuluj()
+        robot = pripraveny_robot()
+        robot.synchronizovat_kola = False  # jen regulace otacek kazdeho kola
+        for motor in (robot.levy_motor, robot.pravy_motor):
+            motor.kp_otacek, motor.ki_otacek, motor.perioda_regulace = 14, 43, 200000  # jako z nalad_regulaci
+            motor.enkoder.perioda_rychlosti = 200000
+            motor.zaseknuti.zapnuto = detekce
+        robot.jed(0.15, 0)
+        for i in range(100):
+            if robot.aktualizuj_se(True) is not None:
+                return 0  # jedouci kolo neni zaseknute
+            sleep(5)
+
+        # levym kolem narazi, regulace otacek by PWM zvedla az na 255
+        zdroj.levy.zablokovano = True
+        naraz = hodiny.cas_us
+        for i in range(300):
+            if robot.aktualizuj_se(True) == K.ZASEKNUTO:
+                break
+            sleep(5)
+        if not detekce:
+            pwm_bez_detekce = robot.levy_motor.PWM
+            continue
+        if hodiny.cas_us - naraz > 100000 or not robot.levy_motor.zaseknuti.zaseknuto:
+            return 0
+        # zaseknute kolo stoji i pres dalsi prikazy, pravym se jede dal
+        for i in range(60):
+            robot.jed(0.15, 0)
+            robot.aktualizuj_se(True)
+            sleep(5)
+            if robot.levy_motor.PWM != 0 or robot.pravy_motor.PWM == 0:
+                return 0
+
+    if pwm_bez_detekce != 255:
+        return 0
+
+    # po pauze to kolo zkusi znovu, a kdyz uz neni zablokovane, jede
+    zdroj.levy.zablokovano = False
+    uhel = zdroj.levy.uhel
+    for i in range(100):
+        robot.aktualizuj_se(True)
+        sleep(5)
+    if robot.levy_motor.zaseknuti.zaseknuto or zdroj.levy.uhel - uhel < 1:
+        return 0
+
+    # vyprosteni po narazu: odjede zpet proti smeru jizdy
+    zdroj.pravy.zablokovano = True
+    for i in range(300):
+        if robot.aktualizuj_se(True) == K.ZASEKNUTO:
+            break
+        sleep(5)
+    else:
+        return 0
+    zdroj.pravy.zablokovano = False
+    robot.jed(0, 0)
+    x = robot.poloha()[0]
+    for i in range(400):
+        if robot.vyprosti_se(0.1, 0.05):
+            break
+        robot.aktualizuj_se(True)
+        sleep(5)
+    else:
+        return 0
+    return int(abs(x - robot.poloha()[0] - 0.05) < 0.01)
 
 if __name__ =="__main__":
     zakladni_test_spusteni()
-
@@ -1,4 +1,4 @@
-from senzory import Senzory
+from cely_projekt import Senzory, K
 
 def zakladni_test_spusteni():
     try:
@@ -8,6 +8,16 @@ def zakladni_test_spusteni():
     except:
         return 0
 
+def test_spusteni():
+    return zakladni_test_spusteni()
+
+def test_vsechny_klice():
+    data = Senzory(False).precti_senzory()
+    for klic in (K.LV_S_CARY, K.PROS_S_CARY, K.PR_S_CARY, K.LV_IR, K.PR_IR, K.LV_ENKODER, K.PR_ENKODER):
+        if klic not in data:
+            return 0
+    return 1
+
 
 if __name__ == "__main__":
     print(zakladni_test_spusteni(), "zakladni_test_spusteni")
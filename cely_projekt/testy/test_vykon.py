@@ -0,0 +1,82 @@
+# Testy vykonu - jen na pocitaci (spust_testy.py), pocitaji i2c transakce
+# a pamet v nahrade modulu microbit ze slozky simulace
+
+import tracemalloc
+
+from microbit import i2c
+
+from cely_projekt import Robot
+
+MAX_PAMET_NA_TIK = 1024 # bytu, merene v CPythonu na pocitaci, v MicroPythonu budou cisla jina
+MAX_ZADRZENYCH_BLOKU_NA_TIK = 1 # bloku pameti, ktere tik alokuje a necha alokovane (prumer z vice tiku)
+
+def pripraveny_robot(verze=False):
+    robot = Robot(0.15, 0.067, verze)
+    robot.inicializuj()
+    for motor in (robot.levy_motor, robot.pravy_motor):
+        motor.a = 25
+        motor.b = 30
+        motor.zkalibrovano = True
+    return robot
+
+def tik(robot):
+    # jedna obratka smycky ve stavu jed_po_care
+    robot.vycti_senzory_cary()
+    robot.jed_po_care(0.1, 0.5)
+    robot.aktualizuj_se(False)
+
+def test_i2c_na_jed():
+    robot = pripraveny_robot()
+    i2c.vynuluj_pocitadla()
+    robot.jed(0.1, 0.5)
+    # kazdy motor zapise vypnuty a zapnuty kanal
+    return int(i2c.pocet_zapisu == 4 and i2c.pocet_cteni == 0)
+
+def test_i2c_na_vycti_senzory_cary():
+    robot = pripraveny_robot()
+    i2c.vynuluj_pocitadla()
+    robot.vycti_senzory_cary()
+    return int(i2c.pocet_cteni == 1 and i2c.pocet_zapisu == 0)
+
+def test_i2c_na_tik():
+    robot = pripraveny_robot()
+    robot.posledni_cas_reg_cary_us -= robot.perioda_cary_us + 1 # at se v tiku reguluje
+    i2c.vynuluj_pocitadla()
+    tik(robot)
+    # senzory cary 2x, enkodery pres expander 2x, motory 4 zapisy - i jedna transakce navic je chyba
+    return int(i2c.pocet_cteni == 4 and i2c.pocet_zapisu == 4)
+
+def test_pamet_na_tik():
+    robot = pripraveny_robot()
+    tik(robot)
+    tracemalloc.start()
+    try:
+        pred, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(10):
+            tik(robot)
+        _, spicka = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    print("spicka pameti na tik", spicka - pred, "B")
+    return int(spicka - pred <= MAX_PAMET_NA_TIK)
+
+def test_zadrzene_bloky_na_tik():
+    # pocita bloky, ktere po tiku zustanou alokovane (unik pameti po malych objektech), ne vsechny alokace;
+    # docasne objekty uvolnene jeste v tiku CPython spocitat neumi, ty hlida spicka v test_pamet_na_tik
+    robot = pripraveny_robot()
+    for i in range(5):
+        tik(robot)
+    tiku = 20
+    bez_tracemalloc = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    try:
+        pred = tracemalloc.take_snapshot().filter_traces(bez_tracemalloc)
+        for i in range(tiku):
+            tik(robot)
+        po = tracemalloc.take_snapshot().filter_traces(bez_tracemalloc)
+    finally:
+        tracemalloc.stop()
+    bloku = sum(rozdil.count_diff for rozdil in po.compare_to(pred, "traceback") if rozdil.count_diff > 0)
+    print("zadrzenych bloku na tik", bloku / tiku)
+    return int(bloku <= MAX_ZADRZENYCH_BLOKU_NA_TIK * tiku)
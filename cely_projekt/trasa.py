@@ -0,0 +1,104 @@
+from cely_projekt import K
+
+# Trasa pro stavovy automat, staci i zakladni jizde po care (bez mapy, planovani a uceni z navigace.py,
+# ktere na microbitu zaberou hodne pameti, proto jsou zvlast)
+
+PRIKAZY = (K.ROVNE, K.VLEVO, K.VPRAVO, K.VZAD)
+
+# Prelozena trasa (bytecode): bytearray instrukci, kazda je kod (1 byte) a pripadne argument
+#   0 ROVNE, 1 VLEVO, 2 VPRAVO, 3 VZAD - prikaz pro dalsi krizovatku (kod = index v PRIKAZY,
+#                                         stejne kody jsou v trase v souboru s mapou)
+#   4 JED + 2 byty (mm, little endian)  - ujet vzdalenost rovne podle enkoderu
+#   5 RYCHLOST + 1 byte (cm/s)          - dopredna rychlost dalsi jizdy
+#   6 TLACITKO                          - zastavit a pockat na tlacitko B
+OP_JED = 4
+OP_RYCHLOST = 5
+OP_TLACITKO = 6
+OP_KONEC = 255  # vraci Trasa.dalsi() na konci trasy, v bytecode neni
+DELKA_INSTRUKCE = (1, 1, 1, 1, 3, 2, 1)
+
+def preloz(popis):
+    """
+    Prelozi popis trasy na bytecode, nebo vrati None, pokud mu nerozumi. Popis je seznam prikazu
+    (napr. z Mapa.naplanuj), nebo text, napr. "rychlost=0.3 3*rovne vlevo jed=0.15 tlacitko vpravo"
+    (jed v m)
+    """
+    if type(popis) == str:
+        popis = popis.replace(",", " ").split()
+    kod = bytearray()
+    try:
+        for slovo in popis:
+            pocet = 1
+            if "*" in slovo:
+                pocet, slovo = slovo.split("*", 1)
+                pocet = int(pocet)
+                if pocet < 1:
+                    return None
+            hodnota = 0
+            if "=" in slovo:
+                slovo, hodnota = slovo.split("=", 1)
+                hodnota = float(hodnota)
+
+            if slovo in PRIKAZY:
+                instrukce = bytes([PRIKAZY.index(slovo)])
+            elif slovo == "jed" and 0 < round(hodnota * 1000) < 65536:  # v m, do bytecode v mm
+                instrukce = bytes([OP_JED]) + round(hodnota * 1000).to_bytes(2, "little")
+            elif slovo == "rychlost" and 1 <= round(hodnota * 100) < 256:  # v m/s, do bytecode v cm/s, 0 by zastavila
+                instrukce = bytes([OP_RYCHLOST, round(hodnota * 100)])
+            elif slovo == "tlacitko":
+                instrukce = bytes([OP_TLACITKO])
+            else:
+                return None
+            for i in range(pocet):
+                kod.extend(instrukce)
+    except ValueError:
+        return None
+    return kod
+
+class Trasa:
+    """
+    Interpret prelozene trasy: dalsi() vrati dalsi instrukci (kod, argument) a posune se za ni
+    """
+
+    def __init__(self, kod=b""):
+        self.kod = bytearray(kod)
+        self.pc = 0
+
+    def na_zacatek(self):
+        self.pc = 0
+
+    def dalsi(self):
+        pc = self.pc
+        if pc >= len(self.kod):
+            return OP_KONEC, 0
+        kod = self.kod[pc]
+        if kod >= len(DELKA_INSTRUKCE) or pc + DELKA_INSTRUKCE[kod] > len(self.kod):
+            self.pc = len(self.kod)  # poskozeny bytecode, dal se nejede
+            return OP_KONEC, 0
+
+        self.pc = pc + DELKA_INSTRUKCE[kod]
+        if kod == OP_JED:
+            return kod, self.kod[pc + 1] | (self.kod[pc + 2] << 8)
+        if kod == OP_RYCHLOST:
+            return kod, self.kod[pc + 1]
+        return kod, 0
+
+    def rovnych_dal(self):
+        # kolik prikazu ROVNE nasleduje hned za sebou od aktualni instrukce (trasa se neposune)
+        pc = self.pc
+        while pc < len(self.kod) and self.kod[pc] == 0:
+            pc += 1
+        return pc - self.pc
+
+    def prikazy(self):
+        # jen prikazy pro krizovatky (napr. pro Mapa.uloz), od zacatku trasy
+        pc = self.pc
+        self.pc = 0
+        prikazy = []
+        kod, argument = self.dalsi()
+        while kod != OP_KONEC:
+            if kod < len(PRIKAZY):
+                prikazy.append(PRIKAZY[kod])
+            kod, argument = self.dalsi()
+        self.pc = pc
+        return prikazy